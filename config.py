@@ -7,6 +7,7 @@ from pathlib import Path
 
 CONFIG_DIR = Path.home() / ".qushuiyin"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+AD_PAGE_LIBRARY_FILE = CONFIG_DIR / "ad_pages.json"  # 广告页指纹库
 
 # 默认配置
 DEFAULT_CONFIG = {
@@ -26,9 +27,18 @@ DEFAULT_CONFIG = {
         "default_zoom": 1.0
     },
     "recent_files": [],
-    "delete_mode": {
-        "region": "actual",  # actual or cover
-        "text": "actual"
+    # 以下三组只保存用户修改过的处理选项，未设置的项使用 core.batch_engine.DEFAULT_OPTIONS 中的默认值
+    # delete_mode：region（区域删除模式）、text（文字删除模式）、crop_min_keep_ratio、crop_trim、overlay_fill
+    "delete_mode": {},
+    # batch：除 workers 外还可设置 shard_pages、shard_size
+    "batch": {
+        "workers": 0  # 并行处理进程数，0 表示自动（CPU核心数），1 表示逐个处理
+    },
+    # strategies：各水印识别策略的开关和参数，键名与 DEFAULT_OPTIONS 相同
+    "strategies": {},
+    "detection": {
+        "sample_pages": 30,  # 自动识别水印时最多抽样的页面数
+        "min_page_ratio": 0.6  # 候选内容至少出现在多少比例的抽样页面上
     }
 }
 
@@ -0,0 +1,219 @@
+"""广告页识别：按文字、图片和版面为页面计算指纹，找出跨文件重复、文件内反复插入或已登记的广告页"""
+import hashlib
+import json
+import os
+import re
+import time
+import fitz
+from pathlib import Path
+from typing import List, Dict, Optional
+from core.text_matcher import normalize_text
+
+
+# 版面量化步长（点）
+LAYOUT_GRID = 10
+# 文字少于该字符数且没有图片的页面（空白页、只有页码或章节名的页面）不计算指纹
+MIN_TEXT_LENGTH = 10
+
+# 只有数字和标点的文字块（页码，如 "- 12 -"）逐页变化，不参与指纹
+_PAGE_NUMBER = re.compile(r"[\d\W_]*")
+
+
+def page_fingerprint(doc: fitz.Document, page: fitz.Page, image_digests: Dict[int, str] = None) -> Optional[str]:
+    """
+    计算页面指纹
+
+    由页面尺寸、规范化的文字、图片原始数据流的 MD5 和量化的文字块左上角位置合成一个 MD5，
+    内容几乎相同的页面得到相同的指纹，匹配只需查哈希表。页码块不参与。
+
+    Args:
+        doc: 页面所在的文档
+        page: 页面
+        image_digests: xref -> 图片摘要的缓存（同一文档中重复使用的图片只计算一次）
+
+    Returns:
+        str: 指纹，内容过少的页面返回 None
+    """
+    if image_digests is None:
+        image_digests = {}
+
+    texts = []
+    layout = []
+    for x0, y0, x1, y1, text, block_no, block_type in page.get_text("blocks"):
+        text = normalize_text(text)
+        if block_type != 0 or _PAGE_NUMBER.fullmatch(text):
+            continue
+        texts.append(text)
+        layout.append((round(x0 / LAYOUT_GRID), round(y0 / LAYOUT_GRID)))
+    text = " ".join(texts)
+
+    images = []
+    for image in page.get_images():
+        xref = image[0]
+        if xref not in image_digests:
+            image_digests[xref] = hashlib.md5(doc.xref_stream_raw(xref) or b"").hexdigest()
+        images.append(image_digests[xref])
+
+    if len(text.replace(" ", "")) < MIN_TEXT_LENGTH and not images:
+        return None
+
+    size = tuple(round(value / LAYOUT_GRID) for value in (page.rect.width, page.rect.height))
+    feature = repr((size, text, sorted(images), sorted(layout)))
+    return hashlib.md5(feature.encode("utf-8")).hexdigest()
+
+
+def fingerprint_file(file_path: str) -> Dict:
+    """
+    计算文件所有页面的指纹（可在子进程中执行）
+
+    Returns:
+        dict: fingerprints（按页序的指纹列表，内容过少的页面为 None）和 labels（指纹 -> 页面文字摘要）
+    """
+    fingerprints = []
+    labels = {}
+    image_digests = {}
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            fingerprint = page_fingerprint(doc, page, image_digests)
+            fingerprints.append(fingerprint)
+            if fingerprint is not None and fingerprint not in labels:
+                labels[fingerprint] = " ".join(page.get_text().split())[:40]
+    return {"fingerprints": fingerprints, "labels": labels}
+
+
+class AdPageLibrary:
+    """
+    已知广告页指纹库
+
+    保存为 JSON 文件（默认在配置目录中），在多次运行之间保留；
+    每个指纹记录页面文字摘要、首次登记时间和被识别的次数。
+    """
+
+    def __init__(self, path: str = None):
+        """加载指纹库，path 为 None 时只在内存中使用"""
+        self.path = Path(path) if path else None
+        self.pages: Dict[str, Dict] = {}
+        self._modified = False
+
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.pages = json.load(f).get("pages", {})
+            except Exception as e:
+                print(f"加载广告页指纹库失败: {e}")
+
+    def __contains__(self, fingerprint: str) -> bool:
+        """指纹是否已登记"""
+        return fingerprint in self.pages
+
+    def __len__(self):
+        """返回已登记的指纹数"""
+        return len(self.pages)
+
+    def add(self, fingerprint: str, label: str = ""):
+        """登记指纹（已登记的只增加识别次数）"""
+        entry = self.pages.get(fingerprint)
+        if entry is None:
+            self.pages[fingerprint] = {"label": label, "added": time.strftime("%Y-%m-%d"), "count": 1}
+        else:
+            entry["count"] = entry.get("count", 0) + 1
+        self._modified = True
+
+    def save(self):
+        """有改动时写回文件（先写临时文件再替换，避免中断时损坏）"""
+        if not self.path or not self._modified:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "pages": self.pages}, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self._modified = False
+        except Exception as e:
+            print(f"保存广告页指纹库失败: {e}")
+
+
+class AdPageDetector:
+    """
+    广告页识别器
+
+    汇总一批文件的页面指纹后，满足以下任一条件的页面判定为广告页：
+    - 指纹已在指纹库中登记；
+    - 出现在不少于 min_files 个文件中（跨文件插入的推广页）；
+    - 在同一文件中出现不少于 repeat_min 次（每隔若干页插入一次）。
+    后两种按批量统计得到的结果超过文件页数 max_drop_ratio 时视为误判（如同一文档的不同版本），
+    该文件只删除指纹库中的页面。
+    """
+
+    def __init__(self, library: AdPageLibrary = None, min_files: int = 2, repeat_min: int = 3,
+                 max_drop_ratio: float = 0.3):
+        """初始化识别器"""
+        self.library = library if library is not None else AdPageLibrary()
+        self.min_files = min_files
+        self.repeat_min = repeat_min
+        self.max_drop_ratio = max_drop_ratio
+        self.files: Dict[object, List[Optional[str]]] = {}
+        self.labels: Dict[str, str] = {}
+
+    def add_file(self, key, fingerprints: Dict):
+        """
+        加入一个文件的页面指纹
+
+        Args:
+            key: 文件标识（如批量列表中的文件索引）
+            fingerprints: fingerprint_file 的返回值
+        """
+        self.files[key] = fingerprints["fingerprints"]
+        for fingerprint, label in fingerprints["labels"].items():
+            self.labels.setdefault(fingerprint, label)
+
+    def detect(self, learn: bool = False) -> Dict[object, List[int]]:
+        """
+        识别各文件中的广告页
+
+        Args:
+            learn: 是否把按批量统计识别出的广告页登记到指纹库
+
+        Returns:
+            dict: {文件标识: [广告页索引（0-based，升序）, ...]}，没有广告页的文件不包含在内
+        """
+        # 每个指纹出现的文件数（同一文件内的重复只计一次）
+        file_counts = {}
+        for fingerprints in self.files.values():
+            for fingerprint in set(fingerprints):
+                if fingerprint is not None:
+                    file_counts[fingerprint] = file_counts.get(fingerprint, 0) + 1
+
+        result = {}
+        matched = set()
+        learned = set()
+        for key, fingerprints in self.files.items():
+            repeats = {}
+            for fingerprint in fingerprints:
+                if fingerprint is not None:
+                    repeats[fingerprint] = repeats.get(fingerprint, 0) + 1
+
+            known = []
+            batch = []
+            for page_num, fingerprint in enumerate(fingerprints):
+                if fingerprint is None:
+                    continue
+                if fingerprint in self.library:
+                    known.append(page_num)
+                elif file_counts[fingerprint] >= self.min_files or repeats[fingerprint] >= self.repeat_min:
+                    batch.append(page_num)
+
+            if len(batch) + len(known) > self.max_drop_ratio * len(fingerprints):
+                batch = []
+            matched.update(fingerprints[page_num] for page_num in known)
+            learned.update(fingerprints[page_num] for page_num in batch)
+
+            pages = sorted(known + batch)
+            if pages:
+                result[key] = pages
+
+        # 已登记的指纹增加识别次数，按需登记新识别出的指纹
+        for fingerprint in matched | (learned if learn else set()):
+            self.library.add(fingerprint, self.labels.get(fingerprint, ""))
+        return result
@@ -0,0 +1,424 @@
+"""批量处理引擎（不依赖GUI，可无界面运行）"""
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import List, Dict, Callable, Optional
+
+from core.batch_processor import process_file, process_shard, assemble_shards
+
+
+# 任务选项默认值
+DEFAULT_OPTIONS = {
+    "region_mode": "actual",  # 区域删除模式：actual、cover、crop or overlay
+    "crop_min_keep_ratio": 0.5,  # 裁剪模式下裁剪后至少保留的页面面积比例，不足时改为删除
+    "crop_trim": False,  # 裁剪模式下同时删除裁剪掉的页边内容
+    "overlay_fill": "white",  # 遮盖模式的颜色：white、sample（取区域四周背景色）或颜色值
+    "text_mode": "actual",  # 文字删除模式：actual or operator
+    "output_suffix": "【去水印】",  # 输出文件名后缀
+    "optimize": True,  # 保存时压缩优化
+    "shard_pages": 0,  # 页数达到该值的文件拆分为页面分片并行处理，0 表示不拆分
+    "shard_size": 500,  # 每个分片的页数
+    "form_xobject": False,  # 清除被多数页面共用的水印表单（Form XObject）
+    "form_min_page_ratio": 0.5,  # 水印表单至少被多少比例的页面引用
+    "ocg_layers": False,  # 关闭并锁定疑似水印的图层（OCG）
+    "image_samples": [],  # 样例图片特征（见 core.image_index.image_signature），匹配的图片全部删除
+    "image_auto": False,  # 自动删除在多数页面上重复出现的图片
+    "image_min_page_ratio": 0.5,  # 重复图片至少出现在多少比例的页面上
+    "image_max_area_ratio": 0.5,  # 不透明且覆盖页面面积超过该比例的重复图片（扫描页、背景）不自动删除
+    "image_hash_distance": 6,  # 感知哈希的最大汉明距离
+    "annotations": False,  # 直接删除水印类注释
+    "annot_subtypes": ["Watermark"],  # 直接删除的注释类型
+    "annot_contents": [],  # 注释内容正则表达式
+    "link_url_patterns": [],  # 推广链接地址正则表达式
+    "annot_repeated_ratio": 0.5,  # 相同注释的最小出现页面比例，0 表示不启用
+    "transparency": False,  # 删除多数页面共用的半透明叠加层
+    "transparency_min_page_ratio": 0.5,  # 半透明叠加层的最小出现页面比例
+    "vector_paths": False,  # 删除多数页面相同位置重复出现的矢量路径
+    "vector_min_page_ratio": 0.5,  # 矢量路径水印的最小出现页面比例
+    "text_styles": [],  # 按样式删除文字的条件列表（见 core.text_styles.TextStyleFilter）
+    "header_footer": False,  # 识别并删除内容逐页变化的页眉页脚条带
+    "band_sample_pages": 30,  # 页眉页脚识别的最多抽样页数
+    "band_min_page_ratio": 0.6,  # 页眉页脚条带的最小出现抽样页面比例
+    "band_edge_ratio": 0.15,  # 页眉页脚只在页面上下该比例范围内识别
+    "raster_clean": False,  # 按像素颜色清除扫描页中的水印（区域内或整页）
+    "raster_criteria": None,  # 水印像素识别条件（见 core.raster_cleaner.classify_pixels），None 为浅灰色
+    "raster_workers": 0,  # 扫描页并行处理进程数，0 表示按CPU核心数（批量子进程中总是 1）
+    "raster_quality": 90,  # JPEG 扫描图片重新编码的质量
+    "ad_pages": False,  # 识别并删除广告页（跨文件重复、文件内反复插入或已登记在指纹库中的页面）
+    "ad_library": None,  # 广告页指纹库文件路径，None 表示不使用指纹库
+    "ad_learn": False,  # 把按批量统计识别出的广告页登记到指纹库（默认不登记）
+    "ad_min_files": 2,  # 跨文件重复的广告页至少出现在多少个文件中
+    "ad_repeat_min": 3,  # 文件内反复插入的广告页至少出现多少次
+    "ad_max_drop_ratio": 0.3  # 按批量统计识别出的广告页超过文件页数该比例时视为误判
+}
+
+# 按整份文件中出现的页面比例识别水印的策略：拆分后各分片分别统计，结果会与整份文件处理不同，
+# 启用时不拆分文件（广告页指纹在调度前按整份文件计算，不受影响）
+WHOLE_DOCUMENT_OPTIONS = ("form_xobject", "image_auto", "transparency", "vector_paths", "header_footer")
+
+
+class BatchJob:
+    """批量处理任务描述"""
+
+    def __init__(self, files: List, regions: List[Dict] = None, texts: List[str] = None,
+                 excluded_pages: str = "", options: Dict = None):
+        """
+        初始化任务
+
+        Args:
+            files: 文件列表，元素为文件路径或包含 "path" 的文件信息字典
+                字典中可用 "index" 指定区域匹配所用的文件索引，默认为列表位置
+            regions: 区域列表（与 RegionDialog 返回的格式相同）
+            texts: 要删除的文字列表
+            excluded_pages: 排除页面范围字符串，如 "1-5, 10"
+            options: 处理选项，未提供的项使用 DEFAULT_OPTIONS
+        """
+        self.files = []
+        for position, entry in enumerate(files):
+            if isinstance(entry, dict):
+                file_info = dict(entry)
+            else:
+                file_info = {"path": str(entry)}
+            file_info.setdefault("name", Path(file_info["path"]).name)
+            file_info.setdefault("index", position)
+            self.files.append(file_info)
+
+        self.regions = list(regions or [])
+        self.texts = [text.strip() for text in (texts or []) if text and text.strip()]
+        self.excluded_pages = excluded_pages or ""
+        self.options = dict(DEFAULT_OPTIONS)
+        self.options.update(options or {})
+
+    def file_options(self, file_info: Dict) -> Dict:
+        """单个文件的处理选项（附带预先识别出的广告页 drop_pages）"""
+        if not file_info.get("drop_pages"):
+            return self.options
+        options = dict(self.options)
+        options["drop_pages"] = file_info["drop_pages"]
+        return options
+
+    def needs_whole_document(self) -> bool:
+        """是否启用了需要按整份文件统计的策略（见 WHOLE_DOCUMENT_OPTIONS，以及按重复比例删除注释）"""
+        options = self.options
+        if any(options.get(key) for key in WHOLE_DOCUMENT_OPTIONS):
+            return True
+        return bool(options.get("annotations")) and options.get("annot_repeated_ratio", 0) > 0
+
+    def make_task(self, file_info: Dict) -> tuple:
+        """生成单个文件的工作参数（需可被 pickle，以便在子进程中执行）"""
+        return (
+            file_info["index"],
+            file_info["path"],
+            self.regions,
+            self.texts,
+            self.excluded_pages,
+            self.file_options(file_info)
+        )
+
+    def make_shard_task(self, file_info: Dict, start: int, end: int, shard_path: str) -> tuple:
+        """生成页面分片的工作参数"""
+        return (
+            file_info["index"],
+            file_info["path"],
+            start,
+            end,
+            shard_path,
+            self.regions,
+            self.texts,
+            self.excluded_pages,
+            self.options
+        )
+
+    def make_assemble_task(self, file_info: Dict, shard_results: List[Dict]) -> tuple:
+        """生成分片合并的工作参数"""
+        return (
+            file_info["index"],
+            file_info["path"],
+            shard_results,
+            self.regions,
+            self.excluded_pages,
+            self.file_options(file_info)
+        )
+
+
+class SerialExecutor:
+    """在调用线程中直接执行任务的执行器（接口与 concurrent.futures 执行器一致）"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """立即执行任务并返回已完成的 Future"""
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """无需释放资源"""
+        pass
+
+
+def create_executor(workers: int = 1):
+    """
+    创建执行器
+
+    Args:
+        workers: 进程数，小于等于0时使用CPU核心数，1 表示在当前线程中逐个处理
+
+    Returns:
+        SerialExecutor 或 ProcessPoolExecutor
+    """
+    if not workers or workers < 1:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        return SerialExecutor()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+class BatchEngine:
+    """批量处理引擎：按任务描述调度文件处理，并通过回调报告进度"""
+
+    def __init__(self, job: BatchJob, executor=None, max_in_flight: int = None):
+        """
+        初始化引擎
+
+        Args:
+            job: 批量处理任务
+            executor: 执行器，任何提供 submit()/shutdown() 的对象均可，默认逐个处理
+                引擎运行结束后会关闭执行器
+            max_in_flight: 同时提交的最大任务数，应与执行器的进程数一致（默认 1，即逐个提交）
+        """
+        self.job = job
+        self.executor = executor or SerialExecutor()
+        self.max_in_flight = max(1, max_in_flight or 1)
+
+        self._paused = threading.Event()
+        self._stopped = threading.Event()
+
+    def pause(self):
+        """暂停：不再提交新文件，已提交的文件继续处理"""
+        self._paused.set()
+
+    def resume(self):
+        """继续处理"""
+        self._paused.clear()
+
+    def stop(self):
+        """停止：取消尚未开始的文件"""
+        self._stopped.set()
+        self._paused.clear()
+
+    @property
+    def is_stopped(self) -> bool:
+        """是否已停止"""
+        return self._stopped.is_set()
+
+    def run(self, on_file_start: Optional[Callable[[Dict], None]] = None,
+            on_file_done: Optional[Callable[[Dict, Dict], None]] = None) -> List[Dict]:
+        """
+        执行任务（阻塞直到全部完成或被停止）
+
+        启用分片（shard_pages > 0）且并行执行时，文件按页数从大到小调度：
+        页数达到 shard_pages 的文件拆分为页面分片；批量末尾有空闲进程时，
+        剩余文件中最大的一个也会被拆分，由空闲进程分担。启用了需要按整份文件
+        统计的策略时不拆分（见 BatchJob.needs_whole_document）。
+
+        Args:
+            on_file_start: 文件开始处理时的回调，参数为文件信息字典
+            on_file_done: 文件处理完成时的回调，参数为 (文件信息字典, 处理结果)
+                并行执行时按完成顺序调用
+
+        Returns:
+            list: 处理结果列表，按完成顺序排列
+        """
+        pending = list(self.job.files)
+        shard_queue = []  # 待提交的分片：(文件信息, 起始页, 结束页)
+        shard_states = {}  # 文件索引 -> 分片处理状态
+        running = {}  # Future -> (任务类型, 文件信息)
+        results = []
+
+        sharding = (self.max_in_flight > 1 and self.job.options.get("shard_pages", 0) > 0
+                    and not self.job.needs_whole_document())
+        if sharding:
+            # 大文件优先，缩短整批处理时间
+            for file_info in pending:
+                file_info["page_count"] = self._get_page_count(file_info)
+            pending.sort(key=lambda file_info: file_info["page_count"], reverse=True)
+
+        def finish(file_info, result):
+            results.append(result)
+            if on_file_done:
+                on_file_done(file_info, result)
+
+        try:
+            if self.job.options.get("ad_pages"):
+                self._detect_ad_pages()
+
+            while (pending or shard_queue or running) and not self._stopped.is_set():
+                while not self._paused.is_set() and len(running) < self.max_in_flight:
+                    if shard_queue:
+                        file_info, start, end = shard_queue.pop(0)
+                        shard_path = os.path.join(shard_states[file_info["index"]]["temp_dir"],
+                                                  f"shard_{start:06d}.pdf")
+                        future = self.executor.submit(
+                            process_shard, *self.job.make_shard_task(file_info, start, end, shard_path)
+                        )
+                        running[future] = ("shard", file_info)
+                        continue
+
+                    if not pending:
+                        break
+
+                    file_info = pending.pop(0)
+                    if on_file_start:
+                        on_file_start(file_info)
+
+                    free_slots = self.max_in_flight - len(running)
+                    shards = self._plan_shards(file_info, free_slots, len(pending)) if sharding else []
+                    if shards:
+                        shard_states[file_info["index"]] = {
+                            "total": len(shards),
+                            "results": [],
+                            "temp_dir": tempfile.mkdtemp(prefix="pdf_shards_")
+                        }
+                        shard_queue.extend((file_info, start, end) for start, end in shards)
+                        continue
+
+                    future = self.executor.submit(process_file, *self.job.make_task(file_info))
+                    running[future] = ("file", file_info)
+
+                if not running:
+                    time.sleep(0.1)
+                    continue
+
+                done, _ = wait(list(running), timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, file_info = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if kind == "shard":
+                            result = {"success": False, "error": str(e), "start": 0, "end": 0}
+                        else:
+                            result = self._failed_result(file_info, e)
+
+                    if kind == "shard":
+                        state = shard_states[file_info["index"]]
+                        state["results"].append(result)
+                        if len(state["results"]) == state["total"]:
+                            # 所有分片完成后合并，合并同样交给执行器
+                            future = self.executor.submit(
+                                assemble_shards, *self.job.make_assemble_task(file_info, state["results"])
+                            )
+                            running[future] = ("assemble", file_info)
+                        continue
+
+                    if kind == "assemble":
+                        state = shard_states.pop(file_info["index"])
+                        shutil.rmtree(state["temp_dir"], ignore_errors=True)
+
+                    finish(file_info, result)
+        finally:
+            # 停止时取消尚未开始的任务，正在运行的文件处理完后执行器退出
+            self.executor.shutdown(wait=not self._stopped.is_set(), cancel_futures=True)
+            for state in shard_states.values():
+                shutil.rmtree(state["temp_dir"], ignore_errors=True)
+
+        return results
+
+    def _detect_ad_pages(self):
+        """
+        处理前先计算所有文件的页面指纹（交给执行器并行计算），按整批统计识别广告页，
+        结果记在文件信息的 drop_pages 中，由各文件保存前统一删除
+        """
+        from core.ad_pages import AdPageDetector, AdPageLibrary, fingerprint_file
+
+        options = self.job.options
+        library = AdPageLibrary(options.get("ad_library"))
+        detector = AdPageDetector(
+            library,
+            options.get("ad_min_files", 2),
+            options.get("ad_repeat_min", 3),
+            options.get("ad_max_drop_ratio", 0.3)
+        )
+
+        futures = {self.executor.submit(fingerprint_file, file_info["path"]): file_info
+                   for file_info in self.job.files}
+        for future, file_info in futures.items():
+            if self._stopped.is_set():
+                return
+            try:
+                detector.add_file(file_info["index"], future.result())
+            except Exception:
+                # 无法读取的文件不参与统计，处理时再报告错误
+                continue
+
+        drop_pages = detector.detect(learn=options.get("ad_learn", False))
+        for file_info in self.job.files:
+            file_info["drop_pages"] = drop_pages.get(file_info["index"], [])
+        library.save()
+
+    def _plan_shards(self, file_info: Dict, free_slots: int, pending_count: int) -> List[tuple]:
+        """
+        决定是否拆分文件，返回分片页面范围列表 [(start, end), ...]，不拆分时返回空列表
+
+        页数达到 shard_pages 时按 shard_size 拆分；否则若空闲进程多于剩余文件（批量末尾），
+        且文件至少有两个分片大小，则拆分给空闲进程分担。
+        """
+        page_count = file_info.get("page_count", 0)
+        shard_size = max(1, self.job.options.get("shard_size", 500))
+
+        if page_count >= self.job.options.get("shard_pages", 0):
+            size = shard_size
+        elif free_slots - 1 > pending_count and page_count >= 2 * shard_size:
+            idle_workers = free_slots - pending_count
+            size = max(shard_size, math.ceil(page_count / idle_workers))
+        else:
+            return []
+
+        shards = [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+        return shards if len(shards) > 1 else []
+
+    @staticmethod
+    def _get_page_count(file_info: Dict) -> int:
+        """获取文件页数（优先使用文件信息中已有的页数）"""
+        if file_info.get("page_count"):
+            return file_info["page_count"]
+        from utils.file_utils import get_pdf_page_count
+        return get_pdf_page_count(file_info["path"])
+
+    @staticmethod
+    def _failed_result(file_info: Dict, error: Exception) -> Dict:
+        """生成执行器异常时的失败结果"""
+        return {
+            "file_index": file_info["index"],
+            "file_path": file_info["path"],
+            "success": False,
+            "output_path": None,
+            "error": str(error),
+            "logs": [(f"❌ 处理失败: {error}", "error")]
+        }
+
+
+def create_engine(job: BatchJob, workers: int = 1) -> BatchEngine:
+    """
+    按进程数创建引擎及其执行器
+
+    未启用分片时进程数不超过文件数；启用分片（shard_pages > 0）时即使只有一个文件
+    也按 workers 创建进程池，以便把大文件拆分为页面分片并行处理。
+
+    Args:
+        job: 批量处理任务
+        workers: 进程数，小于等于0时使用CPU核心数
+    """
+    if not workers or workers < 1:
+        workers = os.cpu_count() or 1
+    if job.options.get("shard_pages", 0) <= 0:
+        workers = min(workers, len(job.files))
+    workers = max(1, workers)
+    return BatchEngine(job, executor=create_executor(workers), max_in_flight=workers)
@@ -0,0 +1,504 @@
+"""批量处理工作逻辑（可在子进程中运行）"""
+from pathlib import Path
+from typing import List, Dict, Set
+
+
+def filter_regions_for_file(regions: List[Dict], file_index: int) -> List[Dict]:
+    """根据区域的应用范围筛选出应用到指定文件的区域"""
+    file_regions = []
+
+    for region in regions:
+        scope = region.get("scope", "current")
+        region_file_index = region.get("file_index", 0)  # 区域所属的文件索引
+
+        if scope == "all_files":
+            # 所有文件所有页：应用到所有文件
+            file_regions.append(region)
+        elif scope in ("all_pages", "current"):
+            # 当前文件所有页 / 当前页：只在区域所属的文件时应用
+            # remove_regions 会根据 region_page 只应用到对应页面
+            if region_file_index == file_index:
+                file_regions.append(region)
+
+    return file_regions
+
+
+def shift_regions_to_shard(regions: List[Dict], start: int, end: int) -> List[Dict]:
+    """将区域的页面索引换算到分片 [start, end) 内，丢弃不在分片内的单页区域"""
+    shard_regions = []
+
+    for region in regions:
+        if region.get("scope", "current") in ("all_pages", "all_files"):
+            shard_regions.append(region)
+            continue
+
+        region_page = region.get("page")
+        if region_page is not None and start <= region_page < end:
+            shard_region = dict(region)
+            shard_region["page"] = region_page - start
+            shard_regions.append(shard_region)
+
+    return shard_regions
+
+
+def remove_watermarks(handler, file_regions: List[Dict], text_to_remove: List[str],
+                      excluded_pages: Set[int], options: Dict = None) -> Dict:
+    """
+    对已打开的文档执行对象层面的水印清除（图层、表单、图片、注释、半透明叠加层），
+    再执行区域删除和文字删除
+
+    Returns:
+        dict: 统计信息，包含 layer_names、form_count、image_count、annot_counts、overlay_operations、
+            vector_path_count、raster_pages、raster_pixels、bands（页眉页脚说明）、region_count、text_match_counts（未删除文字时为 None）、
+            style_match_counts（未按样式删除时为 None）、cropped_pages（裁剪模式裁剪的页数）、covered_pages（遮盖模式遮盖的页数）、skipped_pages（删除区域没有碰到内容、无需改写的页数）
+            和 index_time（对象索引建立耗时，秒）
+    """
+    from core.watermark_remover import WatermarkRemover
+
+    options = options or {}
+    region_mode = options.get("region_mode", "actual")
+    remover = WatermarkRemover(handler)
+    stats = {"layer_names": [], "form_count": 0, "image_count": 0, "annot_counts": {},
+             "overlay_operations": 0, "vector_path_count": 0, "raster_pages": 0,
+             "raster_pixels": 0, "bands": [], "region_count": 0, "text_match_counts": None, "style_match_counts": None,
+             "cropped_pages": 0, "covered_pages": 0, "skipped_pages": 0, "index_time": 0.0}
+
+    # 对象层面的处理耗时与页数无关，先执行，后续删除不必再处理这些内容
+    if options.get("ocg_layers"):
+        layers = remover.remove_layer_watermarks()
+        stats["layer_names"] = [layer["name"] for layer in layers]
+
+    if options.get("form_xobject"):
+        forms = remover.remove_form_watermarks(options.get("form_min_page_ratio", 0.5))
+        stats["form_count"] = len(forms)
+
+    image_samples = options.get("image_samples")
+    if image_samples or options.get("image_auto"):
+        from core.image_index import ImageHashIndex
+
+        index = ImageHashIndex(handler.doc, handler.get_xref_index())
+        xrefs = index.match(image_samples, options.get("image_hash_distance", 6))
+        if options.get("image_auto"):
+            xrefs |= index.repeated(options.get("image_min_page_ratio", 0.5), options.get("image_max_area_ratio", 0.5))
+        stats["image_count"] = remover.remove_images(xrefs)
+
+    if options.get("annotations"):
+        stats["annot_counts"] = remover.remove_annotations(
+            options.get("annot_subtypes"),
+            options.get("annot_contents"),
+            options.get("link_url_patterns"),
+            options.get("annot_repeated_ratio", 0.5)
+        )
+
+    if options.get("transparency"):
+        overlays = remover.remove_transparent_overlays(options.get("transparency_min_page_ratio", 0.5))
+        stats["overlay_operations"] = overlays["operations"]
+
+    if options.get("vector_paths"):
+        stats["vector_path_count"] = remover.remove_vector_paths(
+            options.get("vector_min_page_ratio", 0.5), excluded_pages
+        )
+
+    # 文字删除应用到所有页，不受排除页限制
+    operator_counts = None
+    if text_to_remove and options.get("text_mode") == "operator":
+        # 先直接删除内容流中的文字操作，剩余的匹配再按删除注释处理
+        operator_counts = remover.remove_text_operators(text_to_remove)
+
+    region_excluded_pages = excluded_pages
+    if options.get("raster_clean"):
+        # 扫描页按像素清除水印（区域内或整页），图片被改写的页面不再整块删除区域；
+        # 其他页面（包括图片格式不支持或没有识别到水印像素的扫描页）仍按常规方式处理
+        raster = remover.clean_scanned_pages(
+            file_regions, excluded_pages, options.get("raster_criteria"),
+            options.get("raster_workers", 0), options.get("raster_quality", 90)
+        )
+        stats["raster_pages"] = len(raster["pages"])
+        stats["raster_pixels"] = raster["pixels"]
+        region_excluded_pages = set(excluded_pages) | {page_num + 1 for page_num in raster["pages"]}
+
+    bands = []
+    if options.get("header_footer"):
+        from core.watermark_detector import WatermarkDetector
+
+        bands = WatermarkDetector(handler).detect_bands(
+            options.get("band_sample_pages", 30),
+            options.get("band_min_page_ratio", 0.6),
+            options.get("band_edge_ratio", 0.15)
+        )
+        stats["bands"] = [WatermarkDetector.describe_band(band) for band in bands]
+
+    text_styles = options.get("text_styles") or []
+    if file_regions or text_to_remove or text_styles or bands:
+        # 区域、页眉页脚、文字和文字样式合并为一次删除，每页只改写一次内容流
+        plan = remover.plan_regions(file_regions or [], region_excluded_pages, mode=region_mode)
+        if bands:
+            remover.plan_bands(bands, excluded_pages, mode=region_mode, plan=plan)
+        if region_mode == "crop":
+            # 页边的区域和页眉页脚直接裁剪页面，文字和样式在裁剪后的页面上查找
+            stats["cropped_pages"] = remover.crop_plan(
+                plan, options.get("crop_min_keep_ratio", 0.5), options.get("crop_trim", False)
+            )
+        elif region_mode == "overlay":
+            # 区域和页眉页脚只用共享遮盖层遮住，文字和样式仍按删除处理
+            stats["covered_pages"] = remover.overlay_plan(plan, options.get("overlay_fill"))
+        if text_to_remove:
+            stats["text_match_counts"] = remover.plan_text(text_to_remove, None, plan)
+        if text_styles:
+            stats["style_match_counts"] = remover.plan_styles(text_styles, excluded_pages, plan)
+        stats["skipped_pages"] = remover.apply_plan(plan)
+
+    if operator_counts is not None:
+        for text, count in operator_counts.items():
+            stats["text_match_counts"][text] = stats["text_match_counts"].get(text, 0) + count
+
+    if file_regions:
+        stats["region_count"] = len(file_regions)
+
+    stats["index_time"] = handler.get_xref_index_time()
+    return stats
+
+
+def log_removal_stats(logs: List, stats: Dict, excluded_pages: Set[int]):
+    """将删除统计写入日志列表"""
+    from utils.page_parser import format_page_range
+
+    if stats.get("layer_names"):
+        logs.append((f"✅ 移除水印图层: {'、'.join(stats['layer_names'])}", "success"))
+
+    if stats.get("form_count"):
+        logs.append((f"✅ 清除水印表单: {stats['form_count']}个", "success"))
+
+    if stats.get("image_count"):
+        logs.append((f"✅ 删除水印图片: {stats['image_count']}个", "success"))
+
+    if stats.get("annot_counts"):
+        counts = "、".join(f"{subtype} {count}个" for subtype, count in stats["annot_counts"].items())
+        logs.append((f"✅ 删除水印注释: {counts}", "success"))
+
+    if stats.get("overlay_operations"):
+        logs.append((f"✅ 删除半透明叠加层: {stats['overlay_operations']}处绘制", "success"))
+
+    if stats.get("vector_path_count"):
+        logs.append((f"✅ 删除矢量路径水印: {stats['vector_path_count']}条路径", "success"))
+
+    if stats.get("raster_pages"):
+        logs.append((f"✅ 清除扫描页水印像素: {stats['raster_pages']}页，{stats['raster_pixels']}个像素", "success"))
+
+    if stats.get("bands"):
+        logs.append((f"✅ 删除页眉页脚: {'、'.join(stats['bands'])}", "success"))
+
+    if stats["region_count"]:
+        logs.append((f"✅ 应用区域删除: {stats['region_count']}个区域", "success"))
+
+    if stats.get("cropped_pages"):
+        logs.append((f"   • 裁剪页边: {stats['cropped_pages']}页", "info"))
+
+    if stats.get("covered_pages"):
+        logs.append((f"   • 遮盖区域: {stats['covered_pages']}页", "info"))
+
+    text_match_counts = stats["text_match_counts"]
+    if text_match_counts is not None:
+        # 显示每个文字的匹配数量
+        if text_match_counts:
+            logs.append(("✅ 应用文字删除:", "success"))
+            for text, count in text_match_counts.items():
+                if count > 0:
+                    logs.append((f"   • \"{text}\": 匹配到 {count} 处", "info"))
+                else:
+                    logs.append((f"   • \"{text}\": 未匹配到", "warning"))
+        else:
+            logs.append(("✅ 应用文字删除: 无匹配文字", "warning"))
+
+    style_match_counts = stats.get("style_match_counts")
+    if style_match_counts is not None:
+        logs.append(("✅ 应用样式删除:", "success"))
+        for name, count in style_match_counts.items():
+            if count > 0:
+                logs.append((f"   • {name}: 匹配到 {count} 处", "info"))
+            else:
+                logs.append((f"   • {name}: 未匹配到", "warning"))
+
+    if stats.get("skipped_pages"):
+        logs.append((f"   • 跳过无需删除的页面: {stats['skipped_pages']}页（删除区域内没有内容）", "info"))
+
+    # 排除页面信息
+    if excluded_pages:
+        logs.append((f"✅ 排除页面: {format_page_range(excluded_pages)}", "success"))
+
+    if stats.get("index_time"):
+        logs.append((f"   • 对象索引建立耗时: {stats['index_time'] * 1000:.0f} ms", "info"))
+
+
+def drop_ad_pages(doc, pages: List[int], logs: List):
+    """保存前用一次 select 删除识别出的广告页（页面索引 0-based），不会删除全部页面"""
+    from utils.page_parser import format_page_range
+
+    page_count = len(doc)
+    pages = {page_num for page_num in pages or [] if 0 <= page_num < page_count}
+    if not pages:
+        return
+    if len(pages) >= page_count:
+        logs.append(("⚠️ 识别出的广告页包含全部页面，未删除", "warning"))
+        return
+
+    doc.select([page_num for page_num in range(page_count) if page_num not in pages])
+    logs.append((f"✅ 删除广告页: 第 {format_page_range({page_num + 1 for page_num in pages})} 页", "success"))
+
+
+def process_file(file_index: int, file_path: str, regions: List[Dict] = None,
+                 text_to_remove: List[str] = None, excluded_pages_str: str = "",
+                 options: Dict = None) -> Dict:
+    """
+    处理单个文件：打开、删除水印并保存
+
+    该函数不依赖任何GUI对象，结果以字典形式返回，可直接在进程池中执行。
+
+    Args:
+        file_index: 文件在批量列表中的索引
+        file_path: PDF文件路径
+        regions: 全部区域列表（函数内部按 scope/file_index 过滤）
+        text_to_remove: 要删除的文字列表
+        excluded_pages_str: 排除页面范围字符串
+        options: 处理选项（见 core.batch_engine.DEFAULT_OPTIONS）
+
+    Returns:
+        dict: 处理结果，包含 file_index、file_path、success、output_path、error 和 logs
+            logs 为 (消息, 标签) 列表，按处理顺序排列
+    """
+    from core.pdf_handler import PDFHandler
+    from utils.page_parser import parse_page_range
+    from utils.file_utils import get_output_path
+
+    options = options or {}
+
+    logs = []
+    result = {
+        "file_index": file_index,
+        "file_path": file_path,
+        "success": False,
+        "output_path": None,
+        "error": None,
+        "logs": logs
+    }
+
+    try:
+        logs.append(("✅ 开始处理...", "success"))
+
+        excluded_pages = parse_page_range(excluded_pages_str)
+
+        with PDFHandler(file_path) as handler:
+            # 根据区域的应用范围智能过滤
+            file_regions = filter_regions_for_file(regions or [], file_index)
+            stats = remove_watermarks(handler, file_regions, text_to_remove, excluded_pages, options)
+            log_removal_stats(logs, stats, excluded_pages)
+            drop_ad_pages(handler.doc, options.get("drop_pages"), logs)
+
+            # 保存文件
+            output_path = get_output_path(file_path, options.get("output_suffix", "【去水印】"))
+            handler.save(output_path, optimize=options.get("optimize", True))
+            logs.append((f"✅ 保存文件: {Path(output_path).name}", "success"))
+            logs.append(("✅ 处理完成！", "success"))
+
+        result["success"] = True
+        result["output_path"] = output_path
+
+    except Exception as e:
+        result["error"] = str(e)
+        logs.append((f"❌ 处理失败: {e}", "error"))
+
+    return result
+
+
+def process_shard(file_index: int, file_path: str, start: int, end: int, shard_path: str,
+                  regions: List[Dict] = None, text_to_remove: List[str] = None,
+                  excluded_pages_str: str = "", options: Dict = None) -> Dict:
+    """
+    处理大文件的一个页面分片 [start, end)，结果保存为临时分片文件
+
+    Args:
+        file_index: 文件在批量列表中的索引
+        file_path: PDF文件路径
+        start: 分片起始页（0-based，包含）
+        end: 分片结束页（0-based，不包含）
+        shard_path: 分片输出路径
+        其余参数同 process_file
+
+    Returns:
+        dict: 分片结果，包含 start、end、shard_path、success、error 和 stats
+    """
+    from core.pdf_handler import PDFHandler
+    from utils.page_parser import parse_page_range
+
+    options = options or {}
+    result = {
+        "start": start,
+        "end": end,
+        "shard_path": shard_path,
+        "success": False,
+        "error": None,
+        "stats": None
+    }
+
+    try:
+        # 排除页面换算到分片内（1-based）
+        excluded_pages = {
+            page_num - start for page_num in parse_page_range(excluded_pages_str)
+            if start < page_num <= end
+        }
+
+        with PDFHandler(file_path) as handler:
+            handler.doc.select(range(start, end))
+
+            file_regions = shift_regions_to_shard(
+                filter_regions_for_file(regions or [], file_index), start, end
+            )
+            result["stats"] = remove_watermarks(handler, file_regions, text_to_remove, excluded_pages, options)
+            # 分片只是中间结果，合并时再统一压缩
+            handler.save(shard_path, optimize=False)
+
+        result["success"] = True
+
+    except Exception as e:
+        result["error"] = str(e)
+
+    return result
+
+
+def assemble_shards(file_index: int, file_path: str, shard_results: List[Dict],
+                    regions: List[Dict] = None, excluded_pages_str: str = "",
+                    options: Dict = None) -> Dict:
+    """
+    将处理好的分片按页序合并为最终文件，并恢复原文档的目录、链接、页码标签和元数据
+
+    Returns:
+        dict: 与 process_file 相同格式的处理结果
+    """
+    import re
+    import fitz
+    from utils.page_parser import parse_page_range
+    from utils.file_utils import get_output_path
+
+    options = options or {}
+    shard_results = sorted(shard_results, key=lambda shard: shard["start"])
+
+    logs = []
+    result = {
+        "file_index": file_index,
+        "file_path": file_path,
+        "success": False,
+        "output_path": None,
+        "error": None,
+        "logs": logs
+    }
+
+    try:
+        logs.append((f"✅ 开始处理...（分为 {len(shard_results)} 个分片并行处理）", "success"))
+
+        failed = [shard for shard in shard_results if not shard["success"]]
+        if failed:
+            raise Exception(f"第 {failed[0]['start'] + 1}-{failed[0]['end']} 页处理失败: {failed[0]['error']}")
+
+        # 汇总分片统计
+        annot_counts = {}
+        for shard in shard_results:
+            for subtype, count in shard["stats"].get("annot_counts", {}).items():
+                annot_counts[subtype] = annot_counts.get(subtype, 0) + count
+
+        text_match_counts = None
+        for shard in shard_results:
+            shard_counts = shard["stats"]["text_match_counts"]
+            if shard_counts is None:
+                continue
+            if text_match_counts is None:
+                text_match_counts = dict.fromkeys(shard_counts, 0)
+            for text, count in shard_counts.items():
+                text_match_counts[text] += count
+
+        style_match_counts = None
+        for shard in shard_results:
+            shard_counts = shard["stats"].get("style_match_counts")
+            if shard_counts is None:
+                continue
+            if style_match_counts is None:
+                style_match_counts = dict.fromkeys(shard_counts, 0)
+            for name, count in shard_counts.items():
+                style_match_counts[name] += count
+
+        stats = {
+            # 各分片清除的是同一批共用表单（各自的副本），取最大值
+            "layer_names": shard_results[0]["stats"].get("layer_names", []) if shard_results else [],
+            "form_count": max(shard["stats"].get("form_count", 0) for shard in shard_results),
+            "image_count": max(shard["stats"].get("image_count", 0) for shard in shard_results),
+            "annot_counts": annot_counts,
+            "overlay_operations": sum(shard["stats"].get("overlay_operations", 0) for shard in shard_results),
+            "vector_path_count": sum(shard["stats"].get("vector_path_count", 0) for shard in shard_results),
+            "raster_pages": sum(shard["stats"].get("raster_pages", 0) for shard in shard_results),
+            "raster_pixels": sum(shard["stats"].get("raster_pixels", 0) for shard in shard_results),
+            # 各分片分别抽样识别页眉页脚，合并去重
+            "bands": list(dict.fromkeys(band for shard in shard_results for band in shard["stats"].get("bands", []))),
+            "cropped_pages": sum(shard["stats"].get("cropped_pages", 0) for shard in shard_results),
+            "covered_pages": sum(shard["stats"].get("covered_pages", 0) for shard in shard_results),
+            "skipped_pages": sum(shard["stats"].get("skipped_pages", 0) for shard in shard_results),
+            "index_time": sum(shard["stats"].get("index_time", 0.0) for shard in shard_results),
+            "region_count": len(filter_regions_for_file(regions or [], file_index)),
+            "text_match_counts": text_match_counts,
+            "style_match_counts": style_match_counts
+        }
+        log_removal_stats(logs, stats, parse_page_range(excluded_pages_str))
+
+        src = fitz.open(file_path)
+        doc = fitz.open()
+        try:
+            for shard in shard_results:
+                with fitz.open(shard["shard_path"]) as shard_doc:
+                    doc.insert_pdf(shard_doc, links=False)
+
+            # 恢复跨分片的目录、链接和元数据。链接只会因类型或地址被 remove_annotations 删除
+            # （不参与内容和重复比例判断），按同样的条件跳过，已删除的链接不恢复
+            links_removed = False
+            url_patterns = []
+            if options.get("annotations"):
+                links_removed = "Link" in (options.get("annot_subtypes") or [])
+                url_patterns = [re.compile(pattern) for pattern in options.get("link_url_patterns") or []]
+            doc.set_toc(src.get_toc(simple=False))
+            for page_num in range(len(src) if not links_removed else 0):
+                page = doc[page_num]
+                for link in src[page_num].get_links():
+                    if any(pattern.search(link.get("uri") or "") for pattern in url_patterns):
+                        continue
+                    try:
+                        page.insert_link(link)
+                    except Exception:
+                        pass
+            try:
+                page_labels = src.get_page_labels()
+                if page_labels:
+                    doc.set_page_labels(page_labels)
+            except Exception:
+                pass
+            doc.set_metadata(src.metadata)
+            xml_metadata = src.get_xml_metadata()
+            if xml_metadata:
+                doc.set_xml_metadata(xml_metadata)
+            drop_ad_pages(doc, options.get("drop_pages"), logs)
+
+            # 保存文件
+            output_path = get_output_path(file_path, options.get("output_suffix", "【去水印】"))
+            optimize = options.get("optimize", True)
+            doc.save(output_path, garbage=4 if optimize else 0, deflate=optimize)
+        finally:
+            doc.close()
+            src.close()
+
+        logs.append((f"✅ 合并 {len(shard_results)} 个分片，保存文件: {Path(output_path).name}", "success"))
+        logs.append(("✅ 处理完成！", "success"))
+
+        result["success"] = True
+        result["output_path"] = output_path
+
+    except Exception as e:
+        result["error"] = str(e)
+        logs.append((f"❌ 处理失败: {e}", "error"))
+
+    return result
@@ -0,0 +1,143 @@
+"""页面内容空间索引：按网格索引页面上文字、图片和矢量图形的外接矩形，快速判断删除区域碰到哪些内容"""
+import fitz
+import numpy as np
+from typing import List, Dict
+
+
+# 网格单元边长（点）
+CELL = 32.0
+
+# 内容类型编码
+KIND_TEXT = 1
+KIND_GRAPHICS = 2
+KIND_IMAGE = 3
+
+
+def content_kind(kind: str) -> int:
+    """get_bboxlog 的绘制类型转为内容类型编码，不关心的类型返回 0"""
+    if "image" in kind or "imgmask" in kind:
+        return KIND_IMAGE
+    if "text" in kind:
+        return KIND_TEXT
+    if "path" in kind or "shade" in kind:
+        return KIND_GRAPHICS
+    return 0
+
+
+class PageContentIndex:
+    """
+    单页内容外接矩形的网格索引
+
+    第一次查询时才调用 page.get_bboxlog 建立索引。所有外接矩形存为 (N, 4) 数组；
+    页面按 CELL 划分网格，用二维差分一次性统计每个单元被多少内容覆盖，再累加为
+    积分表，任意矩形覆盖的单元中有没有内容只需 O(1) 查表。落在空白单元中的区域
+    直接判定为未碰到内容，其余区域再用数组比较精确判断与哪些外接矩形相交。
+    """
+
+    def __init__(self, page: fitz.Page):
+        """初始化索引（延迟到第一次查询时建立）"""
+        self.page = page
+        self._boxes = None
+        self._kinds = None
+        self._table = None
+        self._origin = (0.0, 0.0)
+        self._shape = (0, 0)
+
+    def _build(self):
+        """提取内容外接矩形，建立网格积分表"""
+        boxes = []
+        kinds = []
+        for kind, bbox in self.page.get_bboxlog():
+            code = content_kind(kind)
+            if code and bbox[0] < bbox[2] and bbox[1] < bbox[3]:
+                boxes.append(bbox)
+                kinds.append(code)
+        self._boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+        self._kinds = np.array(kinds, dtype=np.int8)
+
+        page_rect = self.page.rect
+        self._origin = (page_rect.x0, page_rect.y0)
+        cols = max(1, int(np.ceil(page_rect.width / CELL)))
+        rows = max(1, int(np.ceil(page_rect.height / CELL)))
+        self._shape = (rows, cols)
+
+        # 二维差分：每个外接矩形在覆盖的单元范围左上角 +1，范围外侧 -1，两次累加得到单元覆盖计数
+        diff = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+        if len(self._boxes):
+            c0, r0, c1, r1 = self._cells(self._boxes)
+            np.add.at(diff, (r0, c0), 1)
+            np.add.at(diff, (r0, c1 + 1), -1)
+            np.add.at(diff, (r1 + 1, c0), -1)
+            np.add.at(diff, (r1 + 1, c1 + 1), 1)
+        occupied = diff.cumsum(axis=0).cumsum(axis=1)[:rows, :cols] > 0
+
+        # 积分表：table[r, c] 为 [0, r) x [0, c) 内有内容的单元数
+        self._table = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+        self._table[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+
+    def _cells(self, boxes: np.ndarray):
+        """矩形数组转为覆盖的网格单元范围 (列起, 行起, 列止, 行止)，超出页面的部分归入边缘单元"""
+        rows, cols = self._shape
+        x0, y0 = self._origin
+        with np.errstate(invalid="ignore"):
+            c = np.clip((boxes[:, [0, 2]] - x0) // CELL, 0, cols - 1).astype(np.intp)
+            r = np.clip((boxes[:, [1, 3]] - y0) // CELL, 0, rows - 1).astype(np.intp)
+        return c[:, 0], r[:, 0], c[:, 1], r[:, 1]
+
+    def __len__(self):
+        """返回索引中的内容数"""
+        if self._boxes is None:
+            self._build()
+        return len(self._boxes)
+
+    def _candidates(self, rect: fitz.Rect) -> np.ndarray:
+        """返回与矩形相交的内容序号"""
+        if self._boxes is None:
+            self._build()
+        if rect.is_empty or not len(self._boxes):
+            return np.empty(0, dtype=np.intp)
+
+        c0, r0, c1, r1 = (int(value[0]) for value in self._cells(np.array([tuple(rect)], dtype=np.float64)))
+        table = self._table
+        if table[r1 + 1, c1 + 1] - table[r0, c1 + 1] - table[r1 + 1, c0] + table[r0, c0] == 0:
+            return np.empty(0, dtype=np.intp)
+
+        boxes = self._boxes
+        hit = ((boxes[:, 0] < rect.x1) & (rect.x0 < boxes[:, 2])
+               & (boxes[:, 1] < rect.y1) & (rect.y0 < boxes[:, 3]))
+        return np.flatnonzero(hit)
+
+    def intersects(self, rect) -> bool:
+        """矩形是否碰到任何内容"""
+        return len(self._candidates(fitz.Rect(rect))) > 0
+
+    def touched(self, rects: List[fitz.Rect]) -> Dict:
+        """
+        统计删除区域碰到的内容
+
+        Returns:
+            dict: text / graphics 表示是否碰到文字、矢量图形；images 为碰到的图片
+                [(外接矩形, 是否被某个区域完全覆盖), ...]；hits 为碰到内容的区域序号列表
+        """
+        touched = {"text": False, "graphics": False, "images": [], "hits": []}
+        image_hits = {}
+
+        for i, rect in enumerate(rects):
+            rect = fitz.Rect(rect)
+            candidates = self._candidates(rect)
+            if not len(candidates):
+                continue
+            touched["hits"].append(i)
+
+            kinds = self._kinds[candidates]
+            if (kinds == KIND_TEXT).any():
+                touched["text"] = True
+            if (kinds == KIND_GRAPHICS).any():
+                touched["graphics"] = True
+            for index in candidates[kinds == KIND_IMAGE].tolist():
+                x0, y0, x1, y1 = self._boxes[index]
+                covered = rect.x0 <= x0 and rect.y0 <= y0 and x1 <= rect.x1 and y1 <= rect.y1
+                image_hits[index] = image_hits.get(index, False) or covered
+
+        touched["images"] = [(fitz.Rect(self._boxes[index].tolist()), covered) for index, covered in sorted(image_hits.items())]
+        return touched
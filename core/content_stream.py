@@ -0,0 +1,711 @@
+"""内容流解析：最小化的 PDF 内容流分词器和按条件删除操作的编辑器"""
+import math
+import re
+from typing import Callable, Iterator, List, Optional, Tuple, Set
+
+
+# 路径绘制操作（删除时替换为 n，结束路径但不绘制）
+PATH_PAINT_OPERATORS = {b"S", b"s", b"f", b"F", b"f*", b"B", b"B*", b"b", b"b*"}
+# 文字显示操作
+TEXT_SHOW_OPERATORS = {b"Tj", b"TJ", b"'", b'"'}
+
+# 常规字符（非空白、非分隔符）
+_REGULAR = rb"[^\s\x00/<>\[\]()%{}]"
+_TOKEN_END = rb"(?!" + _REGULAR + rb")"
+
+# 记号：空白、注释、名称、字典/数组括号、十六进制字符串、不含嵌套括号的字面字符串、普通记号
+_TOKEN = re.compile(rb"""
+    (?P<space>[ \t\r\n\f\x00]+)
+  | (?P<comment>%[^\r\n]*)
+  | (?P<name>/[^ \t\r\n\f\x00/<>\[\]()%{}]*)
+  | (?P<open><<|\[|\{)
+  | (?P<close>>>|\]|\})
+  | (?P<hex><[0-9A-Fa-f \t\r\n\f]*>)
+  | (?P<string>\((?:[^()\\]|\\.)*\))
+  | (?P<regular>[^ \t\r\n\f\x00/<>\[\]()%{}]+)
+  | (?P<nested>\()
+""", re.X | re.S)
+
+# 一个完整操作（操作数 + 操作符）：常见写法用一次正则匹配，
+# 嵌套括号的字面字符串、多层嵌套的数组和字典等由 _slow_operation 逐个记号处理
+_WS = rb"(?:[\s\x00]|%[^\r\n]*(?![^\r\n]))*"
+_STRING = rb"\((?:[^()\\]|\\.)*\)"
+_HEX = rb"<(?!<)[0-9A-Fa-f\s]*>"
+_ARRAY = rb"\[(?:[^\[\]()]|" + _STRING + rb")*\]"
+_DICT_ITEM = rb"[^<>()\[\]]|" + _STRING + rb"|" + _ARRAY + rb"|<(?!<)[^<>]*>"
+_DICT = rb"<<(?:" + _DICT_ITEM + rb"|<<(?:" + _DICT_ITEM + rb")*>>)*>>"
+_OPERAND = rb"(?:" + rb"|".join([
+    rb"/" + _REGULAR + rb"*" + _TOKEN_END,
+    rb"[+\-.0-9]" + _REGULAR + rb"*" + _TOKEN_END,
+    _STRING, _HEX, _ARRAY, _DICT,
+    rb"(?:true|false|null)" + _TOKEN_END,
+]) + rb")"
+_OPERATOR = rb"(?!(?:true|false|null)" + _TOKEN_END + rb")[A-Za-z'\"]" + _REGULAR + rb"*" + _TOKEN_END
+_OPERATION = re.compile(
+    _WS + rb"(?P<operands>(?:" + _OPERAND + _WS + rb")*)(?P<operator>" + _OPERATOR + rb")", re.S
+)
+_OPERAND_RE = re.compile(_OPERAND, re.S)
+
+_INLINE_IMAGE_END = re.compile(rb"\sEI(?=\s|$)")
+_REFERENCE_TAIL = re.compile(rb"\s+\d+\s+R\b")
+_OPERAND_KEYWORDS = {b"true", b"false", b"null"}
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+
+
+class Operation:
+    """
+    内容流中的一个操作：操作符和操作数，以及在原始数据中的位置 [start, end)
+
+    操作数只记录所在区间，第一次访问 operands 时才切分，
+    大多数只需判断操作符的操作不产生额外的字节串。
+    """
+
+    __slots__ = ("operator", "start", "end", "_data", "_operands_end", "_operands", "_matched")
+
+    def __init__(self, data: bytes, operator: bytes, start: int, operands_end: int, end: int, matched: bool = False):
+        self.operator = operator
+        self.start = start
+        self.end = end
+        self._data = data
+        self._operands_end = operands_end
+        self._operands = None
+        self._matched = matched  # 操作数已由 _OPERATION 整体匹配（可直接按 _OPERAND_RE 切分）
+
+    @property
+    def operands(self) -> List[bytes]:
+        """操作数列表（数组和字典作为一个操作数）"""
+        if self._operands is None:
+            data = self._data
+            start, end = self.start, self._operands_end
+            if start == end:
+                self._operands = []
+            elif self._matched and data.find(b"%", start, end) < 0:
+                self._operands = _OPERAND_RE.findall(data, start, end)
+            else:
+                self._operands = [data[i:j] for _, i, j in _tokens(data, start, end)]
+        return self._operands
+
+    def __repr__(self):
+        return f"Operation({self.operator!r}, {self.operands!r})"
+
+
+def _skip_string(data: bytes, pos: int) -> int:
+    """跳过含嵌套括号的字面字符串 (...)，pos 指向左括号，返回右括号之后的位置"""
+    depth = 0
+    length = len(data)
+    while pos < length:
+        c = data[pos]
+        if c == 0x5C:  # 反斜杠转义
+            pos += 2
+            continue
+        if c == 0x28:
+            depth += 1
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return length
+
+
+def _tokens(data: bytes, pos: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """
+    逐个返回 [pos, end) 内的顶层记号 (类型, 起始位置, 结束位置)
+
+    数组和字典作为一个类型为 container 的记号返回；没有对应左括号的右括号
+    作为 close 记号返回。
+    """
+    match = _TOKEN.match
+    depth = 0
+    container_start = pos
+    while pos < end:
+        m = match(data, pos, end)
+        if m is None:
+            pos += 1
+            continue
+        kind = m.lastgroup
+        start = pos
+        pos = m.end()
+        if kind == "space" or kind == "comment":
+            continue
+        if kind == "nested":
+            pos = min(_skip_string(data, start), end)
+            kind = "string"
+
+        if kind == "open":
+            if depth == 0:
+                container_start = start
+            depth += 1
+        elif kind == "close":
+            if depth == 0:
+                yield kind, start, pos
+            else:
+                depth -= 1
+                if depth == 0:
+                    yield "container", container_start, pos
+        elif depth == 0:
+            yield kind, start, pos
+
+
+def _is_operator(token: bytes) -> bool:
+    """普通记号是否为操作符（数字和 true/false/null 是操作数）"""
+    return token not in _OPERAND_KEYWORDS and token[0] not in b"+-.0123456789"
+
+
+def _slow_operation(data: bytes, pos: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    逐个记号查找从 pos 开始的下一个操作
+
+    Returns:
+        tuple: (操作起始位置, 操作符起始位置, 操作符结束位置, 继续解析的位置)，没有操作时返回 None
+    """
+    first = None
+    for kind, start, stop in _tokens(data, pos, len(data)):
+        if first is None:
+            first = start
+        if kind == "regular" and _is_operator(data[start:stop]):
+            return first, start, stop, stop
+    return None
+
+
+def iter_operations(data: bytes) -> Iterator[Operation]:
+    """
+    逐个解析内容流中的操作（生成器，不复制整段数据）
+
+    支持字符串、十六进制字符串、名称、数组、字典、注释和内联图片（BI ... ID ... EI），
+    内联图片作为一个操作符为 BI 的操作返回，数组和字典作为一个操作数返回。
+    """
+    match = _OPERATION.match
+    length = len(data)
+    pos = 0
+
+    while pos < length:
+        m = match(data, pos)
+        matched = m is not None
+        if matched:
+            start, operator_start, end = m.start("operands"), m.start("operator"), m.end()
+        else:
+            found = _slow_operation(data, pos)
+            if found is None:
+                break  # 只剩空白、注释或缺少操作符的操作数
+            start, operator_start, end, _ = found
+        operator = data[operator_start:end]
+
+        if operator == b"BI":
+            # 内联图片：跳过图片数据直到 EI
+            id_pos = data.find(b"ID", end)
+            image_end = _INLINE_IMAGE_END.search(data, id_pos + 3) if id_pos >= 0 else None
+            end = image_end.end() if image_end else length
+
+        yield Operation(data, operator, start, operator_start, end, matched)
+        pos = end
+
+
+def dict_keys(data: bytes) -> List[str]:
+    """返回字典字符串（如 xref_get_key 得到的 "<</GS1 5 0 R/GS2<<...>>>>"）的顶层键名"""
+    data = data.strip()
+    if not data.startswith(b"<<"):
+        return []
+    keys = []
+    expect_key = True
+    skip_until = 0
+    for kind, start, stop in _tokens(data, 2, len(data)):
+        if kind == "close":
+            break
+        if start < skip_until:
+            continue
+        if expect_key:
+            keys.append(data[start + 1:stop].decode("latin-1"))
+            expect_key = False
+            continue
+        expect_key = True
+        reference = _REFERENCE_TAIL.match(data, stop) if kind == "regular" else None
+        if reference:
+            # 间接引用 "n 0 R" 占三个记号
+            skip_until = reference.end()
+    return keys
+
+
+def decode_string(operand: bytes) -> bytes:
+    """解码字面字符串 (...) 或十六进制字符串 <...> 为原始字节"""
+    if operand.startswith(b"<"):
+        digits = re.sub(rb"[^0-9A-Fa-f]", b"", operand)
+        if len(digits) % 2:
+            digits += b"0"
+        return bytes.fromhex(digits.decode("ascii"))
+    if not operand.startswith(b"("):
+        return b""
+
+    body = operand[1:-1]
+    if b"\\" not in body:
+        return body
+    out = bytearray()
+    i = 0
+    length = len(body)
+    while i < length:
+        c = body[i]
+        if c != 0x5C or i + 1 >= length:
+            out.append(c)
+            i += 1
+            continue
+        nxt = body[i + 1]
+        if nxt in _ESCAPES:
+            out += _ESCAPES[nxt]
+            i += 2
+        elif 0x30 <= nxt <= 0x37:
+            j = i + 1
+            while j < min(i + 4, length) and 0x30 <= body[j] <= 0x37:
+                j += 1
+            out.append(int(body[i + 1:j], 8) & 0xFF)
+            i = j
+        elif nxt in (0x0D, 0x0A):
+            # 续行
+            i += 3 if body[i + 1:i + 3] == b"\r\n" else 2
+        else:
+            out.append(nxt)
+            i += 2
+    return bytes(out)
+
+
+def _shown_bytes(op: Operation) -> bytes:
+    """文字显示操作显示的原始字节"""
+    if not op.operands:
+        return b""
+    operand = op.operands[-1]
+    if op.operator == b"TJ" and operand.startswith(b"["):
+        return b"".join(
+            decode_string(operand[start:stop])
+            for kind, start, stop in _tokens(operand, 1, len(operand) - 1)
+            if kind in ("string", "hex")
+        )
+    return decode_string(operand)
+
+
+def _tj_adjustment(op: Operation) -> float:
+    """TJ 数组中数字（字距调整，千分之一文字空间单位）之和"""
+    if op.operator != b"TJ" or not op.operands or not op.operands[-1].startswith(b"["):
+        return 0.0
+    operand = op.operands[-1]
+    total = 0.0
+    for kind, start, stop in _tokens(operand, 1, len(operand) - 1):
+        if kind == "regular":
+            try:
+                total += float(operand[start:stop])
+            except ValueError:
+                pass
+    return total
+
+
+def _fill_color(operator: bytes, operands: List[bytes]) -> Optional[tuple]:
+    """根据填充颜色操作换算为 RGB（无法换算时返回 None）"""
+    try:
+        values = [float(value) for value in operands if value[:1] not in (b"/",)]
+    except ValueError:
+        return None
+    if operator in (b"g",) or (operator in (b"sc", b"scn") and len(values) == 1):
+        return (values[0],) * 3 if values else None
+    if operator == b"rg" or (operator in (b"sc", b"scn") and len(values) == 3):
+        return tuple(values[:3]) if len(values) >= 3 else None
+    if operator == b"k" or (operator in (b"sc", b"scn") and len(values) == 4):
+        if len(values) < 4:
+            return None
+        c, m, y, k = values[:4]
+        return (1 - c) * (1 - k), (1 - m) * (1 - k), (1 - y) * (1 - k)
+    return None
+
+
+def _number(value: float) -> bytes:
+    """数值写为内容流中的操作数（最多三位小数，去掉多余的 0）"""
+    text = b"%.3f" % value
+    text = text.rstrip(b"0").rstrip(b".")
+    return b"0" if text in (b"", b"-0") else text
+
+
+def _linear(operands: List[bytes]) -> Optional[tuple]:
+    """cm/Tm 操作数的线性部分 (a, b, c, d)，格式不正确时返回 None"""
+    if len(operands) != 6:
+        return None
+    try:
+        return tuple(float(value) for value in operands[:4])
+    except ValueError:
+        return None
+
+
+def _affine(operands: List[bytes]) -> Optional[tuple]:
+    """cm 操作数 (a, b, c, d, e, f)，格式不正确时返回 None"""
+    if len(operands) != 6:
+        return None
+    try:
+        return tuple(float(value) for value in operands)
+    except ValueError:
+        return None
+
+
+def _concat(m: tuple, n: tuple) -> tuple:
+    """矩阵乘积 m × n（先按 m 再按 n 变换）"""
+    return (
+        m[0] * n[0] + m[1] * n[2], m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2], m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4], m[4] * n[1] + m[5] * n[3] + n[5]
+    )
+
+
+# 路径构造操作及其操作数中的坐标个数
+_PATH_POINTS = {b"m": 1, b"l": 1, b"c": 3, b"v": 2, b"y": 2}
+
+
+class TextShow:
+    """一次文字显示操作及其所在的文字状态"""
+
+    __slots__ = ("op", "font", "size", "color", "spacing", "next_moves", "_direction", "_raw")
+
+    def __init__(self, op: Operation, font: str, size: float, direction: tuple, color: Optional[tuple],
+                 raw: bytes = None, spacing: tuple = (0.0, 0.0)):
+        self.op = op
+        self.font = font  # 字体资源名（不含 /）
+        self.size = size  # Tf 设置的字号
+        self.color = color  # 填充颜色 RGB（无法换算时为 None）
+        self.spacing = spacing  # (字符间距 Tc, 单词间距 Tw)
+        self.next_moves = False  # 之后是否先重新定位（Td、TD、Tm、T*、'、" 或块结束）再显示文字
+        self._direction = direction  # 文字矩阵乘 CTM 后的 (a, b)，即文字基线方向
+        self._raw = raw
+
+    @property
+    def angle(self) -> int:
+        """文字相对页面的旋转角度（逆时针，0-359）"""
+        a, b = self._direction
+        return round(math.degrees(math.atan2(b, a))) % 360
+
+    @property
+    def effective_size(self) -> float:
+        """页面上的实际字号（Tf 字号乘以文字矩阵和 CTM 沿基线方向的缩放）"""
+        return self.size * math.hypot(*self._direction)
+
+    @property
+    def raw(self) -> bytes:
+        """显示的原始字节（第一次访问时才解码字符串）"""
+        if self._raw is None:
+            self._raw = _shown_bytes(self.op)
+        return self._raw
+
+    @property
+    def text(self) -> str:
+        """显示的文字（按单字节编码解码，复合字体的文字无法直接还原）"""
+        return self.raw.decode("latin-1")
+
+
+class ContentStreamEditor:
+    """
+    内容流编辑器
+
+    逐个解析操作并记录要替换或删除的区间，最后一次拼接生成新内容流，
+    未修改的部分直接按原始字节切片复制，不重新生成。
+    """
+
+    def __init__(self, data: bytes, glyph_widths: Callable[[str, bytes], Optional[float]] = None):
+        """
+        Args:
+            data: 内容流原始数据（已解压）
+            glyph_widths: 可选，(字体资源名, 显示的原始字节) -> 字形宽度之和（千分之一文字空间单位），
+                无法确定时返回 None；删除文字后需保留其水平位移时使用
+        """
+        self.data = data
+        self.glyph_widths = glyph_widths
+        self._edits = {}  # 操作起始位置 -> (结束位置, 替换内容)
+
+    def _replace(self, op: Operation, replacement: bytes) -> bool:
+        """记录把操作替换为 replacement（同一操作只记录一次）"""
+        if op.start in self._edits:
+            return False
+        self._edits[op.start] = (op.end, replacement)
+        return True
+
+    def getvalue(self) -> bytes:
+        """返回修改后的内容流"""
+        if not self._edits:
+            return self.data
+        pieces = []
+        last = 0
+        for start in sorted(self._edits):
+            end, replacement = self._edits[start]
+            if start < last:
+                continue
+            pieces.append(self.data[last:start])
+            pieces.append(replacement)
+            last = end
+        pieces.append(self.data[last:])
+        return b"".join(pieces)
+
+    def text_shows(self) -> Iterator[Tuple[TextShow, bool]]:
+        """
+        逐个返回文字显示操作及其文字状态
+
+        Yields:
+            tuple: (TextShow, 是否为所在 BT/ET 块的最后一个文字显示操作)
+                块的最后一个操作要到 ET 时才能确定，因此每个块的操作在 ET 时一并返回
+        """
+        # 只跟踪矩阵的线性部分 (a, b, c, d)，平移不影响文字方向
+        ctm = (1.0, 0.0, 0.0, 1.0)
+        tm = ctm
+        font, size, color = "", 0.0, (0.0, 0.0, 0.0)
+        spacing = (0.0, 0.0)
+        stack = []
+        block = []
+
+        for op in iter_operations(self.data):
+            operator = op.operator
+            if operator in TEXT_SHOW_OPERATORS:
+                if operator != b"Tj" and operator != b"TJ":
+                    # ' 和 " 先换行再显示
+                    if block:
+                        block[-1].next_moves = True
+                    if operator == b'"' and len(op.operands) == 3:
+                        try:
+                            spacing = (float(op.operands[1]), float(op.operands[0]))
+                        except ValueError:
+                            pass
+                direction = (tm[0] * ctm[0] + tm[1] * ctm[2], tm[0] * ctm[1] + tm[1] * ctm[3])
+                block.append(TextShow(op, font, size, direction, color, spacing=spacing))
+            elif operator == b"BT":
+                tm = (1.0, 0.0, 0.0, 1.0)
+                block = []
+            elif operator == b"ET":
+                if block:
+                    block[-1].next_moves = True
+                for i, show in enumerate(block):
+                    yield show, i == len(block) - 1
+                block = []
+            elif operator in (b"Td", b"TD", b"T*"):
+                if block:
+                    block[-1].next_moves = True
+            elif operator == b"Tm":
+                if block:
+                    block[-1].next_moves = True
+                tm = _linear(op.operands) or tm
+            elif operator in (b"Tc", b"Tw") and len(op.operands) == 1:
+                try:
+                    value = float(op.operands[0])
+                except ValueError:
+                    continue
+                spacing = (value, spacing[1]) if operator == b"Tc" else (spacing[0], value)
+            elif operator == b"Tf" and len(op.operands) == 2:
+                font = op.operands[0][1:].decode("latin-1")
+                try:
+                    size = float(op.operands[1])
+                except ValueError:
+                    pass
+            elif operator == b"cm":
+                m = _linear(op.operands)
+                if m:
+                    ctm = (
+                        m[0] * ctm[0] + m[1] * ctm[2], m[0] * ctm[1] + m[1] * ctm[3],
+                        m[2] * ctm[0] + m[3] * ctm[2], m[2] * ctm[1] + m[3] * ctm[3]
+                    )
+            elif operator == b"q":
+                stack.append((ctm, font, size, color, spacing))
+            elif operator == b"Q":
+                if stack:
+                    ctm, font, size, color, spacing = stack.pop()
+            elif operator in (b"g", b"rg", b"k", b"sc", b"scn"):
+                color = _fill_color(operator, op.operands)
+
+        # 缺少 ET 的块
+        if block:
+            block[-1].next_moves = True
+        for i, show in enumerate(block):
+            yield show, i == len(block) - 1
+
+    def remove_text(self, predicate: Callable[[TextShow], bool], match_blocks: bool = True) -> int:
+        """
+        删除满足条件的文字显示操作
+
+        删除的操作之后紧接着显示其他文字时（中间没有重新定位），用只含字距调整的
+        [-宽度] TJ 代替，保留原来的水平位移，后面的文字不会移位；宽度无法确定
+        （未提供 glyph_widths 或复合字体）时不删除该操作。整块删除时位移没有影响。
+
+        Args:
+            predicate: 判断函数，参数为 TextShow
+            match_blocks: 同一 BT/ET 块中的文字合起来满足条件时（用块内第一个操作的文字状态、
+                拼接后的文字判断），删除块内所有文字显示操作
+
+        Returns:
+            int: 删除的文字显示操作数
+        """
+        removed = 0
+        block = []
+        for show, is_last in self.text_shows():
+            block.append(show)
+            if not is_last:
+                continue
+
+            replacements = {}
+            for show in block:
+                replacement = self._text_replacement(show.op) if show.next_moves else self._advance_replacement(show)
+                if replacement is not None and predicate(show):
+                    replacements[show] = replacement
+            if not replacements and match_blocks and len(block) > 1:
+                first = block[0]
+                merged = TextShow(first.op, first.font, first.size, first._direction, first.color,
+                                  b"".join(show.raw for show in block))
+                if predicate(merged):
+                    replacements = {show: self._text_replacement(show.op) for show in block}
+            for show, replacement in replacements.items():
+                if self._replace(show.op, replacement):
+                    removed += 1
+            block = []
+        return removed
+
+    def _advance_replacement(self, show: TextShow) -> Optional[bytes]:
+        """删除文字显示操作但保留其水平位移的替换内容，宽度无法确定时返回 None"""
+        if self.glyph_widths is None or not show.size:
+            return None
+        raw = show.raw
+        width = self.glyph_widths(show.font, raw)
+        if width is None:
+            return None
+        char_spacing, word_spacing = show.spacing
+        # 文字位移 = ((字宽 - 字距调整) / 1000 * 字号 + 字符数 * Tc + 空格数 * Tw) * 水平缩放，换算为 TJ 中的调整值
+        advance = width - _tj_adjustment(show.op) + (len(raw) * char_spacing + raw.count(32) * word_spacing) * 1000 / show.size
+        prefix = self._text_replacement(show.op)
+        if abs(advance) < 1e-3:
+            return prefix
+        return (prefix + b" " if prefix else b"") + b"[%s] TJ" % _number(-advance)
+
+    @staticmethod
+    def _text_replacement(op: Operation) -> bytes:
+        """删除文字显示操作时保留其换行效果（' 和 " 会先移到下一行）"""
+        if op.operator == b"'":
+            return b"T*"
+        if op.operator == b'"' and len(op.operands) == 3:
+            return op.operands[0] + b" Tw " + op.operands[1] + b" Tc T*"
+        return b""
+
+    def remove_drawing(self, gs_names: Set[str], image_names: Set[str],
+                       alpha_names: Set[str] = None) -> int:
+        """
+        删除使用指定图形状态绘制的内容和指定图片的绘制操作
+
+        模拟 q/Q 图形状态栈：执行名称在 gs_names 中的 gs 后直到状态被恢复（Q）或被其他
+        设置透明度的 gs 覆盖之前，路径绘制操作替换为 n，文字显示、Do、sh 和内联图片被删除；
+        名称在 image_names 中的 Do 在任何状态下都被删除。其他操作（包括 q/Q、BT/ET）
+        保持不变，结构始终平衡。
+
+        Args:
+            gs_names: 要删除其绘制内容的图形状态资源名
+            image_names: 要删除的图片资源名
+            alpha_names: 设置了 /CA 或 /ca 的图形状态资源名，只有这些 gs 会覆盖 gs_names 的
+                透明度（只改线宽、混合模式等的 gs 不影响）；None 表示任何 gs 都视为覆盖
+
+        Returns:
+            int: 删除的绘制操作数
+        """
+        gs_names = {b"/" + name.encode("latin-1") for name in gs_names}
+        image_names = {b"/" + name.encode("latin-1") for name in image_names}
+        if alpha_names is not None:
+            alpha_names = {b"/" + name.encode("latin-1") for name in alpha_names}
+
+        removed = 0
+        active = False
+        stack = []
+
+        for op in iter_operations(self.data):
+            operator = op.operator
+            replacement = None
+
+            if operator == b"q":
+                stack.append(active)
+            elif operator == b"Q":
+                active = stack.pop() if stack else False
+            elif operator == b"gs":
+                name = op.operands[-1] if op.operands else b""
+                if name in gs_names:
+                    active = True
+                elif alpha_names is None or name in alpha_names:
+                    active = False
+            elif operator == b"Do" and op.operands and op.operands[-1] in image_names:
+                replacement = b""
+            elif active:
+                if operator in PATH_PAINT_OPERATORS:
+                    replacement = b"n"
+                elif operator in (b"Tj", b"TJ", b"Do", b"sh", b"BI"):
+                    replacement = b""
+                elif operator in TEXT_SHOW_OPERATORS:
+                    replacement = self._text_replacement(op)
+
+            if replacement is not None and self._replace(op, replacement):
+                removed += 1
+
+        return removed
+
+
+    def remove_paths(self, predicate: Callable[[tuple], bool],
+                     matrix: tuple = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)) -> int:
+        """
+        删除外接矩形满足条件的曲线路径
+
+        跟踪 q/Q 和 cm 得到当前变换矩阵，路径构造操作（m、l、c、v、y、re）的坐标和控制点
+        换算到 matrix 所在的坐标系（如页面的 transformation_matrix），含曲线的路径在绘制时
+        按外接矩形 (x0, y0, x1, y1) 调用 predicate，满足条件的绘制操作替换为 n。
+        路径构造操作保持不变，不影响裁剪路径（W n）和其他图形。
+
+        Returns:
+            int: 删除的路径数
+        """
+        removed = 0
+        ctm = tuple(float(value) for value in matrix)
+        stack = []
+        points = []
+        curved = False
+
+        for op in iter_operations(self.data):
+            operator = op.operator
+            count = _PATH_POINTS.get(operator)
+            if count or operator == b"re":
+                try:
+                    values = [float(value) for value in op.operands]
+                except ValueError:
+                    continue
+                if operator == b"re" and len(values) == 4:
+                    x, y, w, h = values
+                    values = [x, y, x + w, y, x + w, y + h, x, y + h]
+                elif len(values) != 2 * (count or 0):
+                    continue
+                for i in range(0, len(values), 2):
+                    x, y = values[i], values[i + 1]
+                    points.append((
+                        x * ctm[0] + y * ctm[2] + ctm[4], x * ctm[1] + y * ctm[3] + ctm[5]
+                    ))
+                if operator in (b"c", b"v", b"y"):
+                    curved = True
+            elif operator in PATH_PAINT_OPERATORS or operator == b"n":
+                if operator != b"n" and curved and points:
+                    xs = [point[0] for point in points]
+                    ys = [point[1] for point in points]
+                    if predicate((min(xs), min(ys), max(xs), max(ys))) and self._replace(op, b"n"):
+                        removed += 1
+                points = []
+                curved = False
+            elif operator == b"cm":
+                m = _affine(op.operands)
+                if m:
+                    ctm = _concat(m, ctm)
+            elif operator == b"q":
+                stack.append(ctm)
+            elif operator == b"Q":
+                if stack:
+                    ctm = stack.pop()
+
+        return removed
+
+
+def remove_drawing(data: bytes, gs_names: Set[str], image_names: Set[str],
+                   alpha_names: Set[str] = None) -> Tuple[bytes, int]:
+    """
+    删除使用指定图形状态绘制的内容和指定图片的绘制操作（见 ContentStreamEditor.remove_drawing）
+
+    Returns:
+        tuple: (新的内容流, 删除的绘制操作数)
+    """
+    editor = ContentStreamEditor(data)
+    removed = editor.remove_drawing(gs_names, image_names, alpha_names)
+    return editor.getvalue(), removed
@@ -0,0 +1,173 @@
+"""图片哈希索引：按 xref 为文档中的图片计算精确摘要和感知哈希"""
+import hashlib
+import fitz
+from typing import List, Dict, Set
+from core.xref_index import XrefIndex, TYPE_IMAGE
+
+
+# 感知哈希（dHash）缩略图尺寸：9x8 灰度图相邻像素比较得到 64 位
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+
+
+def dhash(pix: fitz.Pixmap) -> int:
+    """
+    计算像素图的差值哈希（dHash）
+
+    缩放为 9x8 灰度图后逐行比较相邻像素的明暗，得到 64 位整数，
+    对缩放、重新压缩和轻微颜色变化不敏感。
+    """
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.colorspace is None or pix.colorspace.n != 1:
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+
+    pixels = fitz.Pixmap(pix, HASH_WIDTH, HASH_HEIGHT).samples
+
+    value = 0
+    for row in range(HASH_HEIGHT):
+        for col in range(HASH_WIDTH - 1):
+            left = pixels[row * HASH_WIDTH + col]
+            right = pixels[row * HASH_WIDTH + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """两个哈希值的汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+def image_signature(pix: fitz.Pixmap) -> tuple:
+    """图片特征：(感知哈希, 宽高比)，宽高比用于排除哈希相近但形状不同的图片"""
+    return dhash(pix), pix.width / max(pix.height, 1)
+
+
+def image_file_signature(file_path: str) -> tuple:
+    """计算图片文件的特征（用于用户选择的样例图片）"""
+    return image_signature(fitz.Pixmap(file_path))
+
+
+def signatures_match(a: tuple, b: tuple, max_distance: int = 6, aspect_tolerance: float = 0.1) -> bool:
+    """两个图片特征是否相近（哈希距离不超过 max_distance，宽高比相差不超过 aspect_tolerance）"""
+    return hamming(a[0], b[0]) <= max_distance and abs(a[1] - b[1]) <= aspect_tolerance * max(a[1], b[1])
+
+
+class ImageHashIndex:
+    """
+    文档图片哈希索引
+
+    按对象索引中的图片对象（不遍历页面、不渲染）计算原始数据流的 MD5 摘要；
+    感知哈希需要解码图片，只在按样例匹配时按需计算并缓存。
+    """
+
+    def __init__(self, doc: fitz.Document, xref_index: XrefIndex = None):
+        """
+        建立索引
+
+        Args:
+            doc: PDF文档
+            xref_index: 可选，文档对象索引（通常由 PDFHandler.get_xref_index 提供）
+        """
+        self.doc = doc
+        self.xref_index = xref_index or XrefIndex(doc)
+        self.digests: Dict[int, str] = {}  # xref -> 原始数据流 MD5
+        self.by_digest: Dict[str, List[int]] = {}  # MD5 -> xref 列表（内容相同的重复图片对象）
+        self._signatures: Dict[int, tuple] = {}
+
+        masks = set()
+        for xref in self.xref_index.xrefs_of_type(TYPE_IMAGE):
+            smask = doc.xref_get_key(xref, "SMask")
+            if smask[0] == "xref":
+                masks.add(int(smask[1].split()[0]))
+            try:
+                self.digests[xref] = hashlib.md5(doc.xref_stream_raw(xref) or b"").hexdigest()
+            except Exception:
+                continue
+
+        # 透明蒙版随所属图片一起处理，不单独索引
+        for xref in masks:
+            self.digests.pop(xref, None)
+        for xref, digest in self.digests.items():
+            self.by_digest.setdefault(digest, []).append(xref)
+
+    def __len__(self):
+        """返回索引中的图片数"""
+        return len(self.digests)
+
+    def signature(self, xref: int):
+        """返回图片的特征 (感知哈希, 宽高比)（无法解码时返回 None）"""
+        if xref not in self._signatures:
+            try:
+                self._signatures[xref] = image_signature(fitz.Pixmap(self.doc, xref))
+            except Exception:
+                self._signatures[xref] = None
+        return self._signatures[xref]
+
+    def match(self, samples: List[tuple], max_distance: int = 6) -> Set[int]:
+        """
+        查找与样例图片相近的图片
+
+        内容相同（MD5 相同）的图片对象只解码一次。
+
+        Args:
+            samples: 样例图片特征列表（见 image_signature）
+            max_distance: 感知哈希的最大汉明距离
+
+        Returns:
+            set: 匹配的图片 xref
+        """
+        matched = set()
+        if not samples:
+            return matched
+        for xrefs in self.by_digest.values():
+            signature = self.signature(xrefs[0])
+            if signature is not None and any(signatures_match(signature, sample, max_distance) for sample in samples):
+                matched.update(xrefs)
+        return matched
+
+    def repeated(self, min_page_ratio: float = 0.5, max_area_ratio: float = 0.5) -> Set[int]:
+        """
+        查找在不少于 min_page_ratio 比例的页面上重复出现的图片
+
+        同一图片被多页引用，或内容相同的多个图片对象分别出现在多页，都计为重复。
+        只查询对象索引中各页的图片引用；对重复的图片在第一次出现的页面上取显示位置，
+        覆盖页面面积超过 max_area_ratio 且不透明的图片（整页扫描图、页面背景）不计入。
+
+        Returns:
+            set: 重复图片的 xref
+        """
+        page_count = len(self.doc)
+        if page_count < 2:
+            return set()
+
+        pages_by_digest = {}
+        first_use = {}  # MD5 -> (首次出现的页面, xref, 透明蒙版 xref)
+        for page_num in range(page_count):
+            for xref, smask, name, parent in self.xref_index.page_resources(page_num)["images"]:
+                digest = self.digests.get(xref)
+                if digest is not None:
+                    pages_by_digest.setdefault(digest, set()).add(page_num)
+                    first_use.setdefault(digest, (page_num, xref, smask))
+
+        threshold = max(2, min_page_ratio * page_count)
+        repeated = set()
+        for digest, pages in pages_by_digest.items():
+            if len(pages) >= threshold and not self._covers_page(*first_use[digest], max_area_ratio):
+                repeated.update(self.by_digest[digest])
+        return repeated
+
+    def _covers_page(self, page_num: int, xref: int, smask: int, max_area_ratio: float) -> bool:
+        """图片是否不透明且在页面上的显示面积超过页面面积的 max_area_ratio"""
+        if smask or self.doc.xref_get_key(xref, "Mask")[0] != "null":
+            return False
+        page = self.doc[page_num]
+        page_rect = page.rect
+        page_area = page_rect.width * page_rect.height
+        if page_area <= 0:
+            return False
+        for rect in page.get_image_rects(xref):
+            visible = rect & page_rect
+            if not visible.is_empty and visible.width * visible.height > max_area_ratio * page_area:
+                return True
+        return False
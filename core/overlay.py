@@ -0,0 +1,142 @@
+"""遮盖层：把覆盖矩形画在一个共享的表单对象（Form XObject）中，由各页面引用，不改写原有内容"""
+import fitz
+import numpy as np
+from typing import List, Dict
+
+
+def _ref(xref: int) -> str:
+    """间接引用字符串"""
+    return f"{xref} 0 R"
+
+
+def _ref_xref(value: str) -> int:
+    """间接引用字符串中的 xref"""
+    return int(value.split()[0])
+
+
+def sample_background(page: fitz.Page, rect: fitz.Rect, margin: float = 3) -> tuple:
+    """
+    取矩形四周的背景色
+
+    渲染矩形向外扩展 margin 的范围（低分辨率），取最外一圈像素中出现最多的颜色。
+
+    Returns:
+        tuple: 0-1 的 RGB
+    """
+    clip = (fitz.Rect(rect) + (-margin, -margin, margin, margin)) * page.rotation_matrix
+    clip &= page.rect
+    if clip.is_empty:
+        return 1, 1, 1
+
+    pix = page.get_pixmap(clip=clip, dpi=36, colorspace=fitz.csRGB, alpha=False)
+    pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width * 3]
+    pixels = pixels.reshape(pix.height, pix.width, 3)
+    ring = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    colors, counts = np.unique(ring, axis=0, return_counts=True)
+    return tuple(int(value) / 255 for value in colors[counts.argmax()])
+
+
+class CoverOverlay:
+    """
+    共享遮盖层
+
+    相同页面几何（PDF 坐标变换）和相同覆盖矩形的页面共用一个表单对象和一段调用它的内容流，
+    每页只在 /Contents 数组首尾各加一个共享的内容流引用（首部 q，尾部 Q 后调用表单），
+    并在资源中登记表单名称。不调用 apply_redactions、不重新编码图片，
+    新增对象数量与页数无关。
+    """
+
+    def __init__(self, doc: fitz.Document):
+        """初始化遮盖层"""
+        self.doc = doc
+        # (PDF 坐标变换, 覆盖矩形及颜色) -> (表单名称, 调用内容流 xref)
+        self._forms: Dict[tuple, tuple] = {}
+        self._prefix = None
+        # 已登记过表单的共享资源对象：(资源 xref, 表单名称)
+        self._registered = set()
+
+    @property
+    def form_count(self) -> int:
+        """返回创建的表单数"""
+        return len(self._forms)
+
+    def _new_stream(self, data: bytes, dictionary: str = "<<>>") -> int:
+        """创建新的流对象"""
+        xref = self.doc.get_new_xref()
+        self.doc.update_object(xref, dictionary)
+        self.doc.update_stream(xref, data, compress=len(data) > 64)
+        return xref
+
+    def _form(self, page: fitz.Page, rects: List[fitz.Rect], colors: List[tuple]) -> tuple:
+        """返回页面对应的 (表单名称, 调用内容流 xref)，尚未创建时创建"""
+        to_pdf = ~page.transformation_matrix
+        key = (tuple(to_pdf), tuple((tuple(rect), color) for rect, color in zip(rects, colors)))
+        if key in self._forms:
+            return self._forms[key]
+
+        commands = []
+        bbox = fitz.Rect()
+        for rect, color in zip(rects, colors):
+            pdf_rect = (fitz.Rect(rect) * to_pdf).normalize()
+            bbox |= pdf_rect
+            commands.append(
+                "%g %g %g rg %g %g %g %g re f" % (tuple(color) + (pdf_rect.x0, pdf_rect.y0, pdf_rect.width, pdf_rect.height))
+            )
+        form = self._new_stream(
+            "\n".join(commands).encode(),
+            "<< /Type /XObject /Subtype /Form /BBox [%g %g %g %g] /Resources << >> >>" % tuple(bbox)
+        )
+        name = f"WRCover{form}"
+        self._forms[key] = name, form, self._new_stream(f"\nQ\nq /{name} Do Q\n".encode())
+        return self._forms[key]
+
+    def _add_xobject(self, page_xref: int, name: str, form: int):
+        """在页面资源的 /XObject 中登记表单（逐级解析间接引用，继承的资源复制到页面上）"""
+        doc = self.doc
+        kind, value = doc.xref_get_key(page_xref, "Resources")
+        if kind == "xref" and (_ref_xref(value), name) in self._registered:
+            return
+        if kind == "null":
+            inherited = "<< >>"
+            parent = doc.xref_get_key(page_xref, "Parent")
+            while parent[0] == "xref":
+                resources = doc.xref_get_key(_ref_xref(parent[1]), "Resources")
+                if resources[0] != "null":
+                    inherited = resources[1]
+                    break
+                parent = doc.xref_get_key(_ref_xref(parent[1]), "Parent")
+            doc.xref_set_key(page_xref, "Resources", inherited)
+            kind, value = doc.xref_get_key(page_xref, "Resources")
+        if kind == "xref":
+            self._registered.add((_ref_xref(value), name))
+
+        xref, path = page_xref, ""
+        for key in ("Resources", "XObject"):
+            kind, value = doc.xref_get_key(xref, path + key)
+            if kind == "null":
+                # 没有 /XObject 时直接写入只含表单的字典
+                doc.xref_set_key(xref, path + key, f"<< /{name} {_ref(form)} >>")
+                return
+            if kind == "xref":
+                xref, path = _ref_xref(value), ""
+            else:
+                path += key + "/"
+        doc.xref_set_key(xref, path + name, _ref(form))
+
+    def stamp(self, page: fitz.Page, rects: List[fitz.Rect], colors: List[tuple]):
+        """
+        在页面上遮盖矩形
+
+        Args:
+            page: 页面
+            rects: 覆盖矩形（与删除区域相同的页面坐标）
+            colors: 各矩形的填充颜色（0-1 的 RGB）
+        """
+        name, form, invoke = self._form(page, rects, colors)
+        if self._prefix is None:
+            self._prefix = self._new_stream(b"q\n")
+
+        page_xref = page.xref
+        self._add_xobject(page_xref, name, form)
+        contents = [self._prefix] + page.get_contents() + [invoke]
+        self.doc.xref_set_key(page_xref, "Contents", "[%s]" % " ".join(_ref(xref) for xref in contents))
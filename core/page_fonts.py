@@ -0,0 +1,94 @@
+"""页面字体资源：把内容流中的字体资源名对应到字体名和字宽（直接改写内容流时使用）"""
+import re
+import fitz
+from typing import Dict, List, Optional
+
+
+# 标准 14 种字体（未嵌入、可以没有 /Widths，字宽取内置字体）
+_BASE14 = {
+    "Courier", "Courier-Bold", "Courier-Oblique", "Courier-BoldOblique",
+    "Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique",
+    "Times-Roman", "Times-Bold", "Times-Italic", "Times-BoldItalic",
+    "Symbol", "ZapfDingbats",
+}
+# 单字节编码、字宽以千分之一文字空间单位给出的字体类型（Type3 的字宽在字形空间，复合字体为多字节编码）
+_SIMPLE_TYPES = {"Type1", "MMType1", "TrueType"}
+
+_NUMBER = re.compile(r"[+\-]?(?:\d+\.?\d*|\.\d+)")
+
+
+class PageFonts:
+    """
+    页面（或页面中某个表单）的字体资源
+
+    资源名来自 get_page_fonts(full=True)，只取直接由页面（或指定表单）资源引用的字体；
+    每个字体的字宽表（256 项）第一次使用时才读取。
+    """
+
+    def __init__(self, doc: fitz.Document, page_num: int, referencer: int = 0):
+        """
+        Args:
+            doc: PDF文档
+            page_num: 页面索引
+            referencer: 0 表示页面资源中的字体，否则为表单 xref（只取该表单资源中的字体）
+        """
+        self.doc = doc
+        self.owner = referencer or doc.page_xref(page_num)  # 资源字典所在对象（直接写在资源中的字体从这里读取）
+        self.fonts: Dict[str, tuple] = {}  # 资源名 -> (xref, 字体类型, 字体名)
+        for xref, ext, kind, basefont, name, encoding, owner in doc.get_page_fonts(page_num, full=True):
+            if owner == referencer:
+                self.fonts.setdefault(name, (xref, kind, basefont))
+        self._widths: Dict[str, Optional[List[float]]] = {}
+
+    def base_name(self, name: str) -> str:
+        """资源名对应的字体名（去掉子集前缀，如 ABCDEF+SimSun -> SimSun），未知资源返回空字符串"""
+        font = self.fonts.get(name)
+        return font[2].split("+")[-1] if font else ""
+
+    def glyph_widths(self, name: str, raw: bytes) -> Optional[float]:
+        """
+        按字体的字宽表计算显示字节的字形宽度之和（千分之一文字空间单位）
+
+        只支持单字节编码的简单字体；复合字体、Type3 字体和缺少字宽的字体返回 None。
+        """
+        if name not in self._widths:
+            self._widths[name] = self._load_widths(name)
+        widths = self._widths[name]
+        if widths is None:
+            return None
+        return sum(widths[code] for code in raw)
+
+    def _load_widths(self, name: str) -> Optional[List[float]]:
+        """读取字体的字宽表：优先 /FirstChar + /Widths，标准 14 种字体取内置字体的字宽"""
+        font = self.fonts.get(name)
+        if font is None or font[1] not in _SIMPLE_TYPES:
+            return None
+        xref, kind, basefont = font
+        doc = self.doc
+        # 字体直接写在资源字典中时（xref 为 0）按键路径读取
+        owner, path = (xref, "") if xref else (self.owner, f"Resources/Font/{name}/")
+
+        widths_kind, widths = doc.xref_get_key(owner, path + "Widths")
+        if widths_kind == "xref":
+            widths = doc.xref_object(int(widths.split()[0]), compressed=True)
+            widths_kind = "array"
+        if widths_kind == "array":
+            try:
+                first = int(doc.xref_get_key(owner, path + "FirstChar")[1])
+            except ValueError:
+                first = 0
+            values = [float(value) for value in _NUMBER.findall(widths)]
+            table = [0.0] * 256
+            for code, value in enumerate(values, first):
+                if 0 <= code < 256:
+                    table[code] = value
+            return table
+
+        if basefont in _BASE14:
+            try:
+                builtin = fitz.Font(basefont)
+            except Exception:
+                return None
+            # 按单字节编码近似为 Latin-1
+            return [builtin.glyph_advance(code) * 1000 for code in range(256)]
+        return None
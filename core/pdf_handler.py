@@ -12,6 +12,7 @@ class PDFHandler:
         self.file_path = file_path
         self.doc: Optional[fitz.Document] = None
         self.is_opened = False
+        self._xref_index = None
         
     def open(self):
         """打开PDF文档"""
@@ -30,6 +31,7 @@ class PDFHandler:
             self.doc.close()
             self.doc = None
             self.is_opened = False
+        self._xref_index = None
     
     def __enter__(self):
         """上下文管理器入口"""
@@ -54,6 +56,28 @@ class PDFHandler:
             raise IndexError(f"页面编号超出范围: {page_num}")
         return self.doc[page_num]
     
+    def get_xref_index(self):
+        """
+        获取文档对象索引（第一次调用时创建，各部分在查询时才建立）
+        
+        修改文档结构后应调用 invalidate_xref_index()。
+        """
+        if not self.is_opened:
+            self.open()
+        if self._xref_index is None:
+            from core.xref_index import XrefIndex
+            self._xref_index = XrefIndex(self.doc)
+        return self._xref_index
+    
+    def invalidate_xref_index(self):
+        """文档结构被修改后丢弃对象索引的缓存"""
+        if self._xref_index is not None:
+            self._xref_index.invalidate()
+    
+    def get_xref_index_time(self) -> float:
+        """返回对象索引已花费的建立时间（秒），未使用索引时为 0"""
+        return self._xref_index.build_time() if self._xref_index is not None else 0.0
+    
     def render_page(self, page_num: int, zoom: float = 1.0, dpi: int = 150) -> fitz.Pixmap:
         """渲染页面为图像"""
         page = self.get_page(page_num)
@@ -0,0 +1,315 @@
+"""扫描页水印清除：按颜色、饱和度或亮度区间识别扫描图片中的水印像素并替换"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import fitz
+import numpy as np
+from typing import List, Dict, Optional
+
+from core.text_styles import parse_color
+from core.xref_index import XrefIndex
+
+
+# 默认识别条件：浅灰色水印（亮度介于正文和纸张之间）
+DEFAULT_CRITERIA = {"mode": "lightness", "lightness": [160, 235]}
+
+# 图片占页面面积的最小比例（达到才视为扫描页）
+SCAN_COVERAGE = 0.8
+
+# 并行处理时的最少页数（页数较少时创建进程的开销大于收益）
+PARALLEL_MIN_PAGES = 8
+
+
+def classify_pixels(pixels: np.ndarray, criteria: Dict) -> np.ndarray:
+    """
+    识别水印像素
+
+    Args:
+        pixels: (高, 宽, 通道数) 的 uint8 数组，通道数为 1（灰度）或 3（RGB）
+        criteria: 识别条件
+            - mode: "lightness"（亮度区间，默认）、"color"（接近指定颜色）或 "saturation"（彩色像素）
+            - lightness: [最低, 最高] 亮度（0-255），lightness 模式使用，默认 [160, 235]
+            - color、tolerance: 目标颜色（"#rrggbb" 或 [r, g, b]）和各通道允许的误差（0-255，默认 40）
+            - min_saturation: 最低饱和度（0-1，默认 0.35），saturation 模式使用
+
+    Returns:
+        np.ndarray: (高, 宽) 的布尔数组，True 为水印像素
+    """
+    mode = criteria.get("mode", "lightness")
+    channels = pixels.shape[2]
+    if channels == 3:
+        r, g, b = (pixels[:, :, i].astype(np.uint16) for i in range(3))
+        luma = (77 * r + 150 * g + 29 * b) >> 8
+    else:
+        luma = pixels[:, :, 0].astype(np.uint16)
+
+    if mode == "color":
+        target = np.array([round(c * 255) for c in parse_color(criteria.get("color", "#808080"))], dtype=np.int16)
+        tolerance = criteria.get("tolerance", 40)
+        if channels == 3:
+            return (np.abs(pixels.astype(np.int16) - target).max(axis=2) <= tolerance)
+        target_luma = (77 * int(target[0]) + 150 * int(target[1]) + 29 * int(target[2])) >> 8
+        return np.abs(luma.astype(np.int16) - target_luma) <= tolerance
+
+    if mode == "saturation":
+        if channels != 3:
+            return np.zeros(pixels.shape[:2], dtype=bool)
+        high = pixels.max(axis=2).astype(np.uint16)
+        low = pixels.min(axis=2).astype(np.uint16)
+        # (最大 - 最小) / 最大 >= 最低饱和度，用整数运算避免浮点数组
+        threshold = round(criteria.get("min_saturation", 0.35) * 256)
+        return ((high - low) * 256 >= threshold * high) & (high > 0)
+
+    low, high = criteria.get("lightness", DEFAULT_CRITERIA["lightness"])
+    return (luma >= low) & (luma <= high)
+
+
+def clean_image_data(task: Dict) -> tuple:
+    """
+    清除一张图片中的水印像素（可在子进程中执行，参数和返回值均可被 pickle）
+
+    Args:
+        task: {"xref", "data"（JPEG 为原始数据流，其他为解压后的像素）, "jpeg", "width", "height",
+               "channels", "criteria", "boxes"（限制范围的像素矩形列表，空表示整张图片）,
+               "replace"（替换颜色 RGB 0-255）, "quality"（JPEG 质量）}
+
+    Returns:
+        tuple: (xref, 新数据流（无水印像素或无法处理时为 None）, 替换的像素数)
+    """
+    width, height = task["width"], task["height"]
+    if task["jpeg"]:
+        pix = fitz.Pixmap(task["data"])
+        if pix.alpha or pix.n not in (1, 3) or (pix.width, pix.height) != (width, height):
+            return task["xref"], None, 0
+        channels = pix.n
+        pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(height, pix.stride)
+        pixels = pixels[:, :width * channels].reshape(height, width, channels).copy()
+        del pix
+    else:
+        channels = task["channels"]
+        pixels = np.frombuffer(task["data"], dtype=np.uint8).reshape(height, width, channels).copy()
+
+    mask = classify_pixels(pixels, task["criteria"])
+    if task["boxes"]:
+        region = np.zeros_like(mask)
+        for x0, y0, x1, y1 in task["boxes"]:
+            region[y0:y1, x0:x1] = True
+        mask &= region
+
+    changed = int(np.count_nonzero(mask))
+    if not changed:
+        return task["xref"], None, 0
+
+    replace = task["replace"]
+    pixels[mask] = replace if channels == 3 else (77 * replace[0] + 150 * replace[1] + 29 * replace[2]) >> 8
+
+    if task["jpeg"]:
+        colorspace = fitz.csRGB if channels == 3 else fitz.csGRAY
+        pix = fitz.Pixmap(colorspace, width, height, pixels.tobytes(), 0)
+        return task["xref"], pix.tobytes("jpeg", jpg_quality=task["quality"]), changed
+    return task["xref"], pixels.tobytes(), changed
+
+
+class RasterCleaner:
+    """
+    扫描页水印清除器
+
+    只处理扫描页：没有文字和字体、由一张覆盖大部分页面的 8 位灰度或 RGB 图片构成的页面。
+    图片解码后用 NumPy 整体识别水印像素并替换，再按原压缩方式（JPEG 重新编码、
+    Flate 重新压缩、未压缩保持未压缩）写回同一图片对象，页面内容和图片位置不变。
+    其他页面由调用方按常规方式处理。
+    """
+
+    def __init__(self, doc: fitz.Document, xref_index: XrefIndex = None):
+        """
+        初始化清除器
+
+        Args:
+            doc: PDF文档
+            xref_index: 可选，文档对象索引（通常由 PDFHandler.get_xref_index 提供）
+        """
+        self.doc = doc
+        self.xref_index = xref_index or XrefIndex(doc)
+
+    def scan_page(self, page_num: int) -> Optional[Dict]:
+        """
+        判断页面是否为可处理的扫描页
+
+        Returns:
+            dict: {"xref", "filter", "transform"}，不是扫描页或图片格式不支持时返回 None
+        """
+        resources = self.xref_index.page_resources(page_num)
+        if resources["fonts"] or len(resources["images"]) != 1:
+            return None
+        xref, smask = resources["images"][0][:2]
+        if smask:
+            return None
+
+        page = self.doc[page_num]
+        placements = page.get_image_rects(xref, transform=True)
+        if len(placements) != 1:
+            return None
+        bbox, transform = placements[0]
+        page_area = page.rect.width * page.rect.height
+        if not page_area or abs(bbox & page.rect) < SCAN_COVERAGE * page_area:
+            return None
+
+        doc = self.doc
+        image_filter = doc.xref_get_key(xref, "Filter")[1]
+        image_filter = "" if image_filter == "null" else image_filter.strip("[] ")
+        if image_filter not in ("", "/FlateDecode", "/DCTDecode"):
+            return None  # CCITT、JBIG2 等二值图片无法按颜色区分水印
+        if doc.xref_get_key(xref, "BitsPerComponent")[1] != "8" or doc.xref_get_key(xref, "Decode")[0] != "null":
+            return None
+        if doc.xref_get_key(xref, "ColorSpace")[1].startswith("[/Indexed"):
+            return None
+        return {"xref": xref, "filter": image_filter, "transform": transform}
+
+    @staticmethod
+    def _pixel_boxes(rects: List[fitz.Rect], transform: fitz.Matrix, width: int, height: int) -> List[tuple]:
+        """把页面坐标中的矩形换算为图片像素矩形"""
+        inverse = ~transform
+        boxes = []
+        for rect in rects:
+            unit = fitz.Rect(rect) * inverse  # 图片的单位正方形坐标
+            x0, x1 = sorted((unit.x0, unit.x1))
+            y0, y1 = sorted((unit.y0, unit.y1))
+            box = (
+                max(0, int(x0 * width)), max(0, int(y0 * height)),
+                min(width, int(np.ceil(x1 * width))), min(height, int(np.ceil(y1 * height)))
+            )
+            if box[0] < box[2] and box[1] < box[3]:
+                boxes.append(box)
+        return boxes
+
+    def _make_task(self, page_info: Dict, rects: List[fitz.Rect], criteria: Dict,
+                   replace: tuple, quality: int) -> Optional[Dict]:
+        """读取图片数据生成处理任务，格式不符时返回 None"""
+        doc = self.doc
+        xref = page_info["xref"]
+        width = int(doc.xref_get_key(xref, "Width")[1])
+        height = int(doc.xref_get_key(xref, "Height")[1])
+        jpeg = page_info["filter"] == "/DCTDecode"
+        if jpeg:
+            data = doc.xref_stream_raw(xref)
+            channels = 0  # 解码后确定
+        else:
+            data = doc.xref_stream(xref)
+            channels = len(data) // (width * height) if width and height else 0
+            if channels not in (1, 3) or len(data) != width * height * channels:
+                return None
+
+        boxes = self._pixel_boxes(rects, page_info["transform"], width, height) if rects else []
+        if rects and not boxes:
+            return None
+        return {
+            "xref": xref, "data": data, "jpeg": jpeg, "width": width, "height": height,
+            "channels": channels, "criteria": criteria, "boxes": boxes,
+            "replace": replace, "quality": quality
+        }
+
+    def clean(self, page_numbers: List[int], criteria: Dict = None, page_rects: Dict[int, List] = None,
+              replace="#ffffff", workers: int = 0, quality: int = 90) -> Dict:
+        """
+        清除扫描页中的水印像素
+
+        Args:
+            page_numbers: 要处理的页面索引
+            criteria: 识别条件（见 classify_pixels），默认 DEFAULT_CRITERIA
+            page_rects: 可选，{页面索引: [页面坐标矩形, ...]}，只处理矩形内的像素；
+                提供时没有矩形的页面不处理
+            replace: 替换颜色
+            workers: 并行进程数，0 表示按CPU核心数；在批量处理的子进程中总是逐页处理
+            quality: JPEG 图片重新编码的质量
+
+        Returns:
+            dict: {"pages": 已处理（图片被改写）的扫描页, "scanned_pages": 全部可处理的扫描页,
+                   "pixels": 替换的像素数}
+        """
+        criteria = criteria or DEFAULT_CRITERIA
+        replace = tuple(round(c * 255) for c in parse_color(replace))
+        result = {"pages": [], "scanned_pages": [], "pixels": 0}
+
+        tasks = []
+        pages_by_xref = {}
+        task_keys = {}  # 图片 xref -> (矩形, 图片位置)
+        for page_num in page_numbers:
+            page_info = self.scan_page(page_num)
+            if page_info is None:
+                continue
+            result["scanned_pages"].append(page_num)
+            xref = page_info["xref"]
+            rects = None
+            if page_rects is not None:
+                rects = page_rects.get(page_num)
+                if not rects:
+                    continue
+            key = (None if rects is None else [tuple(rect) for rect in rects], tuple(page_info["transform"]))
+            if xref in pages_by_xref:
+                # 多页共用同一张图片时只处理一次；范围不同的页面不计入，由调用方按常规方式处理
+                if task_keys[xref] == key:
+                    pages_by_xref[xref].append(page_num)
+                continue
+            pages_by_xref[xref] = [page_num]
+            task_keys[xref] = key
+            tasks.append((page_info, rects))
+
+        if not workers or workers < 1:
+            workers = os.cpu_count() or 1
+        if multiprocessing.parent_process() is not None or len(tasks) < PARALLEL_MIN_PAGES:
+            workers = 1  # 已在批量处理的子进程中，或页数太少
+
+        def make_tasks():
+            for page_info, rects in tasks:
+                task = self._make_task(page_info, rects, criteria, replace, quality)
+                if task is not None:
+                    yield task
+
+        if workers == 1:
+            outcomes = (clean_image_data(task) for task in make_tasks())
+        else:
+            outcomes = self._run_parallel(make_tasks(), workers)
+
+        for xref, data, changed in outcomes:
+            if data is None:
+                continue
+            self._write_image(xref, data)
+            result["pages"].extend(pages_by_xref[xref])
+            result["pixels"] += changed
+
+        result["pages"].sort()
+        if result["pages"]:
+            self.xref_index.invalidate()
+        return result
+
+    @staticmethod
+    def _run_parallel(tasks, workers: int):
+        """
+        在进程池中处理任务，同时提交的任务数不超过进程数的两倍（限制内存中的图片数据量）
+
+        Yields:
+            tuple: clean_image_data 的返回值（按完成顺序）
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for task in tasks:
+                pending.add(executor.submit(clean_image_data, task))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    def _write_image(self, xref: int, data: bytes):
+        """按原压缩方式写回图片数据"""
+        doc = self.doc
+        image_filter = doc.xref_get_key(xref, "Filter")[1]
+        if "/DCTDecode" in image_filter:
+            doc.update_stream(xref, data, compress=False)
+            doc.xref_set_key(xref, "Filter", "/DCTDecode")
+        elif "/FlateDecode" in image_filter:
+            doc.update_stream(xref, data, compress=True)
+            doc.xref_set_key(xref, "DecodeParms", "null")
+        else:
+            doc.update_stream(xref, data, compress=False)
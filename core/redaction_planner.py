@@ -0,0 +1,169 @@
+"""删除计划：按页收集待删除矩形，统一应用"""
+import fitz
+from typing import List, Dict, Optional, Set, Tuple
+
+
+# 判断坐标相等时的容差
+EPSILON = 1e-3
+
+
+def _can_merge(a: fitz.Rect, b: fitz.Rect) -> bool:
+    """两个矩形的并集是否恰好也是矩形（同宽且上下相接/重叠，或同高且左右相接/重叠）"""
+    if abs(a.x0 - b.x0) < EPSILON and abs(a.x1 - b.x1) < EPSILON:
+        return b.y0 <= a.y1 + EPSILON and a.y0 <= b.y1 + EPSILON
+    if abs(a.y0 - b.y0) < EPSILON and abs(a.y1 - b.y1) < EPSILON:
+        return b.x0 <= a.x1 + EPSILON and a.x0 <= b.x1 + EPSILON
+    return False
+
+
+def merge_rects(rects) -> List[fitz.Rect]:
+    """
+    合并矩形：去除重复和被包含的矩形，并把并集恰好为矩形的相邻/重叠矩形合为一个
+
+    只做不扩大覆盖面积的合并，结果覆盖的区域与输入完全相同。
+    """
+    unique = {}
+    for rect in rects:
+        rect = fitz.Rect(rect).normalize()
+        if not rect.is_empty:
+            unique.setdefault(tuple(rect), rect)
+    merged = list(unique.values())
+
+    changed = True
+    while changed and len(merged) > 1:
+        changed = False
+        # 大矩形在前，便于剔除被包含的小矩形
+        merged.sort(key=lambda rect: rect.width * rect.height, reverse=True)
+        result = []
+        for rect in merged:
+            for i, kept in enumerate(result):
+                if kept.contains(rect):
+                    changed = True
+                    break
+                if _can_merge(kept, rect):
+                    result[i] = kept | rect
+                    changed = True
+                    break
+            else:
+                result.append(rect)
+        merged = result
+
+    return merged
+
+
+class RedactionPlan:
+    """
+    删除计划
+
+    区域删除和文字删除先把各自的矩形登记到计划中，最后每页只调用一次
+    apply_redactions，避免同一页面的内容流被重复改写。
+
+    应用到所有页的矩形只保存一份（连同其排除页），只有单页矩形按页存放；
+    compile() 后相同、被包含或可拼接的矩形会合并为最少数量的矩形。
+    """
+
+    def __init__(self, page_count: int = 0):
+        """
+        初始化空计划
+
+        Args:
+            page_count: 文档页数（登记所有页矩形时需要）
+        """
+        self.page_count = page_count
+        # 所有页矩形分组：(填充颜色, 排除页索引集合) -> 矩形列表
+        self._global: Dict[Tuple[Optional[tuple], frozenset], List[fitz.Rect]] = {}
+        # 单页矩形：页面索引 -> (矩形, 填充颜色) 列表
+        self._pages: Dict[int, List[Tuple[fitz.Rect, Optional[tuple]]]] = {}
+        self._compiled = False
+
+    def add(self, page_num: int, rect, fill: Optional[tuple] = None):
+        """
+        登记一个单页待删除矩形
+
+        Args:
+            page_num: 页面索引（0-based）
+            rect: 删除区域
+            fill: 填充颜色，None 表示不填充（真实删除），(1, 1, 1) 表示白色覆盖
+        """
+        self._pages.setdefault(page_num, []).append((fitz.Rect(rect), fill))
+        self._compiled = False
+
+    def add_global(self, rect, fill: Optional[tuple] = None, skip_pages: Set[int] = None):
+        """
+        登记一个应用到所有页的待删除矩形
+
+        Args:
+            rect: 删除区域
+            fill: 填充颜色
+            skip_pages: 不应用的页面索引集合（0-based）
+        """
+        key = (fill, frozenset(skip_pages or ()))
+        self._global.setdefault(key, []).append(fitz.Rect(rect))
+        self._compiled = False
+
+    def compile(self):
+        """合并重复、被包含和可拼接的矩形"""
+        if self._compiled:
+            return
+
+        for key, rects in self._global.items():
+            self._global[key] = merge_rects(rects)
+
+        for page_num, entries in self._pages.items():
+            self._pages[page_num] = self._merge_entries(entries)
+
+        self._compiled = True
+
+    @staticmethod
+    def _merge_entries(entries) -> List[Tuple[fitz.Rect, Optional[tuple]]]:
+        """按填充颜色分组合并 (矩形, 填充颜色) 列表"""
+        by_fill = {}
+        for rect, fill in entries:
+            by_fill.setdefault(fill, []).append(rect)
+        if len(entries) == len(by_fill):
+            return list(entries)
+        return [(rect, fill) for fill, rects in by_fill.items() for rect in merge_rects(rects)]
+
+    def discard(self, page_numbers):
+        """从计划中移除指定页面（如已改为裁剪页面处理），所有页矩形不再应用到这些页面"""
+        discarded = frozenset(page_numbers)
+        if not discarded:
+            return
+
+        merged = {}
+        for (fill, skip_pages), rects in self._global.items():
+            merged.setdefault((fill, skip_pages | discarded), []).extend(rects)
+        self._global = merged
+        for page_num in discarded:
+            self._pages.pop(page_num, None)
+        self._compiled = False
+
+    def page_numbers(self) -> List[int]:
+        """返回计划中涉及的页面索引（升序）"""
+        pages = set(self._pages)
+        for (fill, skip_pages), rects in self._global.items():
+            if rects:
+                pages.update(page_num for page_num in range(self.page_count) if page_num not in skip_pages)
+        return sorted(pages)
+
+    def rects(self, page_num: int) -> List[Tuple[fitz.Rect, Optional[tuple]]]:
+        """返回指定页面的 (矩形, 填充颜色) 列表"""
+        self.compile()
+
+        entries = [
+            (rect, fill)
+            for (fill, skip_pages), rects in self._global.items()
+            if page_num not in skip_pages
+            for rect in rects
+        ]
+        page_entries = self._pages.get(page_num)
+        if not page_entries:
+            return entries
+        if not entries:
+            return page_entries
+        # 该页既有所有页矩形又有单页矩形时再合并一次
+        return self._merge_entries(entries + page_entries)
+
+    def __len__(self):
+        """返回计划中涉及的页面数"""
+        return len(self.page_numbers())
@@ -0,0 +1,126 @@
+"""共享图片删除：同一图片（按 xref）在多页以相同区域删除时，只处理一次"""
+import fitz
+from typing import List, Dict
+
+
+def _pixel_rects(info: Dict, rects: List[fitz.Rect]) -> tuple:
+    """将页面上的删除区域换算为图片像素坐标（只保留与图片相交的部分）"""
+    bbox = fitz.Rect(info["bbox"])
+    to_unit = ~fitz.Matrix(info["transform"])
+    width, height = info["width"], info["height"]
+
+    pixel_rects = []
+    for rect in rects:
+        clip = rect & bbox
+        if clip.is_empty:
+            continue
+        unit = (clip * to_unit).normalize()
+        pixel_rect = fitz.IRect(
+            max(0, int(unit.x0 * width)),
+            max(0, int(unit.y0 * height)),
+            min(width, int(unit.x1 * width + 0.999)),
+            min(height, int(unit.y1 * height + 0.999))
+        )
+        if not pixel_rect.is_empty:
+            pixel_rects.append(tuple(pixel_rect))
+    return tuple(sorted(pixel_rects))
+
+
+def _can_redact_once(doc: fitz.Document, xref: int) -> bool:
+    """带透明蒙版或为模板蒙版的图片不做整体替换（替换会丢失透明信息）"""
+    if doc.xref_get_key(xref, "SMask")[0] != "null":
+        return False
+    if doc.xref_get_key(xref, "Mask")[0] != "null":
+        return False
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+        return False
+    return True
+
+
+def _white(pix: fitz.Pixmap) -> tuple:
+    """像素图颜色空间对应的白色"""
+    if pix.colorspace and pix.colorspace.n == 4:
+        color = [0, 0, 0, 0]  # CMYK 白色
+    else:
+        color = [255] * (pix.n - pix.alpha)
+    if pix.alpha:
+        color.append(255)
+    return tuple(color)
+
+
+def redact_shared_images(doc: fitz.Document, page_rects: Dict[int, List[fitz.Rect]],
+                         min_pages: int = 2, xref_index=None) -> Dict[int, List[fitz.Rect]]:
+    """
+    找出在多个页面上以相同区域被删除的共享图片，只对图片本身删除一次
+
+    图片按 xref 分组，只有当引用该图片的所有页面都落在同一组（图片上的删除区域相同）、
+    且组内页面数不少于 min_pages 时，才解码一次图片、将区域涂白并替换原图片，
+    所有页面继续共用这一张处理后的图片。
+
+    Args:
+        doc: PDF文档
+        page_rects: 页面索引 -> 该页需要删除的矩形（仅需包含碰到图片的页面）
+        min_pages: 触发共享处理的最少页面数
+        xref_index: 可选，文档对象索引（用于查询引用图片的页面，避免逐页读取）
+
+    Returns:
+        dict: 页面索引 -> 已处理图片在该页上的位置（这些图片无需再按页删除像素）
+    """
+    # (xref, 像素区域) -> [(页面索引, 图片位置), ...]
+    groups = {}
+    xref_keys = {}
+
+    for page_num, rects in page_rects.items():
+        page = doc[page_num]
+        placements = {}
+        for info in page.get_image_info(xrefs=True):
+            xref = info.get("xref", 0)
+            if xref <= 0 or not any(fitz.Rect(info["bbox"]).intersects(rect) for rect in rects):
+                continue
+            placements.setdefault(xref, []).append(info)
+
+        for xref, infos in placements.items():
+            # 同一页多次绘制同一图片时，把所有位置的像素区域合在一起作为键
+            key = (xref, tuple(sorted(_pixel_rects(info, rects) for info in infos)))
+            groups.setdefault(key, []).append((page_num, [fitz.Rect(info["bbox"]) for info in infos]))
+            xref_keys.setdefault(xref, set()).add(key)
+
+    candidates = {
+        key: members for key, members in groups.items()
+        if len(members) >= min_pages and len(xref_keys[key[0]]) == 1 and _can_redact_once(doc, key[0])
+    }
+    if not candidates:
+        return {}
+
+    # 引用该图片但不在组内的页面会被一同修改，此时不能整体替换
+    group_pages = {key[0]: {page_num for page_num, _ in members} for key, members in candidates.items()}
+    if xref_index is not None:
+        users = {xref: set(xref_index.pages_using(xref)) for xref in group_pages}
+    else:
+        users = {xref: set() for xref in group_pages}
+        for page_num in range(len(doc)):
+            for image in doc.get_page_images(page_num):
+                if image[0] in users:
+                    users[image[0]].add(page_num)
+
+    cleaned = {}
+    for (xref, pixel_groups), members in candidates.items():
+        if users[xref] != group_pages[xref]:
+            continue
+
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.colorspace is None or pix.colorspace.n not in (1, 3, 4):
+                continue
+            color = _white(pix)
+            for pixel_rects in pixel_groups:
+                for pixel_rect in pixel_rects:
+                    pix.set_rect(fitz.IRect(pixel_rect), color)
+            doc[members[0][0]].replace_image(xref, pixmap=pix)
+        except Exception:
+            continue
+
+        for page_num, bboxes in members:
+            cleaned.setdefault(page_num, []).extend(bboxes)
+
+    return cleaned
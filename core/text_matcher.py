@@ -0,0 +1,170 @@
+"""多关键字文字匹配（Aho-Corasick 自动机，每页只提取一次文字）"""
+import fitz
+from typing import List, Dict
+
+
+def normalize_text(text: str) -> str:
+    """统一大小写并将连续空白折叠为一个空格（与 page.search_for 的匹配规则一致）"""
+    return " ".join("".join(_fold(c) for c in text).split())
+
+
+def _fold(c: str) -> str:
+    """单个字符转小写（转换后长度变化的字符保持原样，保证字符与位置一一对应）"""
+    lower = c.lower()
+    return lower if len(lower) == 1 else c
+
+
+class TextMatcher:
+    """
+    多关键字文字匹配器
+
+    所有关键字构建为一个 Aho-Corasick 自动机，每页只提取一次文字和字符坐标，
+    一次扫描即可找到全部关键字。匹配规则与 page.search_for 相同：不区分大小写，
+    连续空白和换行视为一个空格，跨行的匹配按行分别返回矩形。
+    """
+
+    def __init__(self, texts: List[str]):
+        """初始化匹配器，texts 中的空字符串会被忽略，重复关键字只保留一个"""
+        self.texts = []  # 关键字原文（去除首尾空白）
+        patterns = []
+        for text in texts:
+            if not text or not text.strip():
+                continue
+            text_clean = text.strip()
+            if text_clean in self.texts:
+                continue
+            self.texts.append(text_clean)
+            patterns.append(normalize_text(text_clean))
+
+        self._lengths = [len(pattern) for pattern in patterns]
+        self._build(patterns)
+
+    def _build(self, patterns: List[str]):
+        """构建自动机：goto 表、失败指针和输出表"""
+        goto = [{}]
+        outputs = [[]]
+
+        for pattern_index, pattern in enumerate(patterns):
+            node = 0
+            for c in pattern:
+                next_node = goto[node].get(c)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][c] = next_node
+                    goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(pattern_index)
+
+        # 按层次遍历计算失败指针，并合并后缀节点的输出
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for c, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and c not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(c, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    @staticmethod
+    def _page_chars(page: fitz.Page, textpage=None):
+        """
+        提取页面文字为规范化字符串，并记录每个字符的坐标和所在行
+
+        Returns:
+            tuple: (文字, 字符坐标列表, 行号列表)，空白字符的坐标为 None
+        """
+        if textpage is None:
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_SEARCH)
+
+        chars = []
+        bboxes = []
+        lines = []
+        line_no = 0
+
+        for block in textpage.extractRAWDICT()["blocks"]:
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    for char in span["chars"]:
+                        c = char["c"]
+                        if c.isspace():
+                            if chars and chars[-1] != " ":
+                                chars.append(" ")
+                                bboxes.append(None)
+                                lines.append(line_no)
+                            continue
+                        chars.append(_fold(c))
+                        bboxes.append(char["bbox"])
+                        lines.append(line_no)
+                # 行与行之间视为一个空格
+                if chars and chars[-1] != " ":
+                    chars.append(" ")
+                    bboxes.append(None)
+                    lines.append(line_no)
+                line_no += 1
+
+        return "".join(chars), bboxes, lines
+
+    def search_page(self, page: fitz.Page, textpage=None) -> Dict[str, List[fitz.Rect]]:
+        """
+        在页面中查找全部关键字
+
+        Args:
+            page: 页面对象
+            textpage: 可选，已创建的 TextPage（与其他操作共享，避免重复提取）
+
+        Returns:
+            dict: {关键字: [矩形, ...]}，只包含有匹配的关键字
+        """
+        if not self.texts:
+            return {}
+
+        text, bboxes, lines = self._page_chars(page, textpage)
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        lengths = self._lengths
+
+        hits = {}
+        last_end = {}  # 同一关键字的匹配不重叠（与 search_for 一致）
+        node = 0
+        for pos, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            for pattern_index in outputs[node]:
+                start = pos - lengths[pattern_index] + 1
+                previous_end = last_end.get(pattern_index, 0)
+                if start < previous_end:
+                    continue
+                last_end[pattern_index] = pos + 1
+                rects = self._span_rects(bboxes, lines, start, pos + 1)
+                pattern_hits = hits.setdefault(pattern_index, [])
+                # 紧接上一个匹配且在同一行时并入上一个矩形（与 search_for 一致，"aaaa" 中的 "aa" 只得到一个矩形）
+                if rects and pattern_hits and start == previous_end and lines[start] == lines[start - 1]:
+                    pattern_hits[-1] |= rects.pop(0)
+                pattern_hits.extend(rects)
+
+        return {self.texts[pattern_index]: rects for pattern_index, rects in hits.items()}
+
+    @staticmethod
+    def _span_rects(bboxes, lines, start: int, end: int) -> List[fitz.Rect]:
+        """将字符区间 [start, end) 按行合并为矩形"""
+        rects = []
+        current_line = None
+        for i in range(start, end):
+            bbox = bboxes[i]
+            if bbox is None:
+                continue
+            if lines[i] != current_line:
+                rects.append(fitz.Rect(bbox))
+                current_line = lines[i]
+            else:
+                rects[-1] |= bbox
+        return rects
@@ -0,0 +1,181 @@
+"""按样式匹配文字（颜色、字体、字号、旋转角度、透明度），每页只提取一次文字"""
+import math
+import re
+import fitz
+from typing import List, Dict, Optional
+
+
+def parse_color(value) -> Optional[tuple]:
+    """颜色配置转为 0-1 的 RGB：支持 "#cccccc"、[r, g, b]（0-1 或 0-255）和 sRGB 整数"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.strip().lstrip("#")
+        return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    if isinstance(value, int):
+        return tuple(fitz.sRGB_to_pdf(value))
+    rgb = [float(channel) for channel in value][:3]
+    if any(channel > 1 for channel in rgb):
+        rgb = [channel / 255 for channel in rgb]
+    return tuple(rgb)
+
+
+def _size_range(value) -> Optional[tuple]:
+    """字号配置转为 (最小, 最大)：单个数值允许 0.5 的误差"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value - 0.5, value + 0.5
+    low, high = value
+    return low if low is not None else 0, high if high is not None else math.inf
+
+
+class TextStyleFilter:
+    """
+    文字样式条件
+
+    由配置字典创建，各项都是可选的，未设置的项不限制：
+    - name: 显示名称（统计和日志中使用，默认根据条件生成）
+    - text: 片段文字需匹配的正则表达式（如变化的日期、用户名）
+    - font: 字体名包含的字符串（不区分大小写，忽略子集前缀）
+    - size: 字号，数值或 [最小, 最大]
+    - color: 颜色（"#cccccc" 或 [r, g, b]），color_tolerance 为各通道允许的误差（0-1，默认 0.1）
+    - min_luminance: 最低亮度（0 黑 ~ 1 白），用于匹配浅色文字
+    - angle: 旋转角度（逆时针，度），angle_tolerance 为允许的误差（默认 2）
+    - max_opacity: 最高不透明度（0-1），用于匹配半透明文字
+    """
+
+    def __init__(self, spec: Dict):
+        """从配置字典创建条件"""
+        self.text = re.compile(spec["text"]) if spec.get("text") else None
+        self.font = spec.get("font", "").lower() or None
+        self.size = _size_range(spec.get("size"))
+        self.color = parse_color(spec.get("color"))
+        self.color_tolerance = spec.get("color_tolerance", 0.1)
+        self.min_luminance = spec.get("min_luminance")
+        self.angle = spec.get("angle")
+        self.angle_tolerance = spec.get("angle_tolerance", 2)
+        self.max_opacity = spec.get("max_opacity")
+        self.name = spec.get("name") or self._describe(spec)
+
+    @staticmethod
+    def _describe(spec: Dict) -> str:
+        """根据条件生成显示名称"""
+        keys = ("text", "font", "size", "color", "min_luminance", "angle", "max_opacity")
+        return " ".join(f"{key}={spec[key]}" for key in keys if spec.get(key) not in (None, "")) or "全部文字"
+
+    def matches(self, span: Dict, angle: int, text: str = None) -> bool:
+        """
+        判断文字片段是否满足条件
+
+        Args:
+            span: extractRAWDICT / extractDICT 中的片段
+            angle: 片段所在行的旋转角度（逆时针，0-359）
+            text: 片段文字（设置了 text 条件时需要）
+        """
+        if self.size is not None and not self.size[0] <= span["size"] <= self.size[1]:
+            return False
+        if self.font is not None and self.font not in span["font"].split("+")[-1].lower():
+            return False
+        if self.max_opacity is not None and span.get("alpha", 255) / 255 > self.max_opacity + 1e-3:
+            return False
+        if self.angle is not None:
+            difference = abs(angle - self.angle % 360) % 360
+            if min(difference, 360 - difference) > self.angle_tolerance:
+                return False
+        if self.color is not None or self.min_luminance is not None:
+            r, g, b = fitz.sRGB_to_pdf(span["color"])
+            if self.color is not None and max(
+                abs(r - self.color[0]), abs(g - self.color[1]), abs(b - self.color[2])
+            ) > self.color_tolerance:
+                return False
+            if self.min_luminance is not None and 0.299 * r + 0.587 * g + 0.114 * b < self.min_luminance:
+                return False
+        if self.text is not None and not self.text.search(text or ""):
+            return False
+        return True
+
+
+class TextStyleMatcher:
+    """
+    多条件文字样式匹配器
+
+    每页只提取一次文字（extractRAWDICT），每个片段依次检查所有条件。
+    水平片段按片段外接矩形删除；旋转片段的外接矩形可能盖住大片正文，
+    改为按逐个字符的矩形删除，并附带样式键（角度、字号、颜色、字体名和条件的文字正则），
+    以便直接从内容流中删除对应的文字操作（见 style_key_matches）。
+    """
+
+    def __init__(self, filters: List[Dict]):
+        """初始化匹配器，filters 为样式条件配置列表（见 TextStyleFilter）"""
+        self.filters = [TextStyleFilter(spec) for spec in filters if spec]
+
+    @property
+    def names(self) -> List[str]:
+        """返回各条件的显示名称"""
+        return [style.name for style in self.filters]
+
+    def search_page(self, page: fitz.Page, textpage=None) -> Dict[str, List[tuple]]:
+        """
+        在页面中查找满足各条件的文字片段
+
+        Args:
+            page: 页面对象
+            textpage: 可选，已创建的 TextPage
+
+        Returns:
+            dict: {条件名称: [([片段的矩形, ...], 样式键), ...]}，每个匹配的片段一项，只包含有匹配的条件；
+                样式键为 (角度, 字号, RGB, 字体名, 文字正则或 None)，水平片段为 None
+        """
+        if not self.filters:
+            return {}
+        if textpage is None:
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_SEARCH)
+
+        hits = {}
+        for block in textpage.extractRAWDICT()["blocks"]:
+            for line in block.get("lines", []):
+                cos, sin = line["dir"]
+                angle = round(math.degrees(math.atan2(-sin, cos))) % 360
+                for span in line["spans"]:
+                    chars = span["chars"]
+                    text = "".join(char["c"] for char in chars)
+                    if not text.strip():
+                        continue
+                    matched = [style for style in self.filters if style.matches(span, angle, text)]
+                    if not matched:
+                        continue
+
+                    if angle == 0:
+                        rects = [fitz.Rect(span["bbox"])]
+                        for style in matched:
+                            hits.setdefault(style.name, []).append((rects, None))
+                        continue
+
+                    rects = [fitz.Rect(char["bbox"]) for char in chars if not char["c"].isspace()]
+                    key = (angle, round(span["size"], 1), tuple(fitz.sRGB_to_pdf(span["color"])),
+                           span["font"].split("+")[-1])
+                    for style in matched:
+                        hits.setdefault(style.name, []).append((rects, key + (style.text.pattern if style.text else None,)))
+
+        return hits
+
+
+def style_key_matches(show, key: tuple, font: str) -> bool:
+    """
+    内容流中的文字显示操作（core.content_stream.TextShow）是否与样式键相符
+
+    Args:
+        show: 文字显示操作
+        key: TextStyleMatcher.search_page 返回的样式键 (角度, 字号, RGB, 字体名, 文字正则)
+        font: 操作所用字体的字体名（见 core.page_fonts.PageFonts.base_name）
+    """
+    angle, size, color, font_name, pattern = key
+    difference = abs(show.angle - angle) % 360
+    if min(difference, 360 - difference) > 1 or abs(show.effective_size - size) > 0.5:
+        return False
+    if show.color is None or any(abs(a - b) > 0.02 for a, b in zip(show.color, color)):
+        return False
+    if not font or font.lower() != font_name.lower():
+        return False
+    return pattern is None or re.search(pattern, show.text) is not None
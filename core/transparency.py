@@ -0,0 +1,221 @@
+"""半透明叠加层识别：扫描透明图形状态（ExtGState）和带软蒙版（SMask）的图片"""
+import fitz
+from typing import List, Dict, Set
+from core.content_stream import dict_keys, remove_drawing
+from core.image_index import ImageHashIndex
+from core.xref_index import XrefIndex, TYPE_EXTGSTATE, TYPE_FORM
+
+
+def _number(value: str, default: float = 1.0) -> float:
+    """xref_get_key 返回的数值字符串转为浮点数"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class TransparencyScanner:
+    """
+    透明叠加层扫描器
+
+    从对象索引中找出透明图形状态（/CA 或 /ca 小于 1）、带软蒙版的图片和表单对象，
+    再按页面和表单的资源字典把它们映射到资源名。被不少于指定比例页面使用的
+    透明状态（按 CA/ca 取值归类）和软蒙版图片（按内容摘要归类）视为水印叠加层，
+    只删除内容流中使用它们的绘制操作。
+    """
+
+    def __init__(self, doc: fitz.Document, xref_index: XrefIndex = None):
+        """
+        初始化扫描器
+
+        Args:
+            doc: PDF文档
+            xref_index: 可选，文档对象索引（通常由 PDFHandler.get_xref_index 提供）
+        """
+        self.doc = doc
+        self.xref_index = xref_index or XrefIndex(doc)
+        self.transparent_states: Dict[int, tuple] = {}  # ExtGState xref -> (CA, ca)
+        self.alpha_states: Set[int] = set()  # 设置了 /CA 或 /ca 的 ExtGState xref（包括不透明的）
+        self.forms: List[int] = self.xref_index.xrefs_of_type(TYPE_FORM)  # 表单对象 xref
+
+        for xref in self.xref_index.xrefs_of_type(TYPE_EXTGSTATE):
+            if self._sets_alpha(xref):
+                self.alpha_states.add(xref)
+            alpha = self._alpha(xref)
+            if alpha:
+                self.transparent_states[xref] = alpha
+
+        self.images = ImageHashIndex(doc, self.xref_index)
+        self.smask_images = {
+            xref for xref in self.images.digests
+            if doc.xref_get_key(xref, "SMask")[0] == "xref"
+        }
+
+    def _alpha(self, xref: int, path: str = "") -> tuple:
+        """读取图形状态的 (CA, ca)，都不小于 1 时返回 None"""
+        stroke = _number(self.doc.xref_get_key(xref, path + "CA")[1])
+        fill = _number(self.doc.xref_get_key(xref, path + "ca")[1])
+        if stroke < 1 or fill < 1:
+            return round(stroke, 3), round(fill, 3)
+        return None
+
+    def _sets_alpha(self, xref: int, path: str = "") -> bool:
+        """图形状态是否设置了 /CA 或 /ca（设置为 1 也会覆盖之前的透明度）"""
+        return any(self.doc.xref_get_key(xref, path + key)[0] != "null" for key in ("CA", "ca"))
+
+    def _resources_owner(self, xref: int) -> int:
+        """页面没有 /Resources 时沿页面树 /Parent 向上查找继承的资源，返回资源所在对象的 xref"""
+        doc = self.doc
+        owner = xref
+        while doc.xref_get_key(owner, "Resources")[0] == "null":
+            parent = doc.xref_get_key(owner, "Parent")
+            if parent[0] != "xref":
+                return xref
+            owner = int(parent[1].split()[0])
+        return owner
+
+    def _container_usage(self, xref: int) -> Dict[str, Dict]:
+        """
+        返回页面或表单资源（包括从页面树继承的资源）中的透明状态和软蒙版图片
+
+        Returns:
+            dict: {"states": {资源名: (CA, ca)}, "alpha_names": 设置透明度的图形状态资源名集合,
+                "images": {资源名: 图片摘要}}
+        """
+        doc = self.doc
+        xref = self._resources_owner(xref)
+        states = {}
+        alpha_names = set()
+        kind, value = doc.xref_get_key(xref, "Resources/ExtGState")
+        if kind in ("dict", "xref"):
+            if kind == "xref":
+                value = doc.xref_object(int(value.split()[0]), compressed=True)
+            for name in dict_keys(value.encode("latin-1")):
+                state_kind, state_value = doc.xref_get_key(xref, f"Resources/ExtGState/{name}")
+                if state_kind == "xref":
+                    state_xref = int(state_value.split()[0])
+                    alpha = self.transparent_states.get(state_xref)
+                    sets_alpha = state_xref in self.alpha_states
+                else:
+                    alpha = self._alpha(xref, f"Resources/ExtGState/{name}/")
+                    sets_alpha = self._sets_alpha(xref, f"Resources/ExtGState/{name}/")
+                if alpha:
+                    states[name] = alpha
+                if sets_alpha:
+                    alpha_names.add(name)
+
+        images = {}
+        kind, value = doc.xref_get_key(xref, "Resources/XObject")
+        if kind in ("dict", "xref") and self.smask_images:
+            if kind == "xref":
+                value = doc.xref_object(int(value.split()[0]), compressed=True)
+            for name in dict_keys(value.encode("latin-1")):
+                image_kind, image_value = doc.xref_get_key(xref, f"Resources/XObject/{name}")
+                if image_kind == "xref" and int(image_value.split()[0]) in self.smask_images:
+                    images[name] = self.images.digests[int(image_value.split()[0])]
+
+        return {"states": states, "alpha_names": alpha_names, "images": images}
+
+    def scan(self) -> Dict:
+        """
+        映射透明状态和软蒙版图片到页面和表单
+
+        Returns:
+            dict: {"containers": {页面或表单 xref: 用法}, "pages": {页面索引: 使用的特征集合}}
+                特征为 ("state", (CA, ca)) 或 ("image", 图片摘要)
+        """
+        doc = self.doc
+        containers = {}
+        if self.transparent_states or self.smask_images or self.forms:
+            for xref in self.forms:
+                usage = self._container_usage(xref)
+                if usage["states"] or usage["images"]:
+                    containers[xref] = usage
+
+        pages = {}
+        for page_num in range(len(doc)):
+            page_xref = doc.page_xref(page_num)
+            usage = self._container_usage(page_xref)
+            if usage["states"] or usage["images"]:
+                containers[page_xref] = usage
+
+            keys = set()
+            used = [page_xref] + [item[0] for item in self.xref_index.page_resources(page_num)["forms"]]
+            for xref in used:
+                if xref in containers:
+                    keys.update(("state", alpha) for alpha in containers[xref]["states"].values())
+                    keys.update(("image", digest) for digest in containers[xref]["images"].values())
+            if keys:
+                pages[page_num] = keys
+
+        return {"containers": containers, "pages": pages}
+
+    def find_overlays(self, min_page_ratio: float = 0.5, scan: Dict = None) -> List[Dict]:
+        """
+        查找被不少于 min_page_ratio 比例页面使用的透明叠加层
+
+        Returns:
+            list: [{"kind": "state" 或 "image", "value", "page_count"}, ...]
+        """
+        scan = scan or self.scan()
+        page_count = len(self.doc)
+        counts = {}
+        for keys in scan["pages"].values():
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+
+        threshold = max(1, min_page_ratio * page_count)
+        return [
+            {"kind": kind, "value": value, "page_count": count}
+            for (kind, value), count in counts.items() if count >= threshold
+        ]
+
+    def remove_overlays(self, min_page_ratio: float = 0.5) -> Dict:
+        """
+        删除透明叠加层的绘制操作（只改写使用它们的页面和表单内容流）
+
+        内容流和要删除的名称都相同的页面一起改写；内容流还被其他页面使用时，
+        改写结果写入新的内容流（见 XrefIndex.write_page_contents）。
+
+        Returns:
+            dict: {"overlays": 识别到的叠加层列表, "operations": 删除的绘制操作数}
+        """
+        scan = self.scan()
+        overlays = self.find_overlays(min_page_ratio, scan)
+        result = {"overlays": overlays, "operations": 0}
+        if not overlays:
+            return result
+
+        keys = {(overlay["kind"], overlay["value"]) for overlay in overlays}
+        page_xrefs = {self.doc.page_xref(page_num): page_num for page_num in range(len(self.doc))}
+        # (内容流 xref 元组, 图形状态名称, 图片名称, 设置透明度的图形状态名称) -> 页面索引列表（表单为空列表）
+        groups = {}
+
+        for xref, usage in scan["containers"].items():
+            gs_names = frozenset(name for name, alpha in usage["states"].items() if ("state", alpha) in keys)
+            image_names = frozenset(name for name, digest in usage["images"].items() if ("image", digest) in keys)
+            if not gs_names and not image_names:
+                continue
+            alpha_names = frozenset(usage["alpha_names"])
+
+            if xref in page_xrefs:
+                stream_xrefs = tuple(self.xref_index.page_resources(page_xrefs[xref])["contents"])
+                if stream_xrefs:
+                    groups.setdefault((stream_xrefs, gs_names, image_names, alpha_names), []).append(page_xrefs[xref])
+            else:
+                groups.setdefault(((xref,), gs_names, image_names, alpha_names), [])
+
+        for (stream_xrefs, gs_names, image_names, alpha_names), page_nums in groups.items():
+            data = b"\n".join(self.doc.xref_stream(stream_xref) or b"" for stream_xref in stream_xrefs)
+            new_data, removed = remove_drawing(data, gs_names, image_names, alpha_names)
+            if not removed:
+                continue
+
+            if page_nums:
+                self.xref_index.write_page_contents(page_nums, list(stream_xrefs), new_data)
+            else:
+                # 表单内容流由资源引用，直接改写（对所有使用它的页面生效）
+                self.doc.update_stream(stream_xrefs[0], new_data)
+            result["operations"] += removed
+
+        return result
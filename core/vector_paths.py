@@ -0,0 +1,116 @@
+"""矢量路径水印识别：按几何特征统计跨页面在相同位置重复出现的路径"""
+import math
+import fitz
+import numpy as np
+from typing import List, Dict
+
+
+# 坐标量化步长（点）：同一位置的路径在不同页面上的坐标误差在此范围内视为相同
+GRID = 1.0
+
+# 路径元素类型编码（直线、曲线、矩形、四边形）
+_ITEM_CODES = {"l": 1, "c": 2, "re": 3, "qu": 4}
+
+def _quantize(value: float) -> int:
+    """坐标量化为网格整数"""
+    return int(round(value / GRID))
+
+
+def _color_key(color) -> tuple:
+    """颜色量化（None 表示不填充或不描边）"""
+    return tuple(round(value, 2) for value in color) if color else ()
+
+
+def path_signature(path: Dict):
+    """
+    计算 page.get_drawings 返回的路径的几何特征
+
+    外接矩形按网格量化；形状由各元素的类型和相对外接矩形左上角的量化坐标，
+    连同绘制方式（填充/描边）和颜色合成一个 64 位哈希。只有含曲线的路径
+    （轮廓化文字、图标等）才计算特征，直线和矩形组成的表格线、分隔线不参与识别。
+    描边的路径另把线宽计入形状哈希。
+
+    Returns:
+        tuple: (x0, y0, x1, y1, 形状哈希)，不含曲线的路径返回 None
+    """
+    items = path["items"]
+    if not any(item[0] == "c" for item in items):
+        return None
+
+    rect = path["rect"]
+    x0, y0 = rect.x0, rect.y0
+    shape = [path.get("type"), _color_key(path.get("fill")), _color_key(path.get("color"))]
+    if "s" in (path.get("type") or ""):
+        shape.append(round(path.get("width") or 1.0, 2))
+    for item in items:
+        shape.append(_ITEM_CODES.get(item[0], 0))
+        for point in item[1:]:
+            if isinstance(point, fitz.Point):
+                shape.append((_quantize(point.x - x0), _quantize(point.y - y0)))
+            elif isinstance(point, (fitz.Rect, fitz.Quad)):
+                shape.extend((_quantize(p.x - x0), _quantize(p.y - y0)) for p in (point.ul, point.lr))
+    shape_hash = hash(tuple(shape))
+
+    return _quantize(rect.x0), _quantize(rect.y0), _quantize(rect.x1), _quantize(rect.y1), shape_hash
+
+
+class VectorPathIndex:
+    """
+    矢量路径特征索引
+
+    逐页提取路径特征，所有页面的特征合成一个 (路径数, 6) 的整数数组
+    （页面索引 + 量化外接矩形 + 形状哈希），重复统计用 NumPy 一次完成，
+    不在 Python 中逐对比较路径。
+    """
+
+    def __init__(self, doc: fitz.Document, page_numbers: List[int] = None):
+        """
+        提取路径特征
+
+        Args:
+            doc: PDF文档
+            page_numbers: 参与统计的页面索引，默认全部页面
+        """
+        self.doc = doc
+        self.page_numbers = list(range(len(doc))) if page_numbers is None else list(page_numbers)
+
+        self.path_counts: Dict[int, int] = {}  # 页面索引 -> 页面上的路径总数
+        rows = []
+        for page_num in self.page_numbers:
+            paths = doc[page_num].get_drawings()
+            self.path_counts[page_num] = len(paths)
+            for path in paths:
+                signature = path_signature(path)
+                if signature is not None:
+                    rows.append((page_num,) + signature)
+        self.rows = np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+    def __len__(self):
+        """返回索引中的路径数"""
+        return len(self.rows)
+
+    def repeated(self, min_page_ratio: float = 0.5) -> Dict[int, List[fitz.Rect]]:
+        """
+        查找在不少于 min_page_ratio 比例的页面上、相同位置出现的相同路径
+
+        Returns:
+            dict: {页面索引: [路径几何外接矩形（按网格量化，不含描边宽度）, ...]}
+        """
+        rows = self.rows
+        if len(rows) == 0 or len(self.page_numbers) < 2:
+            return {}
+
+        # 特征相同的路径归为一组，统计每组出现的页面数（同一页面上的重复只计一次）
+        _, ids = np.unique(rows[:, 1:], axis=0, return_inverse=True)
+        ids = ids.reshape(-1)
+        pairs = np.unique(np.stack([ids, rows[:, 0]], axis=1), axis=0)
+        page_counts = np.bincount(pairs[:, 0], minlength=int(ids.max()) + 1)
+
+        threshold = max(2, math.ceil(min_page_ratio * len(self.page_numbers)))
+        selected = np.unique(rows[page_counts[ids] >= threshold][:, :5], axis=0)
+
+        result = {}
+        for page_num, x0, y0, x1, y1 in selected.tolist():
+            rect = fitz.Rect(x0 * GRID, y0 * GRID, x1 * GRID, y1 * GRID)
+            result.setdefault(page_num, []).append(rect)
+        return result
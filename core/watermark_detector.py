@@ -0,0 +1,372 @@
+"""水印自动识别：抽样统计跨页面重复出现的内容"""
+import math
+import fitz
+import numpy as np
+from collections import Counter, deque
+from typing import List, Dict
+
+
+def sample_page_numbers(page_count: int, sample_pages: int) -> List[int]:
+    """在文档中均匀抽取不超过 sample_pages 个页面（包含首页和末页）"""
+    if sample_pages <= 0 or page_count <= sample_pages:
+        return list(range(page_count))
+    if sample_pages == 1:
+        return [0]
+    step = (page_count - 1) / (sample_pages - 1)
+    return sorted({round(i * step) for i in range(sample_pages)})
+
+
+def _luminance(color: int) -> float:
+    """sRGB 整数颜色的亮度（0 黑 ~ 1 白）"""
+    r, g, b = fitz.sRGB_to_pdf(color)
+    return 0.299 * r + 0.587 * g + 0.114 * b
+
+
+class WatermarkDetector:
+    """
+    水印识别器
+
+    只抽样部分页面提取文字，把在多数抽样页面的相同位置重复出现的文字作为
+    水印候选，并根据旋转角度、颜色深浅、字号等特征给出置信度。
+    没有文字层的扫描件则把抽样页面渲染为低分辨率灰度图，按像素统计跨页面
+    稳定不变的深色区域作为水印区域候选。内容逐页变化的页眉页脚则按文字块到
+    页面上下边缘的距离聚类，识别跨页面重复的水平条带。
+    """
+
+    # 位置量化网格（页面宽高的 1/50），用于判断不同页面上的文字是否在同一位置
+    POSITION_GRID = 50
+    # 页眉页脚聚类的距离量化步长（点）
+    BAND_GRID = 4
+    # 页眉页脚与正文之间的最小空白（点），行距小于此值的文字块视为同一组
+    BAND_GAP = 8
+
+    def __init__(self, pdf_handler):
+        """
+        初始化识别器
+
+        Args:
+            pdf_handler: PDF处理器实例
+        """
+        self.pdf_handler = pdf_handler
+        self.doc = pdf_handler.doc
+
+    def detect_text(self, sample_pages: int = 30, min_page_ratio: float = 0.6) -> List[Dict]:
+        """
+        识别文字水印候选
+
+        Args:
+            sample_pages: 最多抽样的页面数
+            min_page_ratio: 候选文字至少出现在多少比例的抽样页面上
+
+        Returns:
+            list: 按置信度从高到低排列的候选，每项包含 text、confidence、page_ratio、
+                rect（首次出现的位置）、font、size、color、angle
+        """
+        page_numbers = sample_page_numbers(self.pdf_handler.get_page_count(), sample_pages)
+        if not page_numbers:
+            return []
+
+        # (文字, 量化位置) -> 候选统计
+        groups = {}
+        body_sizes = []
+        for page_num in page_numbers:
+            page = self.doc[page_num]
+            for line in self._page_lines(page):
+                body_sizes.append(line["size"])
+                if len(line["text"]) < 2 or line["text"].isdigit():
+                    continue  # 页码等逐页变化或过短的内容
+                key = (line["text"].lower(), self._quantize(line["rect"], page.rect))
+                group = groups.setdefault(key, dict(line, pages=set()))
+                group["pages"].add(page_num)
+
+        if not groups:
+            return []
+
+        body_sizes.sort()
+        body_size = body_sizes[len(body_sizes) // 2]
+
+        candidates = []
+        for group in groups.values():
+            page_ratio = len(group["pages"]) / len(page_numbers)
+            if page_ratio < min_page_ratio:
+                continue
+            candidates.append({
+                "text": group["text"],
+                "confidence": round(self._confidence(group, page_ratio, body_size), 2),
+                "page_ratio": round(page_ratio, 2),
+                "rect": group["rect"],
+                "font": group["font"],
+                "size": group["size"],
+                "color": group["color"],
+                "angle": group["angle"]
+            })
+
+        candidates.sort(key=lambda candidate: candidate["confidence"], reverse=True)
+        return candidates
+
+    def detect_regions(self, sample_pages: int = 30, min_page_ratio: float = 0.85,
+                       dpi: int = 24, tolerance: int = 24, contrast: int = 40) -> List[Dict]:
+        """
+        渲染抽样页面识别图像水印区域（适用于扫描件）
+
+        抽样页面渲染为低分辨率灰度图叠成 (页数, 高, 宽) 数组，逐像素取中位数作为
+        “常驻画面”，与中位数之差不超过 tolerance 的页面比例即为该像素的稳定度。
+        明显深于背景且稳定度不低于 min_page_ratio 的像素连成的区域即为候选。
+        只统计与多数抽样页面尺寸相同的页面。
+
+        Args:
+            sample_pages: 最多抽样的页面数
+            min_page_ratio: 像素保持不变的最小页面比例
+            dpi: 渲染分辨率
+            tolerance: 判定像素未变化的灰度差
+            contrast: 常驻画面比背景至少深多少灰度
+
+        Returns:
+            list: 区域字典（与区域列表格式一致，scope 为 all_pages），按面积从大到小排列，
+                额外包含 stability（区域内像素的平均稳定度）
+        """
+        page_numbers = sample_page_numbers(self.pdf_handler.get_page_count(), sample_pages)
+        if len(page_numbers) < 2:
+            return []
+
+        sizes = {page_num: tuple(round(v) for v in self.doc[page_num].rect[2:]) for page_num in page_numbers}
+        common_size = Counter(sizes.values()).most_common(1)[0][0]
+        page_numbers = [page_num for page_num in page_numbers if sizes[page_num] == common_size]
+        if len(page_numbers) < 2:
+            return []
+
+        matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+        stack = np.stack([
+            self._render_gray(self.doc[page_num], matrix) for page_num in page_numbers
+        ])
+        # 个别页面渲染尺寸差一个像素时已在 _render_gray 中裁齐
+        median = np.median(stack, axis=0)
+        stability = (np.abs(stack - median) <= tolerance).mean(axis=0)
+        background = np.percentile(median, 90)
+        mask = (stability >= min_page_ratio) & (median <= background - contrast)
+
+        height, width = mask.shape
+        page_rect = self.doc[page_numbers[0]].rect
+        regions = []
+        for x0, y0, x1, y1 in self._components(self._dilate(mask, 2)):
+            if (x1 - x0) * (y1 - y0) < 4:
+                continue  # 过小的区域多为噪点
+            rect = fitz.Rect(
+                x0 / width * page_rect.width,
+                y0 / height * page_rect.height,
+                x1 / width * page_rect.width,
+                y1 / height * page_rect.height
+            )
+            regions.append({
+                "rect": rect,
+                "page": 0,
+                "scope": "all_pages",
+                "pages": "当前文件全部页",
+                "stability": round(float(stability[y0:y1, x0:x1][mask[y0:y1, x0:x1]].mean()), 2)
+            })
+
+        regions.sort(key=lambda region: region["rect"].width * region["rect"].height, reverse=True)
+        return regions
+
+    def detect_bands(self, sample_pages: int = 30, min_page_ratio: float = 0.6,
+                     edge_ratio: float = 0.15) -> List[Dict]:
+        """
+        识别页眉页脚条带（内容逐页变化但位置固定的文字，如 “xxx资料网 www...”）
+
+        只抽样部分页面：每页的文字块从上下边缘向内按空白分组（间距小于 BAND_GAP 的为
+        同一组），完全落在页面上下 edge_ratio 范围内、且与下一组之间有空白的组才是候选，
+        避免把位置固定的正文首行当作页眉。候选文字块按中心到所在边缘的距离量化聚类
+        （相邻的量化值合为一类），出现在不少于 min_page_ratio 比例抽样页面上的类即为条带。
+        条带按到边缘的距离记录，不同尺寸的页面用 band_rect 换算各自的矩形。
+
+        Returns:
+            list: [{"edge": "top" 或 "bottom", "near": 离边缘较近的一侧距离, "far": 较远一侧距离,
+                    "page_ratio", "text": 示例文字}, ...]
+        """
+        page_numbers = sample_page_numbers(self.pdf_handler.get_page_count(), sample_pages)
+        if len(page_numbers) < 2:
+            return []
+
+        # (边缘, 量化距离) -> [(页面, 近边距离, 远边距离, 文字)]
+        buckets = {}
+        for page_num in page_numbers:
+            page = self.doc[page_num]
+            rect = page.rect
+            blocks = [
+                (y0, y1, text) for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks")
+                if block_type == 0 and text.strip()
+            ]
+            limit = edge_ratio * rect.height
+            for edge in ("top", "bottom"):
+                if edge == "top":
+                    offsets = [(y0 - rect.y0, y1 - rect.y0, text) for y0, y1, text in blocks]
+                else:
+                    offsets = [(rect.y1 - y1, rect.y1 - y0, text) for y0, y1, text in blocks]
+                for near, far, text in self._edge_blocks(offsets, limit):
+                    key = (edge, round((near + far) / 2 / self.BAND_GRID))
+                    buckets.setdefault(key, []).append((page_num, near, far, " ".join(text.split())))
+
+        bands = []
+        for edge in ("top", "bottom"):
+            keys = sorted(key for key in buckets if key[0] == edge)
+            clusters = []
+            for key in keys:
+                if clusters and key[1] - clusters[-1][-1][1] <= 1:
+                    clusters[-1].append(key)
+                else:
+                    clusters.append([key])
+
+            for cluster in clusters:
+                entries = [entry for key in cluster for entry in buckets[key]]
+                page_ratio = len({entry[0] for entry in entries}) / len(page_numbers)
+                if page_ratio < min_page_ratio:
+                    continue
+                bands.append({
+                    "edge": edge,
+                    "near": min(entry[1] for entry in entries),
+                    "far": max(entry[2] for entry in entries),
+                    "page_ratio": round(page_ratio, 2),
+                    "text": entries[0][3]
+                })
+
+        return bands
+
+    def _edge_blocks(self, offsets: List[tuple], limit: float) -> List[tuple]:
+        """
+        从页面边缘向内按空白分组文字块，返回页眉页脚候选
+
+        Args:
+            offsets: [(离边缘较近一侧距离, 较远一侧距离, 文字), ...]
+            limit: 候选组必须完全落在距边缘 limit 以内
+
+        Returns:
+            list: 完全落在范围内、且与下一组之间至少有 BAND_GAP 空白的组中的文字块
+        """
+        candidates = []
+        group = []
+        group_far = 0
+        for near, far, text in sorted(offsets):
+            if group and near - group_far >= self.BAND_GAP:
+                # 上一组结束：完全落在范围内才是候选，否则后面都是正文
+                if group_far > limit:
+                    return candidates
+                candidates.extend(group)
+                group = []
+            group.append((near, far, text))
+            group_far = max(group_far, far) if len(group) > 1 else far
+            if near > limit:
+                return candidates
+        # 页面上只有边缘附近的文字时，最后一组后面没有正文
+        if group and group_far <= limit:
+            candidates.extend(group)
+        return candidates
+
+    @staticmethod
+    def band_rect(band: Dict, page_rect: fitz.Rect, margin: float = 1) -> fitz.Rect:
+        """将条带换算为指定页面上的矩形（页面全宽，上下各留 margin）"""
+        if band["edge"] == "top":
+            return fitz.Rect(page_rect.x0, page_rect.y0 + band["near"] - margin,
+                             page_rect.x1, page_rect.y0 + band["far"] + margin)
+        return fitz.Rect(page_rect.x0, page_rect.y1 - band["far"] - margin,
+                         page_rect.x1, page_rect.y1 - band["near"] + margin)
+
+    @staticmethod
+    def describe_band(band: Dict) -> str:
+        """条带的简短说明（日志中使用）"""
+        edge = "页眉" if band["edge"] == "top" else "页脚"
+        side = "顶边" if band["edge"] == "top" else "底边"
+        return f"{edge}（距{side} {band['near']:.0f}-{band['far']:.0f}pt，如 “{band['text'][:20]}”）"
+
+    @staticmethod
+    def _render_gray(page: fitz.Page, matrix: fitz.Matrix) -> np.ndarray:
+        """渲染页面为灰度数组（按页面尺寸换算的像素数裁齐，保证各页形状一致）"""
+        pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+        image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+        rect = page.rect * matrix
+        height, width = int(rect.height), int(rect.width)
+        return image[:height, :width].astype(np.int16)
+
+    @staticmethod
+    def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+        """二值膨胀（把同一水印中相邻的笔画连成一个区域）"""
+        result = mask.copy()
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                shifted = np.roll(np.roll(mask, dy, axis=0), dx, axis=1)
+                if dy > 0:
+                    shifted[:dy] = False
+                elif dy < 0:
+                    shifted[dy:] = False
+                if dx > 0:
+                    shifted[:, :dx] = False
+                elif dx < 0:
+                    shifted[:, dx:] = False
+                result |= shifted
+        return result
+
+    @staticmethod
+    def _components(mask: np.ndarray) -> List[tuple]:
+        """求二值图的连通区域（8邻域），返回外接矩形 (x0, y0, x1, y1) 列表（像素坐标）"""
+        height, width = mask.shape
+        visited = np.zeros_like(mask)
+        boxes = []
+        for y, x in zip(*np.nonzero(mask)):
+            if visited[y, x]:
+                continue
+            visited[y, x] = True
+            queue = deque([(y, x)])
+            x0, y0, x1, y1 = x, y, x, y
+            while queue:
+                cy, cx = queue.popleft()
+                x0, y0, x1, y1 = min(x0, cx), min(y0, cy), max(x1, cx), max(y1, cy)
+                for ny in range(max(cy - 1, 0), min(cy + 2, height)):
+                    for nx in range(max(cx - 1, 0), min(cx + 2, width)):
+                        if mask[ny, nx] and not visited[ny, nx]:
+                            visited[ny, nx] = True
+                            queue.append((ny, nx))
+            boxes.append((int(x0), int(y0), int(x1) + 1, int(y1) + 1))
+        return boxes
+
+    @staticmethod
+    def _page_lines(page: fitz.Page) -> List[Dict]:
+        """提取页面文字行及其样式（取行内第一个非空白片段的字体、字号、颜色）"""
+        lines = []
+        text_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+        for block in text_dict["blocks"]:
+            for line in block.get("lines", []):
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join("".join(span["text"] for span in line["spans"]).split())
+                cos, sin = line["dir"]
+                lines.append({
+                    "text": text,
+                    "rect": fitz.Rect(line["bbox"]),
+                    "font": spans[0]["font"],
+                    "size": round(spans[0]["size"], 1),
+                    "color": spans[0]["color"],
+                    "angle": round(math.degrees(math.atan2(-sin, cos))) % 360
+                })
+        return lines
+
+    def _quantize(self, rect: fitz.Rect, page_rect: fitz.Rect) -> tuple:
+        """把文字位置量化为相对页面尺寸的网格坐标"""
+        grid = self.POSITION_GRID
+        return (
+            round((rect.x0 - page_rect.x0) / page_rect.width * grid),
+            round((rect.y0 - page_rect.y0) / page_rect.height * grid)
+        )
+
+    @staticmethod
+    def _confidence(group: Dict, page_ratio: float, body_size: float) -> float:
+        """根据重复程度和水印常见特征（倾斜、浅色、大字号）计算置信度"""
+        score = 0.6 * page_ratio
+        if group["angle"] % 90:
+            score += 0.2  # 倾斜文字
+        elif group["angle"]:
+            score += 0.05  # 竖排文字
+        if _luminance(group["color"]) >= 0.5:
+            score += 0.15  # 浅色文字
+        if body_size and group["size"] >= 1.5 * body_size:
+            score += 0.1  # 明显大于正文的字号
+        return min(score, 1.0)
@@ -1,7 +1,21 @@
 """水印删除逻辑"""
+import re
+import hashlib
 import fitz
 from typing import List, Dict, Set
 from utils.page_parser import is_page_excluded
+from core.text_matcher import TextMatcher, normalize_text
+from core.text_styles import TextStyleMatcher, style_key_matches, parse_color
+from core.content_stream import ContentStreamEditor, dict_keys
+from core.content_index import PageContentIndex
+from core.overlay import CoverOverlay, sample_background
+from core.page_fonts import PageFonts
+from core.redaction_planner import RedactionPlan
+from core.shared_images import redact_shared_images
+from core.transparency import TransparencyScanner
+from core.vector_paths import VectorPathIndex, GRID as VECTOR_PATH_GRID
+from core.raster_cleaner import RasterCleaner
+from core.xref_index import TYPE_FORM
 
 
 class WatermarkRemover:
@@ -11,19 +25,505 @@ class WatermarkRemover:
     PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED = fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED
     PDF_REDACT_TEXT_REMOVE = fitz.PDF_REDACT_TEXT_REMOVE
     
+    # 疑似水印的资源名 / 图层名
+    WATERMARK_NAME_PATTERN = re.compile(r"(?i)\bwm\d*\b|watermark|stamp|水印")
+    # 已知会以表单对象形式添加水印的生成工具（匹配文档的 Producer / Creator，只作为辅助特征）
+    WATERMARK_PRODUCER_PATTERNS = [r"(?i)watermark", r"水印"]
+    # 按外观重复判断时不参与的注释类型（链接、表单域和弹出窗口）
+    ANNOT_REPEAT_EXCLUDED = {"Link", "Widget", "Popup"}
+    
     def __init__(self, pdf_handler):
         """初始化水印删除器"""
         self.pdf_handler = pdf_handler
         self.doc = pdf_handler.doc
         
-    def remove_regions(self, regions: List[Dict], excluded_pages: Set[int] = None, 
+    def remove_regions(self, regions: List[Dict], excluded_pages: Set[int] = None,
                       mode: str = "actual"):
-        """删除指定区域"""
+        """
+        删除指定区域
+        
+        mode: actual 删除、cover 白色覆盖、crop 裁剪页边（无法裁剪的页面仍删除）、
+        overlay 共享遮盖层（只遮盖，不删除内容）
+        """
+        plan = self.plan_regions(regions, excluded_pages, mode)
+        if mode == "crop":
+            self.crop_plan(plan)
+        elif mode == "overlay":
+            self.overlay_plan(plan)
+        self.apply_plan(plan)
+        
+    def remove_text(self, texts: List[str], excluded_pages: Set[int] = None):
+        """删除指定文字"""
+        plan = RedactionPlan()
+        text_match_counts = self.plan_text(texts, excluded_pages, plan)
+        self.apply_plan(plan)
+        return text_match_counts
+        
+    def find_watermark_forms(self, min_page_ratio: float = 0.5,
+                             producer_patterns: List[str] = None) -> List[Dict]:
+        """
+        查找疑似水印的表单对象（Form XObject）
+        
+        一次遍历 xref 表找出所有表单对象，再按页面资源统计引用情况。被不少于
+        min_page_ratio 比例的页面引用，并满足以下任一特征的表单视为水印：
+        带有 Acrobat 水印标记（/PieceInfo 中的 /Watermark）、资源名或所属图层名
+        像水印、表单资源中有透明图形状态（/CA 或 /ca 小于 1）。文档生成工具匹配
+        producer_patterns 只作为辅助特征记入 reasons，单独不足以判定（共用的页眉、
+        Logo 等表单也会被多数页面引用）。
+        
+        Returns:
+            list: [{"xref", "names", "page_count", "reasons"}, ...]
+        """
+        doc = self.doc
+        page_count = self.pdf_handler.get_page_count()
+        if page_count == 0:
+            return []
+        
+        index = self.pdf_handler.get_xref_index()
+        forms = set(index.xrefs_of_type(TYPE_FORM))
+        if not forms:
+            return []
+        
+        usage = {}
+        for page_num in range(page_count):
+            for xref, name, invoker in index.page_resources(page_num)["forms"]:
+                if xref in forms:
+                    entry = usage.setdefault(xref, {"pages": set(), "names": set()})
+                    entry["pages"].add(page_num)
+                    entry["names"].add(name)
+        
+        if producer_patterns is None:
+            producer_patterns = self.WATERMARK_PRODUCER_PATTERNS
+        producer = " ".join(filter(None, [doc.metadata.get("producer"), doc.metadata.get("creator")]))
+        producer_match = any(re.search(pattern, producer) for pattern in producer_patterns)
+        
+        candidates = []
+        for xref, entry in usage.items():
+            if len(entry["pages"]) < max(1, min_page_ratio * page_count):
+                continue
+            
+            reasons = []
+            piece_type, piece_info = doc.xref_get_key(xref, "PieceInfo")
+            if piece_type == "xref":
+                piece_info = doc.xref_object(int(piece_info.split()[0]))
+            if "/Watermark" in piece_info:
+                reasons.append("pieceinfo")
+            if any(self.WATERMARK_NAME_PATTERN.search(name) for name in entry["names"]):
+                reasons.append("name")
+            oc = doc.xref_get_key(xref, "OC")
+            if oc[0] == "xref":
+                layer_name = doc.xref_get_key(int(oc[1].split()[0]), "Name")[1]
+                if self.WATERMARK_NAME_PATTERN.search(layer_name):
+                    reasons.append("layer")
+            if self._form_transparent(xref):
+                reasons.append("transparency")
+            if reasons and producer_match:
+                reasons.append("producer")
+            
+            if reasons:
+                candidates.append({
+                    "xref": xref,
+                    "names": sorted(entry["names"]),
+                    "page_count": len(entry["pages"]),
+                    "reasons": reasons
+                })
+        
+        return candidates
+        
+    def _form_transparent(self, xref: int) -> bool:
+        """表单资源中是否有透明图形状态（/CA 或 /ca 小于 1）"""
+        doc = self.doc
+        kind, value = doc.xref_get_key(xref, "Resources/ExtGState")
+        if kind == "xref":
+            value = doc.xref_object(int(value.split()[0]), compressed=True)
+        elif kind != "dict":
+            return False
+        for name in dict_keys(value.encode("latin-1")):
+            for key in ("CA", "ca"):
+                alpha = doc.xref_get_key(xref, f"Resources/ExtGState/{name}/{key}")[1]
+                try:
+                    if float(alpha) < 1:
+                        return True
+                except ValueError:
+                    continue
+        return False
+        
+    def remove_form_watermarks(self, min_page_ratio: float = 0.5, xrefs: List[int] = None) -> List[Dict]:
+        """
+        在对象层面清除水印表单：把表单的内容流改为空，所有引用它的页面随之不再显示水印
+        
+        只修改一次对象，耗时与页数无关，也不改写页面内容流。
+        
+        Args:
+            min_page_ratio: 自动识别时要求的最小引用页面比例
+            xrefs: 指定要清除的表单 xref，None 表示使用 find_watermark_forms 的结果
+        
+        Returns:
+            list: 被清除的表单信息
+        """
+        if xrefs is None:
+            forms = self.find_watermark_forms(min_page_ratio)
+        else:
+            forms = [{"xref": xref, "names": [], "page_count": 0, "reasons": ["manual"]} for xref in xrefs]
+        
+        for form in forms:
+            xref = form["xref"]
+            self.doc.update_stream(xref, b"")
+            # 清空资源，使其中的图片、字体等在保存时可被回收
+            self.doc.xref_set_key(xref, "Resources", "<<>>")
+        
+        if forms:
+            self.pdf_handler.invalidate_xref_index()
+        return forms
+        
+    def find_watermark_layers(self) -> List[Dict]:
+        """
+        查找疑似水印的可选内容图层（OCG）
+        
+        图层名像水印，或图层定义中带有水印标记（如 Acrobat 的 /PageElement /Watermark）
+        的图层视为水印图层。只读取图层定义，与页数无关。
+        
+        Returns:
+            list: [{"xref", "name", "on", "reasons"}, ...]
+        """
+        layers = []
+        for xref, ocg in self.doc.get_ocgs().items():
+            reasons = []
+            if self.WATERMARK_NAME_PATTERN.search(ocg.get("name") or ""):
+                reasons.append("name")
+            definition = self.doc.xref_object(xref, compressed=True)
+            if "/Watermark" in definition or "/PageElement" in definition:
+                reasons.append("usage")
+            if reasons:
+                layers.append({"xref": xref, "name": ocg.get("name"), "on": ocg.get("on"), "reasons": reasons})
+        return layers
+        
+    def remove_layer_watermarks(self, xrefs: List[int] = None) -> List[Dict]:
+        """
+        移除水印图层：在所有图层配置中关闭并锁定图层，打印和显示状态均设为关闭，
+        并清空只属于该图层的表单对象
+        
+        只修改图层定义和目录，不改写页面内容流，耗时与页数无关。
+        
+        Args:
+            xrefs: 指定要移除的图层 xref，None 表示使用 find_watermark_layers 的结果
+        
+        Returns:
+            list: 被移除的图层信息
+        """
+        if xrefs is None:
+            layers = self.find_watermark_layers()
+        else:
+            ocgs = self.doc.get_ocgs()
+            layers = [
+                {"xref": xref, "name": ocgs[xref].get("name"), "on": ocgs[xref].get("on"), "reasons": ["manual"]}
+                for xref in xrefs if xref in ocgs
+            ]
+        if not layers:
+            return layers
+        
+        layer_xrefs = [layer["xref"] for layer in layers]
+        
+        # 默认配置（-1）和所有备用配置
+        for config in [-1] + [item["number"] for item in self.doc.get_layers()]:
+            state = self.doc.get_layer(config)
+            self.doc.set_layer(
+                config,
+                on=[xref for xref in state.get("on", []) if xref not in layer_xrefs],
+                off=sorted(set(state.get("off", [])) | set(layer_xrefs)),
+                locked=sorted(set(state.get("locked", [])) | set(layer_xrefs))
+            )
+        
+        # 阅读器按使用情况（打印、显示）自动切换图层时也保持关闭
+        for xref in layer_xrefs:
+            self.doc.xref_set_key(xref, "Usage/Print", "<</PrintState/OFF>>")
+            self.doc.xref_set_key(xref, "Usage/View", "<</ViewState/OFF>>")
+        
+        # 直接挂在水印图层上的表单对象一并清空
+        layer_refs = {f"{xref} 0 R" for xref in layer_xrefs}
+        forms = [
+            xref for xref in self.pdf_handler.get_xref_index().xrefs_of_type(TYPE_FORM)
+            if self.doc.xref_get_key(xref, "OC")[1] in layer_refs
+        ]
+        if forms:
+            self.remove_form_watermarks(xrefs=forms)
+        
+        return layers
+        
+    def remove_transparent_overlays(self, min_page_ratio: float = 0.5) -> Dict:
+        """
+        删除半透明叠加层：被多数页面使用的透明图形状态（/CA、/ca 小于 1）下的绘制操作
+        和带软蒙版的重复图片
+        
+        只遍历一次 xref 表和资源字典定位使用它们的内容流，不渲染页面，也不按区域删除。
+        
+        Returns:
+            dict: {"overlays": 识别到的叠加层列表, "operations": 删除的绘制操作数}
+        """
+        result = TransparencyScanner(self.doc, self.pdf_handler.get_xref_index()).remove_overlays(min_page_ratio)
+        if result["operations"]:
+            self.pdf_handler.invalidate_xref_index()
+        return result
+        
+    def remove_text_operators(self, texts: List[str], excluded_pages: Set[int] = None) -> Dict[str, int]:
+        """
+        直接从内容流中删除显示指定文字的操作（不使用删除注释，页面不被扁平化）
+        
+        改写页面内容流和页面引用的表单内容流：单个文字显示操作（Tj、TJ、'、"）或同一
+        BT/ET 块中全部文字合起来与关键字相同（不区分大小写、连续空白视为一个空格）时删除。
+        删除的操作后面紧接着同一行的其他文字时，用等宽的字距调整代替以保留位移。
+        内容流还被其他页面使用时为改写的页面写入新的内容流。复合字体（CID 编码）的文字、
+        宽度无法确定的操作和只占一部分操作的关键字无法这样删除，由随后的文字删除继续处理。
+        
+        Returns:
+            dict: {关键字: 删除的次数}
+        """
+        if excluded_pages is None:
+            excluded_pages = set()
+        counts = {text.strip(): 0 for text in texts if text and text.strip()}
+        patterns = {normalize_text(text): text for text in counts}
+        if not patterns:
+            return counts
+            
+        def predicate(show) -> bool:
+            text = patterns.get(normalize_text(show.text))
+            if text is None:
+                return False
+            counts[text] += 1
+            return True
+        
+        index = self.pdf_handler.get_xref_index()
+        pages_by_contents = {}  # 内容流 xref 元组 -> 使用它的页面
+        forms = set()
+        for page_num in range(self.pdf_handler.get_page_count()):
+            if (page_num + 1) in excluded_pages:
+                continue
+            resources = index.page_resources(page_num)
+            if resources["contents"]:
+                pages_by_contents.setdefault(tuple(resources["contents"]), []).append(page_num)
+            forms.update(item[0] for item in resources["forms"])
+        
+        modified = False
+        for contents, page_nums in pages_by_contents.items():
+            # 文字块可能跨越多个内容流，合并后处理，改写后页面只引用一个内容流
+            fonts = PageFonts(self.doc, page_nums[0])
+            editor = ContentStreamEditor(
+                b"\n".join(self.doc.xref_stream(xref) or b"" for xref in contents), fonts.glyph_widths
+            )
+            if not editor.remove_text(predicate):
+                continue
+            index.write_page_contents(page_nums, contents, editor.getvalue())
+            modified = True
+        
+        for xref in sorted(forms):
+            # 表单按名称从资源中引用，无法只为部分页面复制，被排除的页面也使用时不修改
+            users = index.pages_using(xref)
+            if not users or any((page_num + 1) in excluded_pages for page_num in users):
+                continue
+            fonts = PageFonts(self.doc, users[0], referencer=xref)
+            editor = ContentStreamEditor(self.doc.xref_stream(xref) or b"", fonts.glyph_widths)
+            if editor.remove_text(predicate):
+                self.doc.update_stream(xref, editor.getvalue())
+                modified = True
+        
+        if modified:
+            self.pdf_handler.invalidate_xref_index()
+        return counts
+        
+    def remove_vector_paths(self, min_page_ratio: float = 0.5, excluded_pages: Set[int] = None) -> int:
+        """
+        删除矢量路径水印：在不少于 min_page_ratio 比例页面的相同位置重复出现的相同曲线路径
+        （如轮廓化的文字水印）
+        
+        直接改写页面内容流：外接矩形与重复路径相同（误差不超过一个网格）的曲线路径的绘制
+        操作替换为 n，不使用删除注释，因此描边范围内的其他线条、文字和图片都不受影响。
+        内容流还被其他页面使用时为改写的页面写入新的内容流。表单中的路径不处理
+        （被多数页面共用的水印表单见 remove_form_watermarks）。
+        
+        Returns:
+            int: 实际删除的路径数（按删除前后页面上的路径数之差统计）
+        """
+        if excluded_pages is None:
+            excluded_pages = set()
+        page_numbers = [
+            page_num for page_num in range(self.pdf_handler.get_page_count())
+            if (page_num + 1) not in excluded_pages
+        ]
+        index = VectorPathIndex(self.doc, page_numbers)
+        repeated = index.repeated(min_page_ratio)
+        if not repeated:
+            return 0
+        
+        xref_index = self.pdf_handler.get_xref_index()
+        # (内容流 xref 元组, 页面变换矩阵, 路径外接矩形) -> 页面索引列表
+        groups = {}
+        for page_num, rects in repeated.items():
+            contents = tuple(xref_index.page_resources(page_num)["contents"])
+            if contents:
+                matrix = tuple(self.doc[page_num].transformation_matrix)
+                key = (contents, matrix, tuple(tuple(rect) for rect in rects))
+                groups.setdefault(key, []).append(page_num)
+        
+        modified = []
+        for (contents, matrix, rects), page_nums in groups.items():
+            def predicate(bbox, rects=rects) -> bool:
+                return any(
+                    all(abs(bbox[i] - rect[i]) <= VECTOR_PATH_GRID for i in range(4))
+                    for rect in rects
+                )
+            
+            editor = ContentStreamEditor(b"\n".join(self.doc.xref_stream(xref) or b"" for xref in contents))
+            if editor.remove_paths(predicate, matrix):
+                xref_index.write_page_contents(page_nums, list(contents), editor.getvalue())
+                modified.extend(page_nums)
+        
+        if not modified:
+            return 0
+        self.pdf_handler.invalidate_xref_index()
+        return sum(
+            max(0, index.path_counts[page_num] - len(self.pdf_handler.get_page(page_num).get_drawings()))
+            for page_num in modified
+        )
+        
+    def remove_images(self, xrefs) -> int:
+        """
+        删除指定图片：所有图片对象替换为同一张 1x1 透明图片
+        
+        在对象层面替换，引用这些图片的页面无需逐页改写，也无需渲染页面。
+        
+        Returns:
+            int: 删除的图片对象数
+        """
+        xrefs = sorted(xrefs)
+        if not xrefs or self.pdf_handler.get_page_count() == 0:
+            return 0
+        
+        pix = fitz.Pixmap(fitz.csGRAY, (0, 0, 1, 1), 1)
+        pix.clear_with()
+        page = self.doc[0]
+        blank_xref = page.insert_image(page.rect, pixmap=pix)
+        # insert_image 会在第一页追加一段绘制指令，清空即可
+        self.doc.update_stream(page.get_contents()[-1], b" ")
+        
+        for xref in xrefs:
+            self.doc.xref_copy(blank_xref, xref)
+        
+        self.pdf_handler.invalidate_xref_index()
+        return len(xrefs)
+        
+    def remove_annotations(self, subtypes: List[str] = None, contents_patterns: List[str] = None,
+                           url_patterns: List[str] = None, repeated_ratio: float = 0) -> Dict[str, int]:
+        """
+        直接删除水印类注释（不改写页面内容流）
+        
+        只读取每页的 /Annots 数组和注释对象的几个键，不加载页面；匹配到的注释从
+        /Annots 数组中移除（其弹出窗口一并移除）。满足以下任一条件即删除：
+        类型在 subtypes 中、内容匹配 contents_patterns、链接地址匹配 url_patterns、
+        外观和内容完全相同的注释出现在不少于 repeated_ratio 比例的页面上（0 表示不启用）。
+        
+        Returns:
+            dict: 每种注释类型删除的数量（不含随之删除的弹出窗口）
+        """
+        doc = self.doc
+        page_count = self.pdf_handler.get_page_count()
+        subtypes = set(subtypes or [])
+        contents_patterns = [re.compile(pattern) for pattern in contents_patterns or []]
+        url_patterns = [re.compile(pattern) for pattern in url_patterns or []]
+        
+        # 页面索引 -> (数组所在 xref 或 None, 注释 xref 列表)
+        page_annots = {}
+        for page_num in range(page_count):
+            page_xref = doc.page_xref(page_num)
+            kind, value = doc.xref_get_key(page_xref, "Annots")
+            array_xref = None
+            if kind == "xref":
+                array_xref = int(value.split()[0])
+                value = doc.xref_object(array_xref, compressed=True)
+            elif kind != "array":
+                continue
+            xrefs = [int(xref) for xref in re.findall(r"(\d+) 0 R", value)]
+            # 数组中含有直接写入的注释字典时不处理该页
+            if xrefs and not re.sub(r"\d+ 0 R|[\[\]\s]", "", value):
+                page_annots[page_num] = (array_xref, xrefs)
+        
+        subtype_of = {}
+        for array_xref, xrefs in page_annots.values():
+            for xref in xrefs:
+                subtype_of[xref] = doc.xref_get_key(xref, "Subtype")[1].lstrip("/")
+        
+        repeated = set()
+        if repeated_ratio > 0:
+            pages_by_key = {}
+            for page_num, (array_xref, xrefs) in page_annots.items():
+                for xref in xrefs:
+                    if subtype_of[xref] in self.ANNOT_REPEAT_EXCLUDED:
+                        continue
+                    key = self._annotation_key(xref, subtype_of[xref])
+                    if key:
+                        pages_by_key.setdefault(key, set()).add(page_num)
+            threshold = max(2, repeated_ratio * page_count)
+            repeated = {key for key, pages in pages_by_key.items() if len(pages) >= threshold}
+        
+        removed_counts = {}
+        for page_num, (array_xref, xrefs) in page_annots.items():
+            removed = set()
+            for xref in xrefs:
+                subtype = subtype_of[xref]
+                if subtype in subtypes:
+                    removed.add(xref)
+                elif subtype == "Link":
+                    uri = doc.xref_get_key(xref, "A/URI")[1]
+                    if any(pattern.search(uri) for pattern in url_patterns):
+                        removed.add(xref)
+                elif subtype not in ("Widget", "Popup"):
+                    contents = doc.xref_get_key(xref, "Contents")[1]
+                    if any(pattern.search(contents) for pattern in contents_patterns):
+                        removed.add(xref)
+                    elif repeated and self._annotation_key(xref, subtype) in repeated:
+                        removed.add(xref)
+            if not removed:
+                continue
+            
+            # 被删除注释的弹出窗口
+            for xref in xrefs:
+                if subtype_of[xref] == "Popup" and doc.xref_get_key(xref, "Parent")[1] in {f"{x} 0 R" for x in removed}:
+                    removed.add(xref)
+            
+            kept = " ".join(f"{xref} 0 R" for xref in xrefs if xref not in removed)
+            if array_xref is None:
+                doc.xref_set_key(doc.page_xref(page_num), "Annots", f"[{kept}]")
+            else:
+                doc.update_object(array_xref, f"[{kept}]")
+            for xref in removed:
+                if subtype_of[xref] != "Popup":
+                    removed_counts[subtype_of[xref]] = removed_counts.get(subtype_of[xref], 0) + 1
+        
+        return removed_counts
+        
+    def _annotation_key(self, xref: int, subtype: str):
+        """注释的外观指纹：类型 + 外观流 MD5 + 内容（没有外观流时返回 None）"""
+        kind, value = self.doc.xref_get_key(xref, "AP/N")
+        if kind != "xref":
+            return None
+        stream = self.doc.xref_stream(int(value.split()[0])) or b""
+        return subtype, hashlib.md5(stream).hexdigest(), self.doc.xref_get_key(xref, "Contents")[1]
+        
+    def plan_regions(self, regions: List[Dict], excluded_pages: Set[int] = None,
+                     mode: str = "actual", plan: RedactionPlan = None) -> RedactionPlan:
+        """
+        将区域登记到删除计划中
+        
+        应用到所有页的区域只登记一次（不按页展开），计划编译时合并重复和重叠的矩形。
+        """
         if excluded_pages is None:
             excluded_pages = set()
+        if plan is None:
+            plan = RedactionPlan()
         
         page_count = self.pdf_handler.get_page_count()
-        page_redactions = {}
+        plan.page_count = page_count
+        fill = (1, 1, 1) if mode == "cover" else None
+        skip_pages = {page_num - 1 for page_num in excluded_pages}
         
         for region in regions:
             rect = region["rect"]
@@ -31,95 +531,418 @@ class WatermarkRemover:
             region_page = region.get("page")
             
             if scope == "current" and region_page is not None:
-                target_pages = [region_page]
+                target_page = region_page
             elif scope == "all_pages" or scope == "all_files":
                 # all_files 在单个文件处理时等同于 all_pages
-                target_pages = list(range(page_count))
+                plan.add_global(rect, fill, skip_pages)
+                continue
             else:
-                target_pages = [region_page] if region_page is not None else []
+                target_page = region_page
             
-            for page_num in target_pages:
-                if (page_num + 1) in excluded_pages:
-                    continue
-                
-                if page_num not in page_redactions:
-                    page_redactions[page_num] = []
-                page_redactions[page_num].append(rect)
+            if target_page is None or target_page in skip_pages or not 0 <= target_page < page_count:
+                continue
+            plan.add(target_page, rect, fill)
         
-        for page_num, rects in page_redactions.items():
-            page = self.pdf_handler.get_page(page_num)
-            
-            for rect in rects:
-                if mode == "cover":
-                    page.add_redact_annot(rect, fill=(1, 1, 1))
-                else:
-                    page.add_redact_annot(rect)
+        plan.compile()
+        return plan
+        
+    def crop_plan(self, plan: RedactionPlan, min_keep_ratio: float = 0.5, trim: bool = False) -> int:
+        """
+        裁剪模式：把计划中各页的删除区域裁到页面之外
+        
+        对每页求不与任何删除区域相交的最大矩形，设为页面的 CropBox，不改写内容流。
+        页面尺寸和删除区域相同的页面只计算一次。最大矩形不足页面面积 min_keep_ratio 的页面
+        （区域不在页边）不裁剪，仍留在计划中按删除处理；裁剪的页面从计划中移除。
+        
+        Args:
+            plan: 删除计划（只应包含区域和页眉页脚，文字应在裁剪后再登记）
+            min_keep_ratio: 裁剪后至少保留的页面面积比例
+            trim: 是否同时真正删除裁剪掉的页边内容（需要改写内容流）
+        
+        Returns:
+            int: 裁剪的页数
+        """
+        boxes = {}
+        cropped = []
+        trimmed = False
+        
+        for page_num in plan.page_numbers():
+            page = self.doc[page_num]
+            cropbox = page.cropbox
+            # 删除区域与文字、绘制内容一样使用未旋转、以 CropBox 左上角为原点的坐标
+            bounds = fitz.Rect(0, 0, cropbox.width, cropbox.height)
+            rects = [rect for rect, fill in plan.rects(page_num)]
+            key = (tuple(bounds), tuple(tuple(rect) for rect in rects))
+            if key not in boxes:
+                box = self.largest_clean_box(bounds, rects)
+                keep = box.width * box.height / max(bounds.width * bounds.height, 1e-6)
+                boxes[key] = box if keep >= min_keep_ratio else None
             
-            page.apply_redactions(
-                images=self.PDF_REDACT_IMAGE_PIXELS,
-                graphics=self.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED,
-                text=self.PDF_REDACT_TEXT_REMOVE
-            )
-    
-    def remove_text(self, texts: List[str], excluded_pages: Set[int] = None):
-        """删除指定文字"""
+            box = boxes[key]
+            if box is None:
+                continue
+            if box != bounds:
+                if trim:
+                    trimmed = self._trim_margins(page, bounds, box) or trimmed
+                page.set_cropbox(box + (cropbox.x0, cropbox.y0, cropbox.x0, cropbox.y0))
+            cropped.append(page_num)
+        
+        plan.discard(cropped)
+        if trimmed:
+            self.pdf_handler.invalidate_xref_index()
+        return len(cropped)
+        
+    def overlay_plan(self, plan: RedactionPlan, fill=None) -> int:
+        """
+        遮盖模式：把计划中各页的区域画在共享的表单对象中，由页面引用（见 core.overlay）
+        
+        不调用 apply_redactions，区域下的内容仍保留在文件中，只是被遮住。
+        页面几何和区域相同的页面共用一个表单，背景色只在其中第一页取样。
+        处理过的页面从计划中移除。
+        
+        Args:
+            plan: 删除计划（只应包含区域和页眉页脚）
+            fill: 遮盖颜色，None 或 "white" 为白色，"sample" 为各区域四周的背景色，也可以是颜色配置（见 parse_color）
+        
+        Returns:
+            int: 遮盖的页数
+        """
+        overlay = CoverOverlay(self.doc)
+        color = None if fill in (None, "", "white", "sample") else parse_color(fill)
+        colors = {}
+        pages = []
+        
+        for page_num in plan.page_numbers():
+            page = self.doc[page_num]
+            rects = [rect for rect, entry_fill in plan.rects(page_num)]
+            if fill == "sample":
+                key = (tuple(page.transformation_matrix), tuple(tuple(rect) for rect in rects))
+                if key not in colors:
+                    colors[key] = [sample_background(page, rect) for rect in rects]
+                page_colors = colors[key]
+            else:
+                page_colors = [color or (1, 1, 1)] * len(rects)
+            overlay.stamp(page, rects, page_colors)
+            pages.append(page_num)
+        
+        plan.discard(pages)
+        if pages:
+            self.pdf_handler.invalidate_xref_index()
+        return len(pages)
+        
+    @staticmethod
+    def largest_clean_box(bounds: fitz.Rect, rects: List[fitz.Rect]) -> fitz.Rect:
+        """
+        求 bounds 内不与任何矩形相交的最大矩形
+        
+        最大矩形的每条边要么是页面边界，要么贴着某个矩形的对边，只需枚举这些候选边。
+        """
+        obstacles = [fitz.Rect(rect) & bounds for rect in rects]
+        obstacles = [rect for rect in obstacles if not rect.is_empty]
+        if not obstacles:
+            return fitz.Rect(bounds)
+        
+        lefts = sorted({bounds.x0} | {rect.x1 for rect in obstacles})
+        rights = sorted({bounds.x1} | {rect.x0 for rect in obstacles})
+        tops = sorted({bounds.y0} | {rect.y1 for rect in obstacles})
+        bottoms = sorted({bounds.y1} | {rect.y0 for rect in obstacles})
+        
+        best = fitz.Rect()
+        best_area = 0
+        for x0 in lefts:
+            for x1 in rights:
+                if x1 <= x0:
+                    continue
+                for y0 in tops:
+                    for y1 in bottoms:
+                        area = (x1 - x0) * (y1 - y0)
+                        if y1 <= y0 or area <= best_area:
+                            continue
+                        if any(rect.x0 < x1 and x0 < rect.x1 and rect.y0 < y1 and y0 < rect.y1 for rect in obstacles):
+                            continue
+                        best = fitz.Rect(x0, y0, x1, y1)
+                        best_area = area
+        return best
+        
+    def _trim_margins(self, page: fitz.Page, bounds: fitz.Rect, box: fitz.Rect) -> bool:
+        """删除 box 之外的页边内容，返回是否改写了页面"""
+        margins = [
+            fitz.Rect(bounds.x0, bounds.y0, bounds.x1, box.y0),
+            fitz.Rect(bounds.x0, box.y1, bounds.x1, bounds.y1),
+            fitz.Rect(bounds.x0, box.y0, box.x0, box.y1),
+            fitz.Rect(box.x1, box.y0, bounds.x1, box.y1),
+        ]
+        margins = [rect for rect in margins if not rect.is_empty]
+        touched = PageContentIndex(page).touched(margins)
+        flags = self._flags_for_content(touched)
+        if flags is None:
+            return False
+        
+        for i in touched["hits"]:
+            page.add_redact_annot(margins[i])
+        page.apply_redactions(**flags)
+        return True
+        
+    def clean_scanned_pages(self, regions: List[Dict] = None, excluded_pages: Set[int] = None,
+                            criteria: Dict = None, workers: int = 0, quality: int = 90) -> Dict:
+        """
+        清除扫描页（只有一张整页图片的页面）中的水印像素，不整块覆盖区域，保留区域内的正文
+        
+        Args:
+            regions: 可选，区域列表；提供时只处理区域内的像素，没有区域的扫描页不处理
+            excluded_pages: 排除的页码（1-based）
+            criteria: 水印像素识别条件（见 core.raster_cleaner.classify_pixels）
+            workers: 并行进程数
+            quality: JPEG 图片重新编码的质量
+        
+        Returns:
+            dict: {"pages": 图片被改写的扫描页（其余页面，包括未能清除的扫描页，需按常规方式处理）,
+                   "scanned_pages": 全部扫描页, "pixels": 替换的像素数}
+        """
+        if excluded_pages is None:
+            excluded_pages = set()
+        page_numbers = [
+            page_num for page_num in range(self.pdf_handler.get_page_count())
+            if (page_num + 1) not in excluded_pages
+        ]
+        
+        page_rects = None
+        if regions:
+            plan = self.plan_regions(regions, excluded_pages)
+            page_rects = {page_num: [rect for rect, fill in plan.rects(page_num)] for page_num in page_numbers}
+        
+        cleaner = RasterCleaner(self.doc, self.pdf_handler.get_xref_index())
+        return cleaner.clean(page_numbers, criteria, page_rects, workers=workers, quality=quality)
+        
+    def plan_bands(self, bands: List[Dict], excluded_pages: Set[int] = None,
+                   mode: str = "actual", plan: RedactionPlan = None) -> int:
+        """
+        将页眉页脚条带（见 WatermarkDetector.detect_bands）按各页的页面尺寸换算为矩形，
+        登记到删除计划中
+        
+        Returns:
+            int: 登记的矩形数
+        """
+        from core.watermark_detector import WatermarkDetector
+        
+        if excluded_pages is None:
+            excluded_pages = set()
+        if plan is None:
+            plan = RedactionPlan()
+        
+        fill = (1, 1, 1) if mode == "cover" else None
+        count = 0
+        for page_num in range(self.pdf_handler.get_page_count()):
+            if (page_num + 1) in excluded_pages:
+                continue
+            page_rect = self.doc[page_num].rect
+            for band in bands:
+                plan.add(page_num, WatermarkDetector.band_rect(band, page_rect), fill)
+                count += 1
+        return count
+        
+    def plan_text(self, texts: List[str], excluded_pages: Set[int] = None,
+                  plan: RedactionPlan = None) -> Dict[str, int]:
+        """
+        搜索文字并将匹配矩形登记到删除计划中
+        
+        Returns:
+            dict: 每个文字的匹配数量
+        """
         if excluded_pages is None:
             excluded_pages = set()
         
         page_count = self.pdf_handler.get_page_count()
         text_match_counts = {text.strip(): 0 for text in texts if text and text.strip()}
+        if not text_match_counts:
+            return text_match_counts
+        
+        # 所有文字构建一个匹配器，每页只提取一次文字
+        matcher = TextMatcher(texts)
         
         for page_num in range(page_count):
             if (page_num + 1) in excluded_pages:
                 continue
             
             page = self.pdf_handler.get_page(page_num)
-            page_has_redactions = False
             
-            for text in texts:
-                if not text or not text.strip():
-                    continue
+            for text_clean, text_instances in matcher.search_page(page).items():
+                text_match_counts[text_clean] += len(text_instances)
                 
-                text_clean = text.strip()
-                text_instances = page.search_for(text_clean)
-                
-                if text_clean in text_match_counts:
-                    text_match_counts[text_clean] += len(text_instances)
+                if plan is not None:
+                    for rect in text_instances:
+                        plan.add(page_num, rect)
+        
+        return text_match_counts
+        
+    def plan_styles(self, filters: List[Dict], excluded_pages: Set[int] = None,
+                    plan: RedactionPlan = None) -> Dict[str, int]:
+        """
+        按样式条件（颜色、字体、字号、旋转角度、透明度，见 core.text_styles）查找文字片段
+        并将其矩形登记到删除计划中
+        
+        每页只提取一次文字，所有条件在同一次遍历中检查。旋转的片段优先直接从页面
+        内容流中删除对应的文字操作（删除注释会连带删除与旋转文字外接矩形相交的正文），
+        内容流中找不到时再按逐个字符的矩形登记。
+        
+        Returns:
+            dict: 每个条件匹配的片段数量
+        """
+        if excluded_pages is None:
+            excluded_pages = set()
+        
+        matcher = TextStyleMatcher(filters)
+        style_match_counts = dict.fromkeys(matcher.names, 0)
+        if not style_match_counts:
+            return style_match_counts
+        
+        edited = False
+        for page_num in range(self.pdf_handler.get_page_count()):
+            if (page_num + 1) in excluded_pages:
+                continue
+            
+            page = self.pdf_handler.get_page(page_num)
+            hits = matcher.search_page(page)
+            
+            removed_keys = set()
+            if plan is not None:
+                rotated = {key for matches in hits.values() for rects, key in matches if key is not None}
+                if rotated:
+                    removed_keys = self._remove_styled_text_operators(page_num, rotated)
+                    edited = edited or bool(removed_keys)
+            
+            for name, matches in hits.items():
+                style_match_counts[name] += len(matches)
                 
-                for rect in text_instances:
+                if plan is not None:
+                    for rects, key in matches:
+                        if key in removed_keys:
+                            continue
+                        for rect in rects:
+                            plan.add(page_num, rect)
+        
+        if edited:
+            self.pdf_handler.invalidate_xref_index()
+        return style_match_counts
+        
+    def _remove_styled_text_operators(self, page_num: int, keys: Set[tuple]) -> Set[tuple]:
+        """
+        从页面内容流中删除与样式键（角度、字号、颜色、字体名、文字正则）相符的文字显示操作
+        
+        内容流被其他页面共用时，改写结果写入该页面自己的新内容流。
+        
+        Returns:
+            set: 在内容流中找到并删除的样式键
+        """
+        index = self.pdf_handler.get_xref_index()
+        contents = index.page_resources(page_num)["contents"]
+        if not contents:
+            return set()
+        
+        fonts = PageFonts(self.doc, page_num)
+        removed = set()
+        
+        def predicate(show) -> bool:
+            font = fonts.base_name(show.font)
+            for key in keys:
+                if style_key_matches(show, key, font):
+                    removed.add(key)
+                    return True
+            return False
+        
+        editor = ContentStreamEditor(
+            b"\n".join(self.doc.xref_stream(xref) or b"" for xref in contents), fonts.glyph_widths
+        )
+        if editor.remove_text(predicate, match_blocks=False):
+            index.write_page_contents([page_num], contents, editor.getvalue())
+        return removed
+        
+    def apply_plan(self, plan: RedactionPlan) -> int:
+        """
+        按删除计划逐页添加删除注释，每页只调用一次 apply_redactions
+        
+        多个页面以相同区域删除同一张共享图片时，图片只处理一次（见 core.shared_images）。
+        每页先用内容空间索引（见 core.content_index）筛掉没有碰到任何内容的矩形，
+        这些矩形不创建删除注释；所有矩形都没碰到内容的页面不调用 apply_redactions。
+        
+        Returns:
+            int: 无需调用 apply_redactions 的页数（区域内没有内容，或只碰到已单独处理的共享图片）
+        """
+        page_contents = []
+        image_pages = {}
+        skipped_pages = 0
+        
+        for page_num in plan.page_numbers():
+            page = self.pdf_handler.get_page(page_num)
+            entries = plan.rects(page_num)
+            touched = PageContentIndex(page).touched([rect for rect, fill in entries])
+            if not touched["hits"]:
+                skipped_pages += 1
+                continue
+            entries = [entries[i] for i in touched["hits"]]
+            page_contents.append((page_num, touched, entries))
+            if any(not covered for bbox, covered in touched["images"]):
+                image_pages[page_num] = [rect for rect, fill in entries]
+        
+        cleaned_images = {}
+        if len(image_pages) > 1:
+            cleaned_images = redact_shared_images(self.doc, image_pages, xref_index=self.pdf_handler.get_xref_index())
+        
+        applied_pages = 0
+        for page_num, touched, entries in page_contents:
+            flags = self._flags_for_content(touched, cleaned_images.get(page_num, []))
+            if flags is None:
+                skipped_pages += 1
+                continue
+            
+            page = self.pdf_handler.get_page(page_num)
+            for rect, fill in entries:
+                if fill is not None:
+                    page.add_redact_annot(rect, fill=fill)
+                else:
                     page.add_redact_annot(rect)
-                    page_has_redactions = True
             
-            if page_has_redactions:
-                page.apply_redactions(
-                    images=self.PDF_REDACT_IMAGE_PIXELS,
-                    graphics=self.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED,
-                    text=self.PDF_REDACT_TEXT_REMOVE
-                )
+            page.apply_redactions(**flags)
+            applied_pages += 1
+        
+        if applied_pages or cleaned_images:
+            self.pdf_handler.invalidate_xref_index()
+        return skipped_pages
+        
+    def _flags_for_content(self, touched: Dict, cleaned_images: List[fitz.Rect] = ()):
+        """根据碰到的内容生成 apply_redactions 参数，cleaned_images 为已单独处理过的图片位置"""
+        images = [
+            (bbox, covered) for bbox, covered in touched["images"]
+            if not any(abs(bbox.x0 - done.x0) + abs(bbox.y0 - done.y0)
+                       + abs(bbox.x1 - done.x1) + abs(bbox.y1 - done.y1) < 1 for done in cleaned_images)
+        ]
+        
+        if not (touched["text"] or touched["graphics"] or images):
+            return None
+        
+        if not images:
+            image_flag = fitz.PDF_REDACT_IMAGE_NONE
+        elif all(covered for bbox, covered in images):
+            image_flag = fitz.PDF_REDACT_IMAGE_REMOVE
+        else:
+            image_flag = self.PDF_REDACT_IMAGE_PIXELS
+        
+        return {
+            "images": image_flag,
+            "graphics": (self.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED if touched["graphics"]
+                         else fitz.PDF_REDACT_LINE_ART_NONE),
+            "text": self.PDF_REDACT_TEXT_REMOVE
+        }
         
-        return text_match_counts
-    
     def remove_text_from_page(self, page_num: int, texts: List[str]):
         """从指定页面删除文字"""
         page = self.pdf_handler.get_page(page_num)
-        has_redactions = False
+        plan = RedactionPlan()
         
-        for text in texts:
-            if not text or not text.strip():
-                continue
-            
-            # 搜索文字实例
-            text_instances = page.search_for(text.strip())
-            
-            # 为每个实例添加删除注释
+        # 一次扫描查找所有文字实例，并登记到删除计划中
+        for text_instances in TextMatcher(texts).search_page(page).values():
             for rect in text_instances:
-                page.add_redact_annot(rect)
-                has_redactions = True
+                plan.add(page_num, rect)
         
         # 应用删除
-        if has_redactions:
-            page.apply_redactions(
-                images=self.PDF_REDACT_IMAGE_PIXELS,
-                graphics=self.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED,
-                text=self.PDF_REDACT_TEXT_REMOVE
-            )
+        self.apply_plan(plan)
@@ -0,0 +1,181 @@
+"""文档对象索引：一次遍历 xref 表，按需建立对象类型、页面资源和反向引用"""
+import time
+import fitz
+from array import array
+from typing import List, Dict
+
+
+# 对象类型编码
+TYPE_OTHER = 0
+TYPE_PAGE = 1
+TYPE_IMAGE = 2
+TYPE_FORM = 3
+TYPE_EXTGSTATE = 4
+TYPE_FONT = 5
+TYPE_OCG = 6
+TYPE_ANNOT = 7
+
+_TYPE_CODES = {
+    "/Page": TYPE_PAGE,
+    "/ExtGState": TYPE_EXTGSTATE,
+    "/Font": TYPE_FONT,
+    "/OCG": TYPE_OCG,
+    "/Annot": TYPE_ANNOT,
+}
+_SUBTYPE_CODES = {
+    "/Image": TYPE_IMAGE,
+    "/Form": TYPE_FORM,
+}
+
+
+class XrefIndex:
+    """
+    文档对象索引
+
+    各部分在第一次查询时才建立并缓存：
+    - 对象类型：遍历一次 xref 表，每个对象一个字节（array('B')）
+    - 页面资源：每页的内容流、图片、表单和字体（按页缓存）
+    - 反向引用：资源 xref -> 使用它的页面（压缩为偏移数组 + 页面数组）
+
+    文档结构被修改后（新增对象、改写资源）需调用 invalidate() 丢弃缓存。
+    各部分的建立耗时记录在 timings 中。
+    """
+
+    def __init__(self, doc: fitz.Document):
+        """创建空索引（不立即遍历文档）"""
+        self.doc = doc
+        self.timings: Dict[str, float] = {}  # 部分名称 -> 建立耗时（秒）
+        self.invalidate()
+
+    def invalidate(self):
+        """丢弃所有缓存，下次查询时重新建立"""
+        self._types = None
+        self._by_type = {}
+        self._page_resources = {}
+        self._users_offsets = None
+        self._users = None
+
+    def __len__(self):
+        """返回 xref 表长度"""
+        return self.doc.xref_length()
+
+    # ---------- 对象类型 ----------
+
+    def _build_types(self):
+        """遍历 xref 表，记录每个对象的类型编码"""
+        start = time.perf_counter()
+        doc = self.doc
+        types = array("B", bytes(doc.xref_length()))
+        for xref in range(1, len(types)):
+            code = _SUBTYPE_CODES.get(doc.xref_get_key(xref, "Subtype")[1], TYPE_OTHER)
+            if code == TYPE_OTHER:
+                code = _TYPE_CODES.get(doc.xref_get_key(xref, "Type")[1], TYPE_OTHER)
+            types[xref] = code
+        self._types = types
+        self.timings["types"] = time.perf_counter() - start
+
+    def type_of(self, xref: int) -> int:
+        """返回对象的类型编码（TYPE_*）"""
+        if self._types is None:
+            self._build_types()
+        return self._types[xref] if 0 < xref < len(self._types) else TYPE_OTHER
+
+    def xrefs_of_type(self, code: int) -> List[int]:
+        """返回指定类型的全部对象 xref（升序）"""
+        if self._types is None:
+            self._build_types()
+        if code not in self._by_type:
+            self._by_type[code] = [xref for xref, value in enumerate(self._types) if value == code and xref]
+        return self._by_type[code]
+
+    # ---------- 页面资源 ----------
+
+    def page_resources(self, page_num: int) -> Dict:
+        """
+        返回页面使用的资源（包括嵌套表单中的资源）
+
+        Returns:
+            dict: {"contents": [内容流 xref],
+                   "images": [(xref, 透明蒙版 xref, 资源名, 所在表单 xref 或 0)],
+                   "forms": [(xref, 资源名, 所在表单 xref 或 0)],
+                   "fonts": [xref]}
+        """
+        resources = self._page_resources.get(page_num)
+        if resources is None:
+            start = time.perf_counter()
+            doc = self.doc
+            resources = {
+                "contents": doc[page_num].get_contents(),
+                "images": [(item[0], item[1], item[7], item[9]) for item in doc.get_page_images(page_num, full=True)],
+                "forms": [(item[0], item[1], item[2]) for item in doc.get_page_xobjects(page_num)],
+                "fonts": [item[0] for item in doc.get_page_fonts(page_num)]
+            }
+            self._page_resources[page_num] = resources
+            self.timings["pages"] = self.timings.get("pages", 0) + time.perf_counter() - start
+        return resources
+
+    def _build_users(self):
+        """建立资源 xref -> 使用页面的反向索引（偏移数组 + 页面数组）"""
+        doc = self.doc
+        page_count = len(doc)
+        per_xref = {}
+        for page_num in range(page_count):
+            resources = self.page_resources(page_num)
+            used = set(resources["contents"])
+            used.update(item[0] for item in resources["images"])
+            used.update(item[1] for item in resources["images"] if item[1])
+            used.update(item[0] for item in resources["forms"])
+            used.update(resources["fonts"])
+            for xref in used:
+                per_xref.setdefault(xref, []).append(page_num)
+
+        start = time.perf_counter()
+        length = doc.xref_length()
+        offsets = array("I", bytes(4 * (length + 1)))
+        for xref in range(length):
+            offsets[xref + 1] = offsets[xref] + len(per_xref.get(xref, ()))
+        users = array("I", bytes(4 * offsets[length]))
+        for xref, pages in per_xref.items():
+            if xref < length:
+                users[offsets[xref]:offsets[xref] + len(pages)] = array("I", pages)
+        self._users_offsets = offsets
+        self._users = users
+        self.timings["users"] = time.perf_counter() - start
+
+    def pages_using(self, xref: int) -> List[int]:
+        """返回使用该资源（内容流、图片、表单或字体）的页面索引"""
+        if self._users is None:
+            self._build_users()
+        if not 0 <= xref < len(self._users_offsets) - 1:
+            return []
+        return list(self._users[self._users_offsets[xref]:self._users_offsets[xref + 1]])
+
+    def write_page_contents(self, page_nums: List[int], contents: List[int], data: bytes) -> int:
+        """
+        把改写后的内容写回使用相同内容流的页面
+
+        内容流只被这些页面使用时写回第一个内容流；还被其他页面（包括被排除的页面）
+        使用时创建新的内容流，原内容流保持不变。多个内容流合并后页面只引用写入的那一个。
+        写入后需调用 invalidate()。
+
+        Returns:
+            int: 写入的内容流 xref
+        """
+        doc = self.doc
+        pages = set(page_nums)
+        if all(set(self.pages_using(xref)) <= pages for xref in contents):
+            xref = contents[0]
+            doc.update_stream(xref, data)
+            if len(contents) == 1:
+                return xref
+        else:
+            xref = doc.get_new_xref()
+            doc.update_object(xref, "<<>>")
+            doc.update_stream(xref, data)
+        for page_num in page_nums:
+            doc.xref_set_key(doc.page_xref(page_num), "Contents", f"{xref} 0 R")
+        return xref
+
+    def build_time(self) -> float:
+        """返回已建立部分的总耗时（秒）"""
+        return sum(self.timings.values())
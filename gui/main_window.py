@@ -44,6 +44,7 @@ class MainWindow:
         
         self.file_list = []
         self.selected_regions = []
+        self.image_samples = []  # 样例水印图片特征
         self.text_to_remove = []
         self.text_input_widgets = []
         self.excluded_pages = ""
@@ -412,6 +413,19 @@ class MainWindow:
         )
         self.btn_select_region.pack(side="left", padx=(0, 8))
         
+        self.btn_select_image = ctk.CTkButton(
+            btn_frame,
+            text="样例图片",
+            command=self.select_image_sample,
+            width=100,
+            height=32,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color="#5B7FFF",
+            hover_color="#4A6EE8",
+            text_color="white"
+        )
+        self.btn_select_image.pack(side="left", padx=(0, 8))
+        
         self.btn_clear_regions = ctk.CTkButton(
             btn_frame,
             text="清除全部",
@@ -500,6 +514,20 @@ class MainWindow:
         )
         btn_add_text.pack(side="left", padx=(0, 8))
         
+        # 自动识别按钮
+        btn_detect_text = ctk.CTkButton(
+            btn_frame,
+            text="🔍 自动识别",
+            command=self.detect_text_watermarks,
+            width=100,
+            height=32,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color="#F39C12",
+            hover_color="#D68910",
+            text_color="white"
+        )
+        btn_detect_text.pack(side="left", padx=(0, 8))
+        
         self.btn_remove_text_all = ctk.CTkButton(
             btn_frame,
             text="删除全部",
@@ -658,9 +686,20 @@ class MainWindow:
                 "path": file_path,
                 "name": Path(file_path).name,
                 "page_count": page_count,
+                "watermark_layers": self.get_watermark_layer_names(file_path),  # 疑似水印的图层名
                 "status": "待处理"  # 处理状态：待处理、处理中、已完成、失败
             })
             
+    def get_watermark_layer_names(self, file_path):
+        """获取PDF文件中疑似水印的图层名（只读取图层定义，与页数无关）"""
+        try:
+            from core.pdf_handler import PDFHandler
+            from core.watermark_remover import WatermarkRemover
+            with PDFHandler(file_path) as handler:
+                return [layer["name"] for layer in WatermarkRemover(handler).find_watermark_layers()]
+        except Exception:
+            return []
+            
     def get_pdf_page_count(self, file_path):
         """获取PDF文件页数"""
         try:
@@ -739,9 +778,12 @@ class MainWindow:
         index_label.pack(side="left", padx=(0, 10), pady=8)
         
         # 标题列（文件名）- 居中对齐
+        title_text = f"📄 {file_info['name']}"
+        if file_info.get("watermark_layers"):
+            title_text += f"（水印图层: {'、'.join(file_info['watermark_layers'])}）"
         title_label = ctk.CTkLabel(
             item_frame,
-            text=f"📄 {file_info['name']}",
+            text=title_text,
             font=ctk.CTkFont(size=12),
             anchor="center",  # 居中对齐
             width=450
@@ -1052,9 +1094,29 @@ class MainWindow:
             self.update_region_display()
             self.update_status()
         
+    def select_image_sample(self):
+        """选择样例水印图片，所有文件中与之相似的图片都会被删除"""
+        file_path = filedialog.askopenfilename(
+            title="选择样例水印图片",
+            filetypes=[("图片文件", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff"), ("所有文件", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        try:
+            from core.image_index import image_file_signature
+            self.image_samples.append(image_file_signature(file_path))
+        except Exception as e:
+            show_error(self.root, f"无法读取图片: {e}")
+            return
+        
+        self.update_status()
+        show_info(self.root, f"已添加样例图片（共 {len(self.image_samples)} 张），处理时将删除所有相似图片")
+        
     def clear_all_regions(self):
-        """清除所有区域"""
+        """清除所有区域和样例图片"""
         self.selected_regions = []
+        self.image_samples = []
         self.update_region_display()
         self.update_status()
         
@@ -1168,6 +1230,53 @@ class MainWindow:
                 text_list.append(text)
         return text_list
     
+    def detect_text_watermarks(self):
+        """自动识别当前文件中的文字水印，并填入文字列表"""
+        if not self.file_list:
+            show_warning(self.root, "请先添加PDF文件")
+            return
+        
+        # 使用第一个选中的文件，没有选中时使用第一个文件
+        selected_indices = [idx for idx, checkbox_var in self.file_checkboxes.items() if checkbox_var.get()]
+        file_path = self.file_list[selected_indices[0] if selected_indices else 0]["path"]
+        
+        try:
+            from core.pdf_handler import PDFHandler
+            from core.watermark_detector import WatermarkDetector
+            
+            detection_config = self.config.get("detection", {})
+            with PDFHandler(file_path) as handler:
+                candidates = WatermarkDetector(handler).detect_text(
+                    sample_pages=detection_config.get("sample_pages", 30),
+                    min_page_ratio=detection_config.get("min_page_ratio", 0.6)
+                )
+        except Exception as e:
+            show_error(self.root, f"自动识别失败: {e}")
+            return
+        
+        if not candidates:
+            show_info(self.root, "未识别到疑似水印的文字")
+            return
+        
+        # 已有的文字不重复添加，优先填入空行
+        existing = set(self.get_text_to_remove_list())
+        empty_entries = [item["entry"] for item in self.text_input_widgets if not item["entry"].get().strip()]
+        added = []
+        for candidate in candidates:
+            if candidate["text"] in existing:
+                continue
+            if empty_entries:
+                empty_entries.pop(0).insert(0, candidate["text"])
+            else:
+                self.add_text_input_row(candidate["text"])
+            existing.add(candidate["text"])
+            added.append(f"{candidate['text']}（置信度 {candidate['confidence']:.0%}）")
+        
+        if added:
+            show_info(self.root, "已添加识别到的水印文字，请确认后再删除：\n\n" + "\n".join(added), "自动识别")
+        else:
+            show_info(self.root, "识别到的水印文字均已在列表中", "自动识别")
+    
     def remove_text_current(self):
         """删除当前文件文字"""
         text_list = self.get_text_to_remove_list()
@@ -1183,22 +1292,14 @@ class MainWindow:
         # 处理第一个文件
         file_path = self.file_list[0]["path"]
         try:
-            from core.pdf_handler import PDFHandler
-            from core.watermark_remover import WatermarkRemover
-            from utils.page_parser import parse_page_range
+            from core.batch_engine import BatchJob, create_engine
             
-            # 获取排除页面
-            excluded_pages = parse_page_range(self.page_exclude_input.get())
-            
-            with PDFHandler(file_path) as handler:
-                remover = WatermarkRemover(handler)
-                # 文字删除应用到所有文件的所有页，不受排除页限制
-                remover.remove_text(text_list, excluded_pages=None)
-                
-                # 保存文件
-                from utils.file_utils import get_output_path
-                output_path = get_output_path(file_path)
-                handler.save(output_path, optimize=True)
+            # 文字删除应用到所有文件的所有页，不受排除页限制
+            job = BatchJob([file_path], texts=text_list, options=self.get_text_options())
+            result = create_engine(job, self.get_batch_workers()).run()[0]
+            if not result["success"]:
+                raise Exception(result["error"])
+            output_path = result["output_path"]
             
             show_info(self.root, f"文字删除完成！\n输出文件: {output_path}", "成功")
             self.text_to_remove = text_list
@@ -1257,33 +1358,25 @@ class MainWindow:
         self.update_file_status(file_path, "处理中")
         
         try:
-            from core.pdf_handler import PDFHandler
-            from core.watermark_remover import WatermarkRemover
-            from utils.page_parser import parse_page_range
-            from utils.file_utils import get_output_path, get_file_size
+            from core.batch_engine import BatchJob, create_engine
+            from utils.file_utils import get_file_size
             
-            excluded_pages = parse_page_range(self.page_exclude_input.get())
+            # 文字从输入框获取最新列表，文字删除应用到所有页，不受排除页限制
+            job = BatchJob(
+                [{"path": file_path, "name": file_name, "index": index}],
+                regions=self.selected_regions,
+                texts=self.get_text_to_remove_list(),
+                excluded_pages=self.page_exclude_input.get(),
+                options=self.get_process_options()
+            )
+            result = create_engine(job, self.get_batch_workers()).run()[0]
+            if not result["success"]:
+                raise Exception(result["error"])
+            output_path = result["output_path"]
             
-            with PDFHandler(file_path) as handler:
-                remover = WatermarkRemover(handler)
-                
-                # 应用区域删除
-                if self.selected_regions:
-                    remover.remove_regions(self.selected_regions, excluded_pages, mode="actual")
-                
-                # 应用文字删除（从输入框获取最新列表）
-                # 文字删除应用到所有文件的所有页，不受排除页限制
-                text_list = self.get_text_to_remove_list()
-                if text_list:
-                    remover.remove_text(text_list, excluded_pages=None)
-                
-                # 保存文件
-                output_path = get_output_path(file_path)
-                handler.save(output_path, optimize=True)
-                
-                # 获取文件大小
-                input_size = get_file_size(file_path)
-                output_size = get_file_size(output_path)
+            # 获取文件大小
+            input_size = get_file_size(file_path)
+            output_size = get_file_size(output_path)
             
             self.update_file_status(file_path, "已完成")
             
@@ -1326,6 +1419,46 @@ class MainWindow:
         else:
             self.header_checkbox.deselect()
     
+    def get_batch_workers(self):
+        """获取批量处理的并行进程数"""
+        workers = self.config.get("batch", {}).get("workers", 0)
+        if not workers or workers < 1:
+            workers = os.cpu_count() or 1
+        return workers
+    
+    def get_text_options(self):
+        """获取只删除文字时的处理选项（不启用区域、图片、图层、广告页等其他策略）"""
+        options = self.get_process_options()
+        return {key: options[key] for key in ("text_mode", "output_suffix", "optimize") if key in options}
+    
+    def get_process_options(self):
+        """获取处理选项（传递给批量处理引擎）：在 DEFAULT_OPTIONS 上叠加配置中用户设置的项"""
+        from core.batch_engine import DEFAULT_OPTIONS
+        
+        options = dict(DEFAULT_OPTIONS)
+        # 配置中位置或名称与处理选项不同的项：(配置分组, 配置项) -> 选项名
+        mapped_keys = {
+            ("delete_mode", "region"): "region_mode",
+            ("delete_mode", "text"): "text_mode",
+            ("delete_mode", "crop_min_keep_ratio"): "crop_min_keep_ratio",
+            ("delete_mode", "crop_trim"): "crop_trim",
+            ("delete_mode", "overlay_fill"): "overlay_fill",
+            ("batch", "shard_pages"): "shard_pages",
+            ("batch", "shard_size"): "shard_size",
+            ("detection", "sample_pages"): "band_sample_pages",
+        }
+        for (section, key), option in mapped_keys.items():
+            value = self.config.get(section, {}).get(key)
+            if value is not None:
+                options[option] = value
+        options.update({
+            key: value for key, value in self.config.get("strategies", {}).items()
+            if key in DEFAULT_OPTIONS
+        })
+        options["image_samples"] = list(self.image_samples)
+        options["ad_library"] = str(config.AD_PAGE_LIBRARY_FILE)
+        return options
+    
     def batch_process_selected(self, selected_files):
         """批量处理选中的文件"""
         if not selected_files:
@@ -1345,7 +1478,9 @@ class MainWindow:
             regions=self.selected_regions,
             text_to_remove=self.text_to_remove,
             excluded_pages=excluded_pages_str,
-            main_window=self  # 传递主窗口引用
+            main_window=self,  # 传递主窗口引用
+            workers=self.get_batch_workers(),
+            options=self.get_process_options()
         )
         self.root.wait_window(dialog.dialog)
     
@@ -1369,7 +1504,9 @@ class MainWindow:
             regions=self.selected_regions,
             text_to_remove=self.text_to_remove,
             excluded_pages=excluded_pages_str,
-            main_window=self  # 传递主窗口引用
+            main_window=self,  # 传递主窗口引用
+            workers=self.get_batch_workers(),
+            options=self.get_process_options()
         )
         self.root.wait_window(dialog.dialog)
         
@@ -1390,9 +1527,10 @@ class MainWindow:
         """更新状态栏"""
         file_count = len(self.file_list)
         region_count = len(self.selected_regions)
-        self.status_label.configure(
-            text=f"就绪 | 共 {file_count} 个文件 | 已选 {region_count} 个区域"
-        )
+        status = f"就绪 | 共 {file_count} 个文件 | 已选 {region_count} 个区域"
+        if self.image_samples:
+            status += f" | {len(self.image_samples)} 张样例图片"
+        self.status_label.configure(text=status)
         
     def on_closing(self):
         """窗口关闭事件"""
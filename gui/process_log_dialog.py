@@ -2,7 +2,6 @@
 import customtkinter as ctk
 from tkinter import Text, Scrollbar
 import threading
-import time
 from pathlib import Path
 import os
 import subprocess
@@ -11,13 +10,17 @@ from utils.window_utils import show_error, show_warning, center_window
 
 
 class ProcessLogDialog:
-    def __init__(self, parent, file_list, regions=None, text_to_remove=None, excluded_pages="", main_window=None):
+    def __init__(self, parent, file_list, regions=None, text_to_remove=None, excluded_pages="", main_window=None,
+                 workers=1, options=None):
         self.parent = parent
         self.file_list = file_list
         self.regions = regions or []
         self.text_to_remove = text_to_remove or []
         self.excluded_pages = excluded_pages
         self.main_window = main_window  # 保存主窗口引用，用于更新文件状态
+        self.workers = max(1, workers or 1)  # 并行处理的进程数（1 表示逐个处理）
+        self.options = options or {}  # 处理选项（见 core.batch_engine.DEFAULT_OPTIONS）
+        self.engine = None
         self.is_processing = False
         self.is_paused = False
         self.is_stopped = False
@@ -233,145 +236,24 @@ class ProcessLogDialog:
         
     def process_files(self):
         """处理文件（在后台线程中运行）"""
-        total_files = len(self.file_list)
+        from core.batch_engine import BatchJob, create_engine
         
         # 获取处理参数（从父窗口传递）
-        regions = getattr(self, 'regions', [])
-        text_to_remove = getattr(self, 'text_to_remove', [])
-        excluded_pages_str = getattr(self, 'excluded_pages', "")
-        
-        for idx, file_info in enumerate(self.file_list):
-            if self.is_stopped:
-                break
-                
-            # 等待暂停恢复
-            while self.is_paused and not self.is_stopped:
-                time.sleep(0.1)
-                
-            if self.is_stopped:
-                break
-                
-            file_path = file_info["path"]
-            file_name = file_info["name"]
-            
-            self.update_current_file(f"{file_name} (第 {idx + 1} 个 / 共 {total_files} 个)")
-            self.create_file_card(file_name, "processing")
-            
-            if self.main_window:
-                self.dialog.after_idle(lambda fp=file_path: self.main_window.update_file_status(fp, "处理中"))
-            
-            self.stats["waiting"] = max(0, self.stats["waiting"] - 1)
-            self.stats["processing"] = 1
-            self.update_stats()
-            
-            try:
-                from core.pdf_handler import PDFHandler
-                from core.watermark_remover import WatermarkRemover
-                from utils.page_parser import parse_page_range
-                from utils.file_utils import get_output_path
-                
-                # 添加日志
-                self.add_log_to_card(file_name, "✅ 开始处理...", "success")
-                
-                excluded_pages = parse_page_range(excluded_pages_str)
-                
-                with PDFHandler(file_path) as handler:
-                    remover = WatermarkRemover(handler)
-                    
-                    # 应用区域删除（根据区域的应用范围智能过滤）
-                    region_count = 0
-                    if regions:
-                        file_regions = []
-                        current_file_index = idx  # 当前处理的文件索引
-                        
-                        for region in regions:
-                            scope = region.get("scope", "current")
-                            region_file_index = region.get("file_index", 0)  # 区域所属的文件索引
-                            region_page = region.get("page", 0)  # 区域所属的页面索引
-                            
-                            # 根据应用范围判断是否应该应用到当前文件
-                            should_apply = False
-                            
-                            if scope == "all_files":
-                                # 所有文件所有页：应用到所有文件
-                                should_apply = True
-                            elif scope == "all_pages":
-                                # 当前文件所有页：只在区域所属的文件时应用
-                                should_apply = (region_file_index == current_file_index)
-                            elif scope == "current":
-                                # 当前页：只在区域所属的文件时应用
-                                # remove_regions 会根据 region_page 只应用到对应页面
-                                should_apply = (region_file_index == current_file_index)
-                            
-                            if should_apply:
-                                file_regions.append(region)
-                                region_count += 1
-                        
-                        if file_regions:
-                            remover.remove_regions(file_regions, excluded_pages, mode="actual")
-                            self.add_log_to_card(file_name, f"✅ 应用区域删除: {region_count}个区域", "success")
-                    
-                    # 应用文字删除（文字删除应用到所有文件的所有页，不受排除页限制）
-                    if text_to_remove:
-                        text_match_counts = remover.remove_text(text_to_remove, excluded_pages=None)
-                        
-                        # 显示每个文字的匹配数量
-                        if text_match_counts:
-                            self.add_log_to_card(file_name, "✅ 应用文字删除:", "success")
-                            for text, count in text_match_counts.items():
-                                if count > 0:
-                                    self.add_log_to_card(file_name, f"   • \"{text}\": 匹配到 {count} 处", "info")
-                                else:
-                                    self.add_log_to_card(file_name, f"   • \"{text}\": 未匹配到", "warning")
-                        else:
-                            self.add_log_to_card(file_name, "✅ 应用文字删除: 无匹配文字", "warning")
-                    
-                    # 排除页面信息
-                    if excluded_pages:
-                        from utils.page_parser import format_page_range
-                        excluded_str = format_page_range(excluded_pages)
-                        self.add_log_to_card(file_name, f"✅ 排除页面: {excluded_str}", "success")
-                    
-                    # 保存文件
-                    output_path = get_output_path(file_path)
-                    handler.save(output_path, optimize=True)
-                    output_name = Path(output_path).name
-                    self.add_log_to_card(file_name, f"✅ 保存文件: {output_name}", "success")
-                    
-                    if self.output_dir is None:
-                        self.output_dir = str(Path(output_path).parent)
-                    
-                    self.add_log_to_card(file_name, "✅ 处理完成！", "success")
-                
-                # 更新状态为成功
-                self.update_file_card_status(file_name, "success")
-                self.stats["success"] += 1
-                self.stats["processing"] = 0
-                
-                # 记录处理结果
-                self.processed_files[file_path] = "已完成"
-                
-                if self.main_window:
-                    self.dialog.after_idle(lambda fp=file_path: self.main_window.update_file_status(fp, "已完成"))
-                
-            except Exception as e:
-                import traceback
-                error_msg = str(e)
-                self.add_log_to_card(file_name, f"❌ 处理失败: {error_msg}", "error")
-                self.update_file_card_status(file_name, "error")
-                self.stats["failed"] += 1
-                self.stats["processing"] = 0
-                
-                # 记录处理结果
-                self.processed_files[file_path] = "失败"
-                
-                if self.main_window:
-                    self.dialog.after_idle(lambda fp=file_path: self.main_window.update_file_status(fp, "失败"))
-                
-            # 更新进度
-            progress = (idx + 1) / total_files
-            self.update_progress(progress, idx + 1, total_files)
-            
+        job = BatchJob(
+            self.file_list,
+            regions=getattr(self, 'regions', []),
+            texts=getattr(self, 'text_to_remove', []),
+            excluded_pages=getattr(self, 'excluded_pages', ""),
+            options=self.options
+        )
+        self.engine = create_engine(job, self.workers)
+        if self.is_stopped:
+            self.engine.stop()
+        elif self.is_paused:
+            self.engine.pause()
+        
+        self.engine.run(on_file_start=self._on_file_started, on_file_done=self._on_file_finished)
+        
         # 处理完成
         self.is_processing = False
         
@@ -401,6 +283,64 @@ class ProcessLogDialog:
             # 弹出成功提示对话框
             self.dialog.after(500, self.show_completion_dialog)
             
+    def _on_file_started(self, file_info):
+        """文件开始处理时更新状态"""
+        file_path = file_info["path"]
+        running = self.stats["processing"] + 1
+        total_files = len(self.file_list)
+        self.update_current_file(f"{file_info['name']} (第 {file_info['index'] + 1} 个 / 共 {total_files} 个，"
+                                 f"{running} 个处理中)")
+        self.create_file_card(file_info["name"], "processing")
+        self.add_log_to_card(file_info["name"], "⏳ 处理中...", "info")
+        
+        if self.main_window:
+            self.dialog.after_idle(lambda fp=file_path: self.main_window.update_file_status(fp, "处理中"))
+        
+        self.stats["waiting"] = max(0, self.stats["waiting"] - 1)
+        self.stats["processing"] += 1
+        self.update_stats()
+    
+    def _on_file_finished(self, file_info, result):
+        """文件处理完成时更新卡片、统计和进度（可乱序调用）"""
+        file_path = result["file_path"]
+        file_name = file_info["name"]
+        
+        # 一次性写入该文件的全部日志，避免并行时日志交错（并行时中间可能插入了其他文件的卡片，再写一次文件名）
+        if file_name not in self.file_cards:
+            self.create_file_card(file_name, "processing")
+        elif self.workers > 1:
+            self.add_log("", f"\n📄 {file_name}", "info")
+        for message, tag in result["logs"]:
+            self.add_log_to_card(file_name, message, tag)
+        
+        self.stats["processing"] = max(0, self.stats["processing"] - 1)
+        
+        if result["success"]:
+            # 更新状态为成功
+            self.update_file_card_status(file_name, "success")
+            self.stats["success"] += 1
+            status = "已完成"
+            
+            if self.output_dir is None and result["output_path"]:
+                self.output_dir = str(Path(result["output_path"]).parent)
+        else:
+            self.update_file_card_status(file_name, "error")
+            self.stats["failed"] += 1
+            status = "失败"
+        
+        # 记录处理结果
+        self.processed_files[file_path] = status
+        
+        if self.main_window:
+            self.dialog.after_idle(lambda fp=file_path, st=status: self.main_window.update_file_status(fp, st))
+        
+        self.update_stats()
+        
+        # 更新进度
+        finished = self.stats["success"] + self.stats["failed"]
+        total_files = len(self.file_list)
+        self.update_progress(finished / total_files, finished, total_files)
+            
     def create_file_card(self, file_name, status):
         """创建文件卡片"""
         # 卡片框架
@@ -502,8 +442,12 @@ class ProcessLogDialog:
         """切换暂停状态"""
         self.is_paused = not self.is_paused
         if self.is_paused:
+            if self.engine:
+                self.engine.pause()
             self.btn_pause.configure(text="▶️ 继续")
         else:
+            if self.engine:
+                self.engine.resume()
             self.btn_pause.configure(text="⏸️ 暂停")
             
     
@@ -511,6 +455,8 @@ class ProcessLogDialog:
         """停止处理"""
         self.is_stopped = True
         self.is_paused = False
+        if self.engine:
+            self.engine.stop()
         self.add_log("", "⏹️ 处理已停止", "warning")
         
     def show_completion_dialog(self):
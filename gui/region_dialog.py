@@ -4,7 +4,7 @@ from tkinter import Canvas, Scrollbar, Menu
 from PIL import Image, ImageTk
 import fitz
 from pathlib import Path
-from utils.window_utils import show_error, center_window
+from utils.window_utils import show_info, show_error, center_window
 
 
 class RegionDialog:
@@ -145,6 +145,19 @@ class RegionDialog:
         right_frame = ctk.CTkFrame(top_frame, fg_color=("white", "#FFFFFF"))
         right_frame.pack(side="right", padx=10, pady=8)
         
+        self.btn_detect = ctk.CTkButton(
+            right_frame,
+            text="🔍 自动识别",
+            command=self.detect_regions,
+            width=100,
+            height=30,
+            fg_color="#F39C12",
+            hover_color="#D68910",
+            font=ctk.CTkFont(size=11, weight="bold"),
+            text_color="white"
+        )
+        self.btn_detect.pack(side="left", padx=(0, 8))
+        
         self.btn_cancel = ctk.CTkButton(
             right_frame,
             text="取消",
@@ -819,6 +832,34 @@ class RegionDialog:
             self.draw_selected_regions()
             self.update_preview()
     
+    def detect_regions(self):
+        """自动识别当前文件中跨页面不变的水印区域，并添加为当前文件所有页的区域"""
+        try:
+            from core.pdf_handler import PDFHandler
+            from core.watermark_detector import WatermarkDetector
+            
+            with PDFHandler(self.pdf_path) as handler:
+                regions = WatermarkDetector(handler).detect_regions()
+        except Exception as e:
+            show_error(self.dialog, f"自动识别失败: {e}")
+            return
+        
+        if not regions:
+            show_info(self.dialog, "未识别到跨页面不变的水印区域", "自动识别")
+            return
+        
+        for region in regions:
+            self.selected_regions.append({
+                "rect": region["rect"],
+                "page": self.current_page,
+                "scope": "all_pages",
+                "file_index": self.current_file_index
+            })
+        
+        self.draw_selected_regions()
+        self.update_preview()
+        show_info(self.dialog, f"已添加 {len(regions)} 个识别到的区域，请确认后再应用", "自动识别")
+    
     def delete_last_region(self, event=None):
         """删除指定的区域（支持输入序号或全部删除）"""
         if not self.selected_regions:
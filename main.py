@@ -1,5 +1,6 @@
 """PDF批量去水印工具 - 主程序入口"""
 import sys
+import multiprocessing
 from pathlib import Path
 
 project_root = Path(__file__).parent
@@ -21,4 +22,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包为可执行文件时，批量处理的子进程需要此调用
+    multiprocessing.freeze_support()
     main()
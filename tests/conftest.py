@@ -0,0 +1,30 @@
+"""测试公共设置：把项目根目录加入模块搜索路径，并提供生成测试 PDF 的工具"""
+import sys
+from pathlib import Path
+
+import fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_pdf(path, pages, fonts: str = ""):
+    """
+    生成测试 PDF：每页一个内容流
+
+    Args:
+        path: 保存路径
+        pages: 每页内容流（bytes）的列表
+        fonts: 可选，页面 /Resources 中的 /Font 字典内容，如 "/F1 <</Type/Font/Subtype/Type1/BaseFont/Helvetica>>"
+    """
+    doc = fitz.open()
+    for data in pages:
+        page = doc.new_page()
+        xref = doc.get_new_xref()
+        doc.update_object(xref, "<<>>")
+        doc.update_stream(xref, data)
+        doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+        if fonts:
+            doc.xref_set_key(page.xref, "Resources", f"<</Font<<{fonts}>>>>")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
@@ -0,0 +1,73 @@
+"""大文件分片处理与合并测试"""
+import fitz
+import pytest
+
+from core.batch_processor import assemble_shards, process_shard
+
+PAGE_COUNT = 6
+SHARDS = [(0, 3), (3, 6)]
+TOC = [[1, "第一章", 1], [2, "第一节", 2], [1, "第二章", 5]]
+
+
+@pytest.fixture
+def source(tmp_path):
+    """6 页文件：每页左上角有水印文字，带目录、跨分片的页内链接和一个推广链接"""
+    doc = fitz.open()
+    for page_num in range(PAGE_COUNT):
+        page = doc.new_page()
+        page.insert_text((50, 50), "WATERMARK")
+        page.insert_text((50, 400), f"Page {page_num + 1}")
+    for page_num in range(PAGE_COUNT):
+        doc[page_num].insert_link({
+            "kind": fitz.LINK_GOTO, "from": fitz.Rect(50, 500, 150, 520),
+            "page": PAGE_COUNT - 1 - page_num, "to": fitz.Point(0, 0)
+        })
+    doc[0].insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(50, 600, 150, 620), "uri": "https://ad.example.com/"})
+    doc.set_toc(TOC)
+    path = tmp_path / "source.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def _process(source, tmp_path, options=None, excluded_pages_str=""):
+    regions = [{"rect": [40, 30, 200, 60], "scope": "all_pages", "file_index": 0}]
+    options = dict(options or {}, output_suffix="_out")
+    shards = [
+        process_shard(0, source, start, end, str(tmp_path / f"shard_{start}.pdf"),
+                      regions, [], excluded_pages_str, options)
+        for start, end in SHARDS
+    ]
+    result = assemble_shards(0, source, shards, regions, excluded_pages_str, options)
+    assert result["success"], result["error"]
+    return fitz.open(result["output_path"])
+
+
+def test_assemble_restores_toc_and_links(source, tmp_path):
+    with _process(source, tmp_path) as doc:
+        assert len(doc) == PAGE_COUNT
+        assert doc.get_toc() == TOC
+        for page_num in range(PAGE_COUNT):
+            targets = [link["page"] for link in doc[page_num].get_links() if link["kind"] == fitz.LINK_GOTO]
+            assert targets == [PAGE_COUNT - 1 - page_num]
+        assert [link["uri"] for link in doc[0].get_links() if link["kind"] == fitz.LINK_URI] == [
+            "https://ad.example.com/"
+        ]
+
+
+def test_assemble_skips_removed_links(source, tmp_path):
+    with _process(source, tmp_path, {"annotations": True, "link_url_patterns": [r"ad\.example"]}) as doc:
+        assert not any(link["kind"] == fitz.LINK_URI for link in doc[0].get_links())
+        assert all(doc[page_num].get_links() for page_num in range(PAGE_COUNT))
+
+    with _process(source, tmp_path, {"annotations": True, "annot_subtypes": ["Link"]}) as doc:
+        assert not any(page.get_links() for page in doc)
+
+
+def test_assemble_keeps_excluded_pages(source, tmp_path):
+    # 第 2 页在第一个分片、第 5 页在第二个分片
+    with _process(source, tmp_path, excluded_pages_str="2,5") as doc:
+        for page_num in range(PAGE_COUNT):
+            text = doc[page_num].get_text()
+            assert f"Page {page_num + 1}" in text
+            assert ("WATERMARK" in text) == (page_num + 1 in (2, 5))
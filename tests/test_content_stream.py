@@ -0,0 +1,93 @@
+"""内容流编辑器测试"""
+import fitz
+
+from conftest import make_pdf
+from core.content_stream import ContentStreamEditor, iter_operations
+from core.pdf_handler import PDFHandler
+from core.watermark_remover import WatermarkRemover
+
+HELVETICA = "/F1 <</Type/Font/Subtype/Type1/BaseFont/Helvetica>>"
+
+
+def _words(page):
+    return {word[4]: fitz.Rect(word[:4]) for word in page.get_text("words")}
+
+
+def test_iter_operations_splits_operands():
+    ops = [(op.operator, op.operands) for op in iter_operations(b"q 1 0 0 1 10 20 cm /F1 12 Tf (a b) Tj Q")]
+    assert ops == [
+        (b"q", []),
+        (b"cm", [b"1", b"0", b"0", b"1", b"10", b"20"]),
+        (b"Tf", [b"/F1", b"12"]),
+        (b"Tj", [b"(a b)"]),
+        (b"Q", []),
+    ]
+
+
+def test_remove_text_keeps_advance_of_following_text(tmp_path):
+    path = make_pdf(tmp_path / "advance.pdf", [b"BT /F1 12 Tf 100 700 Td (Draft) Tj ( Body) Tj ET"], HELVETICA)
+    with PDFHandler(path) as handler:
+        before = _words(handler.doc[0])["Body"]
+        counts = WatermarkRemover(handler).remove_text_operators(["Draft"])
+        after = _words(handler.doc[0])
+
+    assert counts == {"Draft": 1}
+    assert "Draft" not in after
+    assert abs(after["Body"].x0 - before.x0) < 0.01
+
+
+def test_remove_text_without_width_keeps_following_show():
+    data = b"BT /F1 12 Tf (Draft) Tj (Body) Tj ET"
+    editor = ContentStreamEditor(data)
+
+    # 宽度未知时删除会使后面的文字移位，保留原操作
+    assert editor.remove_text(lambda show: show.text == "Draft") == 0
+    assert editor.getvalue() == data
+
+
+def test_remove_text_last_show_in_block():
+    editor = ContentStreamEditor(b"BT /F1 12 Tf (Body) Tj (Draft) Tj ET")
+
+    assert editor.remove_text(lambda show: show.text == "Draft") == 1
+    assert b"Draft" not in editor.getvalue()
+    assert b"(Body) Tj" in editor.getvalue()
+
+
+def test_remove_drawing_under_transparent_state():
+    data = b"q /GS0 gs 0 0 10 10 re f BT (W) Tj ET /Im0 Do Q 0 0 5 5 re f"
+    editor = ContentStreamEditor(data)
+
+    assert editor.remove_drawing({"GS0"}, set()) == 3
+    assert editor.getvalue() == b"q /GS0 gs 0 0 10 10 re n BT  ET  Q 0 0 5 5 re f"
+
+
+def test_remove_drawing_ignores_gs_that_keeps_alpha():
+    data = b"q /GS0 gs /LW gs 0 0 10 10 re f /Opaque gs 1 1 2 2 re f Q"
+    editor = ContentStreamEditor(data)
+
+    # /LW 不设置透明度，/Opaque 把透明度恢复为 1
+    assert editor.remove_drawing({"GS0"}, set(), alpha_names={"GS0", "Opaque"}) == 1
+    assert editor.getvalue() == b"q /GS0 gs /LW gs 0 0 10 10 re n /Opaque gs 1 1 2 2 re f Q"
+
+
+def test_remove_drawing_removes_images_in_any_state():
+    editor = ContentStreamEditor(b"q 10 0 0 10 0 0 cm /Im1 Do Q /Im2 Do")
+
+    assert editor.remove_drawing(set(), {"Im1"}) == 1
+    assert editor.getvalue() == b"q 10 0 0 10 0 0 cm  Q /Im2 Do"
+
+
+def test_remove_paths_matches_box_in_page_space():
+    data = (b"q 1 0 0 1 100 300 cm 8 w 0 0 m 30 80 70 80 100 0 c S Q "
+            b"120 320 60 2 re f 90 290 m 200 290 l S")
+    editor = ContentStreamEditor(data)
+    boxes = []
+
+    def predicate(bbox):
+        boxes.append(bbox)
+        return True
+
+    # 只有含曲线的路径参与判断，直线和矩形保持不变
+    assert editor.remove_paths(predicate, (1, 0, 0, -1, 0, 842)) == 1
+    assert boxes == [(100.0, 462.0, 200.0, 542.0)]
+    assert editor.getvalue() == data.replace(b"100 0 c S", b"100 0 c n")
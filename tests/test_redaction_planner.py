@@ -0,0 +1,39 @@
+"""删除计划测试"""
+import fitz
+
+from core.redaction_planner import RedactionPlan, merge_rects
+
+
+def _sorted(rects):
+    return sorted(tuple(rect) for rect in rects)
+
+
+def test_merge_rects_drops_duplicates_and_contained():
+    rects = merge_rects([(0, 0, 100, 100), (0, 0, 100, 100), (10, 10, 20, 20), (20, 20, 10, 10)])
+
+    assert _sorted(rects) == [(0, 0, 100, 100)]
+
+
+def test_merge_rects_joins_adjacent_and_overlapping():
+    rects = merge_rects([(0, 0, 100, 10), (0, 10, 100, 30), (0, 25, 100, 40), (100, 0, 150, 40)])
+
+    assert _sorted(rects) == [(0, 0, 150, 40)]
+
+
+def test_merge_rects_keeps_area_unchanged():
+    # 宽度不同的矩形合并会扩大覆盖面积，保持原样
+    rects = merge_rects([(0, 0, 100, 10), (0, 10, 50, 20), fitz.Rect(0, 0, 0, 5)])
+
+    assert _sorted(rects) == [(0, 0, 100, 10), (0, 10, 50, 20)]
+
+
+def test_plan_merges_global_and_page_rects():
+    plan = RedactionPlan(page_count=3)
+    plan.add_global((0, 0, 100, 10), None, {1})
+    plan.add(0, (0, 10, 100, 20))
+    plan.add(1, (0, 0, 100, 10))
+    plan.compile()
+
+    assert _sorted(rect for rect, fill in plan.rects(0)) == [(0, 0, 100, 20)]
+    assert _sorted(rect for rect, fill in plan.rects(1)) == [(0, 0, 100, 10)]
+    assert _sorted(rect for rect, fill in plan.rects(2)) == [(0, 0, 100, 10)]
@@ -0,0 +1,21 @@
+"""半透明叠加层识别测试"""
+import fitz
+
+from conftest import make_pdf
+from core.transparency import TransparencyScanner
+
+
+def test_overlay_with_resources_inherited_from_page_tree(tmp_path):
+    path = make_pdf(tmp_path / "inherited.pdf", [b"q /GS0 gs /GS1 gs 0 0 50 50 re f Q 0 0 10 10 re f"] * 3)
+    doc = fitz.open(path)
+    pages = int(doc.xref_get_key(doc.pdf_catalog(), "Pages")[1].split()[0])
+    doc.xref_set_key(pages, "Resources", "<</ExtGState<</GS0<</ca 0.3>>/GS1<</LW 2>>>>>>")
+    for page in doc:
+        doc.xref_set_key(page.xref, "Resources", "null")
+
+    result = TransparencyScanner(doc).remove_overlays(0.5)
+
+    assert [overlay["value"] for overlay in result["overlays"]] == [(1.0, 0.3)]
+    assert result["operations"] == 3
+    for page in doc:
+        assert page.read_contents() == b"q /GS0 gs /GS1 gs 0 0 50 50 re n Q 0 0 10 10 re f"